@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Fold the per-rejection files in .github/keydates_rejections/ into
+.github/keydates_rejections.json: one array, sorted by (event_id, category,
+kind, date), which the keydates worker reads in one go.
+
+Idempotent, and the index is only rewritten when it changes, so any number
+of runs can race: the last one to push wins with the same result. Run from
+the repo root:  python3 .github/scripts/keydates_compact.py
+"""
+import json
+import os
+import sys
+
+from keydates_reject import KEY, REJECTIONS_DIR, REJECTIONS_INDEX, rejection_path
+
+def read_rejections(rejections_dir=REJECTIONS_DIR):
+    """Every stored rejection, sorted by key. Raises ValueError on a file
+    that isn't named for the rejection in it, e.g. after a hand edit."""
+    rejections = []
+    try:
+        names = sorted(os.listdir(rejections_dir))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(rejections_dir, name)
+        with open(path) as f:
+            rejection = json.load(f)
+        expected = os.path.basename(rejection_path(*(rejection[k] for k in KEY)))
+        if name != expected:
+            raise ValueError(f"{path} holds a rejection that belongs in {expected}")
+        rejections.append(rejection)
+    rejections.sort(key=lambda r: tuple(r[k] for k in KEY))
+    return rejections
+
+def compact(rejections_dir=REJECTIONS_DIR, index_file=REJECTIONS_INDEX):
+    """Rebuild the index, returning (number of rejections, whether the
+    index changed)."""
+    rejections = read_rejections(rejections_dir)
+    data = json.dumps(rejections, indent=2, ensure_ascii=False) + "\n"
+    try:
+        with open(index_file) as f:
+            if f.read() == data:
+                return len(rejections), False
+    except FileNotFoundError:
+        pass
+    with open(index_file, "w") as f:
+        f.write(data)
+    return len(rejections), True
+
+def main() -> int:
+    try:
+        count, changed = compact()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"couldn't compact rejections: {e!r}", file=sys.stderr)
+        return 1
+    print(f"{count} rejections, index {'rewritten' if changed else 'unchanged'}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,20 @@
 
 Reads the comment ONLY from env (never shell-interpolated — comment bodies on
 a public repo are attacker-controlled), parses it against a strict grammar,
-and appends the rejection to .github/keydates_rejections.json. The keydates worker
-reads that file each run and never re-proposes a matching date.
+and records the rejection as its own file in .github/keydates_rejections/.
+keydates_compact.py folds those into .github/keydates_rejections.json, which
+the keydates worker reads each run, never re-proposing a matching date.
 
 Syntax:  /reject <event_id> <category>.<kind> <date> — <reason...>
 Example: /reject anthrocon-2026 registration.closes 2026-06-26 — that's the pre-reg deadline
+
+With --batch, records a JSON list of comments (from a file, or stdin) in one
+commit and one push, and prints a JSON list of {"id", "result"}, one per
+comment: ok, duplicate, parse-failure, invalid-date or push-failure.
 """
+import argparse
 import datetime
+import hashlib
 import json
 import os
 import random
@@ -28,7 +35,21 @@ GRAMMAR = re.compile(
     re.S,
 )
 
-REJECTIONS_FILE = ".github/keydates_rejections.json"
+# One file per rejection, named by a hash of its key (see rejection_path).
+REJECTIONS_DIR = ".github/keydates_rejections"
+
+# Every rejection in one sorted array, built from REJECTIONS_DIR by
+# keydates_compact.py for readers that want them all at once.
+REJECTIONS_INDEX = ".github/keydates_rejections.json"
+
+KEY = ("event_id", "category", "kind", "date")
+
+def rejection_path(event_id, category, kind, date):
+    """Where the rejection of a key date is stored. Each key has its own
+    file, so parallel runs never write the same path unless they reject the
+    same date, and dedup is an existence check."""
+    digest = hashlib.sha256(json.dumps([event_id, category, kind, date]).encode()).hexdigest()
+    return os.path.join(REJECTIONS_DIR, f"{digest[:16]}.json")
 
 def parse(body):
     """Parse a /reject comment. Returns (fields, None) or (None, error)."""
@@ -41,20 +62,17 @@ def parse(body):
         return None, "invalid-date"
     return m.groups(), None
 
-def main() -> int:
-    body = os.environ.get("COMMENT_BODY", "")
-    user = os.environ.get("COMMENT_USER", "")
-    created = os.environ.get("COMMENT_CREATED_AT", "")
-
+def make_entry(body, user, created):
+    """Parse a /reject comment into the rejection to store. Returns
+    (entry, None) or (None, error)."""
     fields, err = parse(body)
     if err:
-        print(err, end="")
-        return 0  # workflow reacts with 👎 based on the output
+        return None, err
 
     event_id, category, kind, date, reason = fields
     reason = " ".join(reason.split())[:300]  # collapse whitespace, cap length
 
-    entry = {
+    return {
         "event_id": event_id,
         "category": category,
         "kind": kind,
@@ -62,20 +80,23 @@ def main() -> int:
         "reason": reason,
         "by": user,
         "at": created,
-    }
-
-    # our stdout is captured into $GITHUB_OUTPUT — only the sentinel word may
-    # reach it, so route every git subprocess's stdout to stderr
-    def git(*args, check=True):
-        return subprocess.run(["git", *args], check=check, stdout=sys.stderr)
-
-    key = ("event_id", "category", "kind", "date")
-    # Batched /reject comments now run in parallel (one concurrency group per
-    # comment id), so serialize at the git layer: on every attempt re-sync to
-    # the latest origin/main, then dedup + append against THAT and push. We
-    # RECOMPUTE the append each time rather than rebasing our own commit —
-    # two runs appending to the same JSON array would otherwise conflict on
-    # rebase or clobber each other's entry.
+    }, None
+
+# our stdout is captured into $GITHUB_OUTPUT — only the sentinel may reach
+# it, so route every git subprocess's stdout to stderr
+def git(*args, check=True):
+    return subprocess.run(["git", *args], check=check, stdout=sys.stderr)
+
+def record(entries):
+    """Store entries in a single commit and push it. Returns a sentinel per
+    entry: ok, duplicate (already stored, or earlier in entries), or
+    push-failure."""
+    results = None
+    # Batched /reject comments can still run in parallel with each other, so
+    # serialize at the git layer: on every attempt re-sync to the latest
+    # origin/main, then dedup + add our files against THAT and push. Each
+    # rejection has its own file, so replaying onto a rival's push never
+    # conflicts; a lost push just costs another round-trip.
     # Budget must cover the worst case where N racing runners each need their
     # own attempt to win the push; 25 is generous headroom over observed batch
     # sizes. A transient git error (fetch/reset/add/commit) is caught and
@@ -86,35 +107,127 @@ def main() -> int:
             git("config", "user.email", "github@cons.fyi")
             git("fetch", "origin", "main")
             git("reset", "--hard", "origin/main")
-            with open(REJECTIONS_FILE) as f:
-                rejections = json.load(f)
-            if any(all(r.get(k) == entry[k] for k in key) for r in rejections):
-                print("duplicate", end="")
-                return 0
-            rejections.append(entry)
-            with open(REJECTIONS_FILE, "w") as f:
-                json.dump(rejections, f, indent=2, ensure_ascii=False)
-                f.write("\n")
-            git("add", REJECTIONS_FILE)
-            git("commit", "-m", f"Reject key date {event_id} {category}.{kind} {date}")
+            results = []
+            added = []
+            for entry in entries:
+                path = rejection_path(*(entry[k] for k in KEY))
+                if path in added or os.path.exists(path):
+                    results.append("duplicate")
+                    continue
+                os.makedirs(REJECTIONS_DIR, exist_ok=True)
+                with open(path, "w") as f:
+                    json.dump(entry, f, indent=2, ensure_ascii=False)
+                    f.write("\n")
+                added.append(path)
+                results.append("ok")
+            if not added:
+                return results
+            git("add", *added)
+            keys = [
+                f"{entry['event_id']} {entry['category']}.{entry['kind']} {entry['date']}"
+                for entry, result in zip(entries, results)
+                if result == "ok"
+            ]
+            if len(keys) == 1:
+                git("commit", "-m", f"Reject key date {keys[0]}")
+            else:
+                git("commit", "-m", f"Reject {len(keys)} key dates", "-m", "\n".join(keys))
             if git("push", check=False).returncode == 0:
-                print("ok", end="")
-                return 0
-        except (subprocess.CalledProcessError, OSError, json.JSONDecodeError) as e:
+                return results
+        except (subprocess.CalledProcessError, OSError) as e:
             # stdout is the sentinel channel, so log the swallowed error to
             # stderr — an exhausted loop is then diagnosable (which step, why).
-            # A corrupt/missing rejections file loops to push-failure so the
+            # An unwritable rejections directory loops to push-failure so the
             # commenter still gets a 👎 rather than a silent crash.
             print(f"reject attempt {attempt} failed: {e!r}", file=sys.stderr)
         # jitter so near-simultaneous losers don't retry in lockstep
         # (skip after the final attempt — no point sleeping before we give up)
         if attempt < 24:
             time.sleep(0.5 * (attempt + 1) + random.uniform(0, 0.5))
-    # Exhausted: emit the sentinel but exit 0 so the Record step succeeds and
-    # the React step still runs to post feedback (exit 1 would skip it, which
-    # is the silent-drop bug this loop fixes).
-    print("push-failure", end="")
+    # Exhausted: whatever was found stored on the last look is still a
+    # duplicate; everything else failed to push.
+    if results is None or len(results) != len(entries):
+        results = ["push-failure"] * len(entries)
+    return [result if result == "duplicate" else "push-failure" for result in results]
+
+def read_batch(f):
+    """Read a JSON list of comments, either as the GitHub API returns them
+    or as {"id", "body", "user", "created_at"} with a plain user login."""
+    comments = json.load(f)
+    if not isinstance(comments, list):
+        raise ValueError("expected a JSON list of comments")
+    return [
+        {
+            "id": comment.get("id"),
+            "body": comment.get("body") or "",
+            "user": (
+                comment["user"].get("login", "")
+                if isinstance(comment.get("user"), dict)
+                else comment.get("user") or ""
+            ),
+            "created_at": comment.get("created_at") or "",
+        }
+        for comment in comments
+    ]
+
+def process_batch(comments):
+    """Validate every comment, then record all the valid ones in one commit
+    and one push. Returns [{"id", "result"}] in the comments' order."""
+    results = [None] * len(comments)
+    entries = []
+    indexes = []
+    for i, comment in enumerate(comments):
+        entry, err = make_entry(comment["body"], comment["user"], comment["created_at"])
+        if err:
+            results[i] = err
+        else:
+            entries.append(entry)
+            indexes.append(i)
+    if entries:
+        for i, result in zip(indexes, record(entries)):
+            results[i] = result
+    return [{"id": comment["id"], "result": result} for comment, result in zip(comments, results)]
+
+def main(argv=()) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--batch",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="record a JSON list of comments from FILE, or stdin, in one push, "
+        "printing a JSON list of {id, result}",
+    )
+    args = parser.parse_args(argv)
+
+    if args.batch is not None:
+        try:
+            if args.batch == "-":
+                comments = read_batch(sys.stdin)
+            else:
+                with open(args.batch) as f:
+                    comments = read_batch(f)
+        except (OSError, ValueError, AttributeError, KeyError) as e:
+            print(f"couldn't read comments: {e!r}", file=sys.stderr)
+            return 1
+        print(json.dumps(process_batch(comments)))
+        return 0
+
+    entry, err = make_entry(
+        os.environ.get("COMMENT_BODY", ""),
+        os.environ.get("COMMENT_USER", ""),
+        os.environ.get("COMMENT_CREATED_AT", ""),
+    )
+    if err:
+        print(err, end="")
+        return 0  # workflow reacts with 👎 based on the output
+
+    # Exit 0 even on push-failure so the Record step succeeds and the React
+    # step still runs to post feedback (exit 1 would skip it, which is the
+    # silent-drop bug the retry loop fixes).
+    (result,) = record([entry])
+    print(result, end="")
     return 0
 
 if __name__ == "__main__":
-    sys.exit(main())
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,118 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "jsonschema",
+# ]
+# ///
+"""Tests for the synthetic dataset generator in tools/synthetic.py and the
+regression check in tools/bench.py. Needs jsonschema, so run it via uv:
+uv run --script .github/scripts/test_bench.py"""
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import bench  # noqa: E402
+import synthetic  # noqa: E402
+import validation  # noqa: E402
+
+with open(REPO_ROOT / "tools" / "schema.json") as f:
+    SCHEMA = json.load(f)
+
+
+class TestSynthetic(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def generate(self, name, **options):
+        path = self.dir / name
+        n_events = synthetic.generate(path, **options)
+        return n_events, {p.name: p.read_bytes() for p in sorted(path.iterdir())}
+
+    def test_deterministic(self):
+        self.assertEqual(self.generate("a", series=20), self.generate("b", series=20))
+        self.assertNotEqual(
+            self.generate("c", series=20)[1], self.generate("d", series=20, seed=1)[1]
+        )
+
+    def test_schema_valid_and_unique(self):
+        validator = validation.Validator(SCHEMA, self.dir / "cache")
+        for i, options in enumerate(
+            [
+                {},
+                {"zh_share": 1.0, "key_dates": 1.0},
+                {"latlng": 0.0, "events_per_series": 5},
+            ]
+        ):
+            with self.subTest(**options):
+                n_events, files = self.generate(str(i), series=30, **options)
+                event_ids = []
+                for fn, data in files.items():
+                    series = json.loads(data)
+                    self.assertEqual(list(validator.iter_errors(series)), [], fn)
+                    event_ids.extend(event["id"] for event in series["events"])
+                self.assertEqual(len(files), 30)
+                self.assertEqual(len(event_ids), n_events)
+                self.assertEqual(len(set(event_ids)), n_events)
+
+    def test_knobs(self):
+        _, files = self.generate("zh", series=10, zh_share=1.0, key_dates=1.0, latlng=0.0)
+        events = [event for data in files.values() for event in json.loads(data)["events"]]
+        self.assertTrue(all(event["locale"].startswith("zh-") for event in events))
+        self.assertTrue(all("keyDates" in event for event in events))
+        self.assertFalse(any("latLng" in event for event in events))
+
+
+class TestCompare(unittest.TestCase):
+    BASELINE = {"format": {"wall": 1.0, "peak_rss": 100}}
+
+    def test_within_tolerance(self):
+        results = {
+            "format": {"wall": 1.2, "peak_rss": 100},
+            "new tool": {"wall": 9, "peak_rss": 9},
+        }
+        self.assertEqual(bench.compare(results, self.BASELINE, 0.25), [])
+
+    def test_regression(self):
+        results = {"format": {"wall": 1.5, "peak_rss": 200}}
+        regressions = bench.compare(results, self.BASELINE, 0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertIn("wall", regressions[0])
+        self.assertIn("+50%", regressions[0])
+
+
+class TestExportTools(unittest.TestCase):
+    def test_export(self):
+        dest = pathlib.Path(tempfile.mkdtemp()) / "tools"
+        self.addCleanup(shutil.rmtree, dest.parent)
+        bench.export_tools("HEAD", dest)
+        committed = subprocess.run(
+            ["git", "show", "HEAD:tools/materialize.py"],
+            cwd=REPO_ROOT,
+            check=True,
+            capture_output=True,
+        ).stdout
+        self.assertEqual((dest / "materialize.py").read_bytes(), committed)
+        self.assertFalse((dest / ".cache").exists())
+
+
+class TestTakesJobs(unittest.TestCase):
+    def test_takes_jobs(self):
+        self.assertTrue(bench.takes_jobs(REPO_ROOT / "tools" / "materialize.py"))
+        with tempfile.NamedTemporaryFile("w", suffix=".py") as f:
+            # How materialize.py read its arguments before --jobs.
+            f.write("(_, output_dir) = sys.argv\n")
+            f.flush()
+            self.assertFalse(bench.takes_jobs(f.name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Tests for the incremental series catalog in tools/catalog.py. Run
+directly:
+python3 .github/scripts/test_catalog.py"""
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import catalog  # noqa: E402
+import layout  # noqa: E402
+
+TODAY = datetime.date(2025, 6, 1)
+
+
+def make_event(event_id, start, locale="en-US", guessed=False, venue="Example Hotel"):
+    event = {
+        "id": event_id,
+        "name": event_id,
+        "url": f"https://example.com/{event_id}",
+        "startDate": start,
+        "endDate": start,
+        "venue": venue,
+        "locale": locale,
+    }
+    if guessed:
+        event["sources"] = ["guessed"]
+    return event
+
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.root = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        self.path = self.root / ".cache" / "catalog.sqlite"
+        self.write("past", [make_event("past-2025", "2025-03-01")])
+        self.write("soon", [make_event("soon-2025", "2025-06-10", locale="de-DE")])
+        self.write(
+            "later",
+            [
+                make_event("later-2026", "2026-01-05", guessed=True),
+                make_event("later-2025", "2025-01-05"),
+            ],
+        )
+        self.write("empty", [])
+
+    def write(self, series_id, events, root=None):
+        path = pathlib.Path(layout.path_for(series_id, root or self.root))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"name": series_id, "events": events}))
+
+    def open(self, root=None):
+        series_catalog = catalog.Catalog(self.path, root or self.root)
+        self.addCleanup(series_catalog.close)
+        return series_catalog
+
+    def ids(self, rows, key="id"):
+        return [row[key] for row in rows]
+
+    def test_no_upcoming(self):
+        series_catalog = self.open()
+        self.assertEqual(series_catalog.refresh(), (4, 0))
+        self.assertEqual(self.ids(series_catalog.no_upcoming(TODAY)), ["empty", "past"])
+        self.assertEqual(
+            self.ids(series_catalog.no_upcoming(TODAY, horizon=30)), ["empty", "past", "soon"]
+        )
+        self.assertEqual(
+            self.ids(series_catalog.no_upcoming(TODAY, horizon=30, region="DE")), ["soon"]
+        )
+        self.assertEqual(
+            self.ids(series_catalog.no_upcoming(TODAY, horizon=30, locale="en-US")), ["past"]
+        )
+
+    def test_events(self):
+        series_catalog = self.open()
+        series_catalog.refresh()
+        self.assertEqual(
+            self.ids(series_catalog.events()),
+            ["later-2025", "past-2025", "soon-2025", "later-2026"],
+        )
+        self.assertEqual(
+            self.ids(series_catalog.events(TODAY, datetime.date(2025, 12, 31))), ["soon-2025"]
+        )
+        self.assertEqual(
+            self.ids(series_catalog.events(end=TODAY, region="US")), ["later-2025", "past-2025"]
+        )
+        self.assertEqual(self.ids(series_catalog.events(guessed=True)), ["later-2026"])
+        (row,) = series_catalog.events(guessed=True)
+        self.assertEqual(row["series_id"], "later")
+
+    def test_venues(self):
+        self.write(
+            "moved",
+            [
+                {
+                    **make_event("moved-2025", "2025-02-01", venue="New Hotel"),
+                    "address": "2 New St",
+                    "latLng": [1.5, 2.5],
+                    "translations": {"ja": {"venue": "新ホテル"}},
+                },
+                make_event("moved-2024", "2024-02-01", locale="en-CA"),
+            ],
+        )
+        series_catalog = self.open()
+        series_catalog.refresh()
+        venues = [dict(row) for row in series_catalog.venues()]
+        self.assertEqual(
+            [(venue["venue"], venue["start_date"], venue["locale"]) for venue in venues],
+            [("Example Hotel", "2026-01-05", "en-US"), ("New Hotel", "2025-02-01", "en-US")],
+        )
+        self.assertEqual((venues[1]["lat"], venues[1]["lng"]), (1.5, 2.5))
+        self.assertEqual(json.loads(venues[1]["translations"]), {"ja": {"venue": "新ホテル"}})
+        self.assertIsNone(venues[0]["address"])
+
+    def test_incremental(self):
+        series_catalog = self.open()
+        series_catalog.refresh()
+        self.assertEqual(series_catalog.refresh(), (0, 0))
+
+        # Touched but unchanged files are hashed, not reparsed.
+        os.utime(self.root / "past.json", ns=(0, 0))
+        with mock.patch.object(series_catalog, "index_series") as index_series:
+            self.assertEqual(series_catalog.refresh(), (0, 0))
+            index_series.assert_not_called()
+
+        self.write("past", [make_event("past-2026", "2026-03-01")])
+        (self.root / "empty.json").unlink()
+        self.assertEqual(series_catalog.refresh(), (1, 1))
+        self.assertEqual(self.ids(series_catalog.no_upcoming(TODAY)), [])
+        self.assertNotIn("past-2025", self.ids(series_catalog.events()))
+
+        # A reopened catalog picks up where it left off.
+        series_catalog.close()
+        self.assertEqual(self.open().refresh(), (0, 0))
+
+    def test_series_of_events(self):
+        series_catalog = self.open()
+        series_catalog.refresh()
+        self.write("copy", [make_event("past-2025", "2025-03-01")])
+        self.write("later", "not a series")
+        # Skipped series are neither parsed nor reindexed.
+        self.assertEqual(series_catalog.refresh(skip={"later"}), (1, 0))
+        self.assertEqual(
+            series_catalog.series_of_events(["past-2025", "later-2026", "gone-2025"]),
+            {"past-2025": ["copy", "past"], "later-2026": ["later"]},
+        )
+
+    def test_unindexable_files(self):
+        series_catalog = self.open()
+        series_catalog.refresh()
+        before = self.ids(series_catalog.events())
+
+        no_venue = make_event("later-2027", "2027-01-05")
+        del no_venue["venue"]
+        self.write("later", [no_venue])
+        # Fails once the old events have been deleted.
+        (self.root / "soon.json").write_text(json.dumps({"name": {}, "events": []}))
+        (self.root / "past.json").write_text("{")
+        self.write("new", [make_event("new-2025", "2025-07-01")])
+        with self.assertLogs(level="WARNING") as logs:
+            self.assertEqual(series_catalog.refresh(), (1, 0))
+        self.assertEqual(
+            sorted(line.split(":")[2] for line in logs.output),
+            ["later.json", "past.json", "soon.json"],
+        )
+        # What was last indexed from the broken files is kept.
+        self.assertCountEqual(self.ids(series_catalog.events()), [*before, "new-2025"])
+
+        # They are retried until they can be indexed.
+        self.write("past", [make_event("past-2025", "2025-03-02")])
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(series_catalog.refresh(), (1, 0))
+
+    def test_rebuilt(self):
+        self.open().refresh()
+        other = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, other)
+        self.write("other", [], root=other)
+        series_catalog = self.open(other)
+        self.assertEqual(series_catalog.refresh(), (1, 0))
+        self.assertEqual(self.ids(series_catalog.no_upcoming(TODAY)), ["other"])
+
+        with mock.patch.object(catalog, "VERSION", catalog.VERSION + 1):
+            self.assertEqual(self.open(other).refresh(), (1, 0))
+
+    def test_sharded(self):
+        series_catalog = self.open()
+        series_catalog.refresh()
+        layout.migrate("sharded", self.root)
+        # Moved files are rehashed, but their contents haven't changed.
+        self.assertEqual(series_catalog.refresh(), (0, 0))
+        self.write("new", [make_event("new-2024", "2024-01-01")])
+        self.assertEqual(series_catalog.refresh(), (1, 0))
+        self.assertEqual(self.ids(series_catalog.no_upcoming(TODAY)), ["empty", "new", "past"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "langconv",
+#   "regex",
+# ]
+# ///
+"""Tests for the cached zh conversion in tools/chinese.py. Needs langconv, so
+run it via uv:
+uv run --script .github/scripts/test_chinese.py"""
+import json
+import os
+import pathlib
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import chinese  # noqa: E402
+
+HANS = ("zh-Hant", "台北国际会议中心")
+HANT = ("zh-Hans", "台北國際會議中心")
+
+
+class TestChineseConverter(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = os.path.join(tmp.name, "cache", "zh.json")
+
+    def test_converts_both_ways(self):
+        converter = chinese.ChineseConverter()
+        self.assertEqual(
+            converter.convert_all([HANS, HANT]),
+            ["台北國際會議中心", "台北国际会议中心"],
+        )
+
+    def test_batch_converts_each_string_once(self):
+        converter = chinese.ChineseConverter()
+        converter.convert_all([HANS, HANS, HANT, HANS])
+        self.assertEqual((converter.hits, converter.misses), (2, 2))
+
+    def test_has_han(self):
+        self.assertTrue(chinese.has_han("Kemono 空间"))
+        self.assertFalse(chinese.has_han("Kemono Space ケモノ"))
+
+    def test_lru_is_bounded(self):
+        converter = chinese.ChineseConverter(maxsize=2)
+        converter.convert_all([("zh-Hant", "国"), ("zh-Hant", "会"), ("zh-Hant", "际")])
+        self.assertEqual(list(converter.conversions), [("zh-Hant", "会"), ("zh-Hant", "际")])
+
+    def test_persists_between_builds(self):
+        converter = chinese.ChineseConverter(self.cache_path)
+        converter.convert_all([HANS])
+        converter.save()
+
+        converter = chinese.ChineseConverter(self.cache_path)
+        self.assertEqual(converter.convert_all([HANS]), ["台北國際會議中心"])
+        self.assertEqual((converter.hits, converter.misses), (1, 0))
+        self.assertEqual(converter.converters, {})
+
+    def test_new_langconv_drops_entries(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, "w") as f:
+            json.dump({"version": "langconv/0", "conversions": [[*HANS, "bogus"]]}, f)
+        converter = chinese.ChineseConverter(self.cache_path)
+        self.assertEqual(converter.convert_all([HANS]), ["台北國際會議中心"])
+
+    def test_worker_conversions_merge_into_parent(self):
+        parent = chinese.ChineseConverter(self.cache_path)
+        worker = pickle.loads(pickle.dumps(parent))
+        worker.convert_all([HANS, HANS])
+        parent.merge(worker.drain())
+        self.assertEqual((parent.hits, parent.misses), (1, 1))
+        self.assertEqual(parent.convert_all([HANS]), ["台北國際會議中心"])
+        self.assertEqual(parent.misses, 1)
+
+    def test_latin_only_never_imports_langconv(self):
+        script = (
+            "import sys, chinese\n"
+            "c = chinese.ChineseConverter()\n"
+            "print(chinese.has_han('Anthrocon'), 'langconv' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=REPO_ROOT / "tools",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "False False")
+
+
+if __name__ == "__main__":
+    unittest.main()
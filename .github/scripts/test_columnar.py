@@ -0,0 +1,108 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "numpy",
+# ]
+# ///
+"""Tests for the columnar bundles in tools/columnar.py. Needs numpy, so run
+it via uv:
+uv run --script .github/scripts/test_columnar.py"""
+import json
+import pathlib
+import shutil
+import struct
+import sys
+import tempfile
+import unittest
+
+import numpy
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import columnar  # noqa: E402
+
+EVENTS = [
+    {
+        "id": "testcon-2099",
+        "name": "Testcon 2099",
+        "startDate": "2099-04-02",
+        "endDate": "2099-04-04",
+        "venue": "Test Hall",
+        "locale": "en-US",
+        "seriesId": "testcon",
+        "latLng": [40.4455472, -79.9962844],
+        "attendance": 100.0,
+        "sources": ["fancons.com"],
+    },
+    {
+        "id": "テストコン-2099",
+        "name": "テストコン 2099",
+        "startDate": "1969-12-31",
+        "endDate": "2099-04-04",
+        "venue": "Test Hall",
+        "locale": "ja-JP",
+        "seriesId": "testcon",
+        "canceled": True,
+        "translations": {"en-US": {"name": "Testcon"}},
+    },
+]
+
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = self.dir / "events.columns"
+
+    def test_round_trip(self):
+        columnar.write(EVENTS, self.path)
+        bundle = columnar.load(self.path)
+        self.assertEqual(len(bundle), 2)
+        self.assertEqual(list(bundle["id"]), ["testcon-2099", "テストコン-2099"])
+        self.assertEqual(
+            list(bundle["startDate"]),
+            [numpy.datetime64("2099-04-02"), numpy.datetime64("1969-12-31")],
+        )
+        self.assertEqual(bundle["attendance"].tolist(), [100, -1])
+        self.assertEqual(bundle["canceled"].tolist(), [False, True])
+        self.assertEqual(bundle["latLng"][0].tolist(), [40.4455472, -79.9962844])
+        self.assertTrue(numpy.isnan(bundle["latLng"][1]).all())
+        self.assertEqual(list(bundle["sources"]), [["fancons.com"], None])
+        self.assertEqual(list(bundle["translations"]), [None, {"en-US": {"name": "Testcon"}}])
+        self.assertNotIn("address", bundle)
+
+    def test_strings_are_interned(self):
+        columnar.write(EVENTS, self.path)
+        bundle = columnar.load(self.path)
+        self.assertEqual(list(bundle.strings).count("Test Hall"), 1)
+        self.assertEqual(len(set(bundle.columns["venue"])), 1)
+
+    def header(self):
+        data = self.path.read_bytes()
+        header_end = len(data) - 16
+        (header_length,) = struct.unpack_from("<Q", data, header_end)
+        return json.loads(data[header_end - header_length : header_end])
+
+    def test_arrays_are_aligned(self):
+        columnar.write(EVENTS, self.path)
+        header = self.header()
+        spans = [header["strings"]["offsets"], header["strings"]["data"]]
+        spans.extend(column["data"] for column in header["columns"].values())
+        for offset, _ in spans:
+            self.assertEqual(offset % 8, 0)
+
+    def test_empty(self):
+        columnar.write([], self.path)
+        bundle = columnar.load(self.path)
+        self.assertEqual((len(bundle), bundle.columns), (0, {}))
+
+    def test_not_a_bundle(self):
+        self.path.write_bytes(b"{}\n")
+        with self.assertRaises(ValueError):
+            columnar.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Tests for the events.pack writer and reader in tools/eventpack.py, and the
+pack materialize.py emits with it. Run directly:
+python3 .github/scripts/test_eventpack.py"""
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from test_materialize_incremental import FIXTURES, MATERIALIZE, REPO_ROOT
+
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import eventpack  # noqa: E402
+
+EVENTS = [
+    {"id": "testcon-2099", "name": "Testcon 2099"},
+    {"id": "テストコン-2099", "name": "テストコン 2099", "translations": {"en": {"name": "x"}}},
+    {"id": "othercon-2099", "name": "Othercon\n2099"},
+]
+
+
+class TestEventPack(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.pack_path = self.dir / "events.pack"
+        self.idx_path = self.dir / "events.idx"
+
+    def test_round_trip(self):
+        eventpack.write(EVENTS, self.pack_path, self.idx_path)
+        with eventpack.EventPack(self.pack_path, self.idx_path) as pack:
+            self.assertEqual(list(pack), [event["id"] for event in EVENTS])
+            self.assertEqual(len(pack), 3)
+            for event in EVENTS:
+                self.assertEqual(pack[event["id"]], event)
+            self.assertIn("testcon-2099", pack)
+            self.assertIsNone(pack.get("missing-2099"))
+            with self.assertRaises(KeyError):
+                pack["missing-2099"]
+
+    def test_offsets_are_bytes(self):
+        """A range request for an entry gets exactly that record."""
+        eventpack.write(EVENTS, self.pack_path, self.idx_path)
+        data = self.pack_path.read_bytes()
+        with open(self.idx_path) as f:
+            idx = json.load(f)
+        for event in EVENTS:
+            offset, length = idx[event["id"]]
+            self.assertEqual(json.loads(data[offset : offset + length]), event)
+
+    def test_pack_is_jsonl(self):
+        eventpack.write(EVENTS, self.pack_path, self.idx_path)
+        with open(self.pack_path) as f:
+            self.assertEqual([json.loads(line) for line in f], EVENTS)
+
+    def test_empty(self):
+        eventpack.write([], self.pack_path, self.idx_path)
+        with eventpack.EventPack(self.pack_path, self.idx_path) as pack:
+            self.assertEqual(len(pack), 0)
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
+)
+class TestMaterializedPack(unittest.TestCase):
+    def test_pack_matches_event_files(self):
+        data_dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, data_dir)
+        for series_id, series in FIXTURES.items():
+            with open(data_dir / f"{series_id}.json", "w") as f:
+                json.dump(series, f)
+        out_dir = data_dir / "out"
+        out_dir.mkdir()
+        result = subprocess.run(
+            ["uv", "run", "--script", str(MATERIALIZE), str(out_dir)],
+            cwd=data_dir,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+        with open(out_dir / "events.json") as f:
+            event_ids = json.load(f)
+        with eventpack.EventPack(out_dir / "events.pack", out_dir / "events.idx") as pack:
+            self.assertEqual(list(pack), event_ids)
+            for event_id in event_ids:
+                with open(out_dir / "events" / f"{event_id}.json") as f:
+                    self.assertEqual(pack[event_id], json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
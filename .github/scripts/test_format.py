@@ -0,0 +1,118 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "orjson",
+# ]
+# ///
+"""Tests for tools/format.py's compiled key ordering and its --check,
+skip-unchanged and --jobs modes. Needs orjson, so run it via uv:
+uv run --script .github/scripts/test_format.py"""
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import format  # noqa: E402
+import layout  # noqa: E402
+
+FORMAT = REPO_ROOT / "tools" / "format.py"
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "events": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "latLng": {
+                        "type": "array",
+                        "prefixItems": [{"type": "number"}, {"type": "number"}],
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+class TestReorder(unittest.TestCase):
+    def test_schema_order(self):
+        reorder = format.compile_reorder(SCHEMA)
+        obj = {
+            "extra": 1,
+            "events": [{"latLng": [1, 2, 3], "other": True, "id": "a"}, {"id": "b"}],
+            "name": "Testcon",
+        }
+        out = reorder(obj)
+        self.assertEqual(list(out), ["name", "events", "extra"])
+        self.assertEqual(list(out["events"][0]), ["id", "latLng", "other"])
+        # Without items, elements past prefixItems are dropped, as before.
+        self.assertEqual(out["events"][0]["latLng"], [1, 2])
+
+    def test_leaves_are_kept(self):
+        self.assertIsNone(format.compile_reorder({"type": "string"}))
+        self.assertIsNone(
+            format.compile_reorder({"type": "array", "items": {"type": "string"}})
+        )
+
+
+class TestCLI(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        anthrocon = layout.scan(REPO_ROOT)["anthrocon"]
+        shutil.copy(anthrocon, self.dir / "anthrocon.json")
+        with open(anthrocon) as f:
+            series = json.load(f)
+        # Keys out of schema order, and compact.
+        series = dict(reversed(series.items()))
+        with open(self.dir / "messy.json", "w") as f:
+            json.dump(series, f)
+
+    def format(self, *args):
+        return subprocess.run(
+            [sys.executable, str(FORMAT), *args],
+            cwd=self.dir,
+            capture_output=True,
+            text=True,
+        )
+
+    def test_check(self):
+        before = {p.name: p.read_bytes() for p in self.dir.iterdir()}
+        result = self.format("--check")
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("messy.json is not canonically formatted", result.stderr)
+        self.assertNotIn("anthrocon.json", result.stderr)
+        self.assertEqual({p.name: p.read_bytes() for p in self.dir.iterdir()}, before)
+
+    def test_skips_unchanged(self):
+        for jobs in ["1", "2"]:
+            with self.subTest(jobs=jobs):
+                os.utime(self.dir / "anthrocon.json", ns=(0, 0))
+                result = self.format("--jobs", jobs)
+                self.assertEqual(result.returncode, 0, result.stderr)
+                self.assertEqual(os.stat(self.dir / "anthrocon.json").st_mtime_ns, 0)
+                self.assertEqual(
+                    (self.dir / "messy.json").read_bytes(),
+                    (self.dir / "anthrocon.json").read_bytes(),
+                )
+                self.assertEqual(self.format("--check").returncode, 0)
+
+    def test_files(self):
+        result = self.format("--check", "anthrocon.json")
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
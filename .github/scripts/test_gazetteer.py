@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Tests for the venue gazetteer and Google Places cache in
+tools/gazetteer.py, against a stub gmaps client. Run directly:
+python3 .github/scripts/test_gazetteer.py"""
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import catalog  # noqa: E402
+import gazetteer  # noqa: E402
+
+HYATT = gazetteer.Venue(
+    "Hyatt Regency Orlando", "9801 International Dr, Orlando", (28.4, -81.4), "en-US"
+)
+HYATT_SEATTLE = gazetteer.Venue("Hyatt Regency Seattle", "808 Howell St, Seattle")
+KAIKAN = gazetteer.Venue(
+    "シティホールプラザアオーレ長岡",
+    "1-4-10 Ōtedōri, Nagaoka",
+    locale="ja-JP",
+    translations={"en": {"venue": "City Hall Plaza Aore Nagaoka"}},
+)
+RAMADA = gazetteer.Venue("Ramada Plaza Hotel & Suites")
+
+
+class StubGmaps:
+    def __init__(self):
+        self.calls = []
+
+    def places_autocomplete(self, input_text, session_token=None, language=None):
+        self.calls.append(("places_autocomplete", input_text))
+        return [{"place_id": f"id:{input_text}"}]
+
+    def place(self, place_id, session_token=None, fields=None, language=None):
+        self.calls.append(("place", place_id, language))
+        return {"result": {"name": place_id, "fields": fields}}
+
+
+class TestGazetteer(unittest.TestCase):
+    def setUp(self):
+        self.venues = gazetteer.Gazetteer([HYATT, HYATT_SEATTLE, KAIKAN, RAMADA])
+
+    def test_normalized(self):
+        self.assertEqual(self.venues.lookup("hyatt regency orlando")[0], HYATT)
+        self.assertEqual(self.venues.lookup("  HYATT  Regency, Orlando ")[0], HYATT)
+        self.assertEqual(self.venues.lookup("Ramada Plaza Hotel and Suites"), [RAMADA])
+        self.assertEqual(self.venues.lookup("ｒａｍａｄａ plaza hotel & suites"), [RAMADA])
+
+    def test_fuzzy(self):
+        self.assertEqual(self.venues.lookup("Hyatt Regency Orlndo")[0], HYATT)
+        self.assertCountEqual(self.venues.lookup("Hyatt Regency"), [HYATT, HYATT_SEATTLE])
+        self.assertEqual(len(self.venues.lookup("Hyatt Regency", limit=1)), 1)
+        self.assertEqual(self.venues.lookup("Marriott Downtown"), [])
+
+    def test_translations(self):
+        self.assertEqual(self.venues.lookup("City Hall Plaza Aore Nagaoka"), [KAIKAN])
+        self.assertEqual(self.venues.lookup("シティホールプラザアオーレ長岡"), [KAIKAN])
+
+    def test_from_event(self):
+        venue = gazetteer.Venue.from_event(
+            {
+                "name": "Testcon 2026",
+                "venue": "Example Hall",
+                "locale": "th-TH",
+                "latLng": [13.7, 100.5],
+                "translations": {
+                    "th": {"name": "เทสต์คอน 2026"},
+                    "en": {"venue": "Example Hall (EN)", "address": "1 Example Rd"},
+                },
+            }
+        )
+        self.assertEqual(venue.lat_lng, (13.7, 100.5))
+        self.assertIsNone(venue.address)
+        self.assertEqual(
+            venue.translations, {"en": {"venue": "Example Hall (EN)", "address": "1 Example Rd"}}
+        )
+
+    def test_repo_venues(self):
+        # Every venue in the repo resolves to itself first.
+        path = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, path)
+        with catalog.Catalog(path / "catalog.sqlite", REPO_ROOT) as series_catalog:
+            series_catalog.refresh()
+            rows = series_catalog.venues()
+            venues = gazetteer.Gazetteer.from_catalog(series_catalog)
+        self.assertGreater(len(rows), 100)
+        for row in rows:
+            with self.subTest(venue=row["venue"]):
+                found = venues.lookup(row["venue"])
+                self.assertIn(row["venue"], [venue.venue for venue in found])
+                self.assertEqual(
+                    gazetteer.normalize(found[0].venue), gazetteer.normalize(row["venue"])
+                )
+
+
+class TestCachedPlaces(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.stub = StubGmaps()
+
+    def open(self):
+        places = gazetteer.CachedPlaces(self.stub, self.dir / "places.sqlite")
+        self.addCleanup(places.close)
+        return places
+
+    def test_cached(self):
+        places = self.open()
+        predictions = places.places_autocomplete("Hyatt", session_token="a", language="en")
+        self.assertEqual(predictions, [{"place_id": "id:Hyatt"}])
+        # Another session asking the same is answered from the cache.
+        self.assertEqual(
+            places.places_autocomplete("Hyatt", session_token="b", language="en"), predictions
+        )
+        place = places.place("id:Hyatt", session_token="b", fields=["name"], language="en")
+        self.assertEqual(place, {"result": {"name": "id:Hyatt", "fields": ["name"]}})
+        places.place("id:Hyatt", session_token="c", fields=["name"], language="ja")
+        self.assertEqual(
+            self.stub.calls,
+            [
+                ("places_autocomplete", "Hyatt"),
+                ("place", "id:Hyatt", "en"),
+                ("place", "id:Hyatt", "ja"),
+            ],
+        )
+
+    def test_persisted(self):
+        with gazetteer.CachedPlaces(self.stub, self.dir / "places.sqlite") as places:
+            places.place("id:Hyatt", fields=["name"], language="en")
+        self.assertEqual(
+            self.open().place("id:Hyatt", fields=["name"], language="en"),
+            {"result": {"name": "id:Hyatt", "fields": ["name"]}},
+        )
+        self.assertEqual(len(self.stub.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
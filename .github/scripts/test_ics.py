@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Tests for the ICS writer in tools/ics.py and the calendars materialize.py
+emits with it. Run directly:
+python3 .github/scripts/test_ics.py"""
+import io
+import json
+import pathlib
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from test_materialize_incremental import MATERIALIZE, REPO_ROOT, make_series
+
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import ics  # noqa: E402
+
+
+def reference_foldline(line, limit=75):
+    """The original per-character implementation, which ics.foldline must
+    match exactly."""
+    buf = io.StringIO()
+    n = 0
+    for c in line:
+        m = len(c.encode("utf-8"))
+        if n + m > limit:
+            buf.write("\r\n ")
+            n = 1
+        buf.write(c)
+        n += m
+    return buf.getvalue()
+
+
+class TestFoldline(unittest.TestCase):
+    def test_matches_reference(self):
+        rng = random.Random(0)
+        alphabets = {
+            "ascii": "abc ,;\\",
+            "latin": "abcé",
+            "cjk": "a愛知県",
+            "emoji": "ab🦊é県",
+        }
+        for name, alphabet in alphabets.items():
+            for length in [*range(0, 160), 300, 1000]:
+                line = "".join(rng.choice(alphabet) for _ in range(length))
+                with self.subTest(name, length=length):
+                    self.assertEqual(ics.foldline(line), reference_foldline(line))
+
+    def test_physical_lines_fit_limit(self):
+        line = "LOCATION:" + "愛知県国際展示場 " * 20
+        folded = ics.foldline(line)
+        for physical in folded.split("\r\n"):
+            self.assertLessEqual(len(physical.encode("utf-8")), 75)
+        self.assertEqual(folded.replace("\r\n ", ""), line)
+
+    def test_render_calendar(self):
+        event = {
+            "id": "testcon-2099",
+            "name": "Testcon, 2099",
+            "url": "https://example.com",
+            "venue": "Test Hall",
+            "latLng": [40.4455472, -79.9962844],
+        }
+        calendar = ics.render_calendar(
+            "cons.fyi: Testcon; Pittsburgh",
+            [ics.render_event(event, "20990402", "20990405", "20990101T000000Z")],
+        )
+        self.assertEqual(
+            "".join(calendar),
+            "BEGIN:VCALENDAR\r\n"
+            "VERSION:2.0\r\n"
+            "PRODID:-//cons.fyi//EN\r\n"
+            "X-WR-CALNAME:cons.fyi: Testcon\\; Pittsburgh\r\n"
+            "BEGIN:VEVENT\r\n"
+            "UID:testcon-2099\r\n"
+            "SUMMARY:Testcon\\, 2099\r\n"
+            "DTSTART;VALUE=DATE:20990402\r\n"
+            "DTEND;VALUE=DATE:20990405\r\n"
+            "DTSTAMP:20990101T000000Z\r\n"
+            "URL:https://example.com\r\n"
+            "LOCATION:Test Hall\r\n"
+            "GEO:40.445547;-79.996284\r\n"
+            "END:VEVENT\r\n"
+            "END:VCALENDAR\r\n",
+        )
+
+
+def uids(path):
+    with open(path, newline="") as f:
+        return [line[4:].rstrip("\r\n") for line in f if line.startswith("UID:")]
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
+)
+class TestCalendars(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = pathlib.Path(tempfile.mkdtemp())
+        fixtures = {
+            "testcon": make_series(
+                "Testcon",
+                [
+                    ("testcon-2099", "2099-04-02", "2099-04-04"),
+                    ("testcon-2000", "2000-04-03", "2000-04-05"),
+                ],
+            ),
+            "othercon": make_series("Othercon", [("othercon-2099", "2099-05-01", "2099-05-03")]),
+            "pastcon": make_series("Pastcon", [("pastcon-2000", "2000-05-01", "2000-05-03")]),
+        }
+        fixtures["othercon"]["events"][0]["locale"] = "de-DE"
+        for series_id, series in fixtures.items():
+            with open(cls.data_dir / f"{series_id}.json", "w") as f:
+                json.dump(series, f)
+
+        cls.out_dir = cls.data_dir / "out"
+        cls.out_dir.mkdir()
+        cls.result = subprocess.run(
+            ["uv", "run", "--script", str(MATERIALIZE), str(cls.out_dir)],
+            cwd=cls.data_dir,
+            capture_output=True,
+            text=True,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.data_dir)
+
+    def test_global_calendar(self):
+        self.assertEqual(self.result.returncode, 0, self.result.stderr)
+        self.assertEqual(
+            uids(self.out_dir / "calendar.ics"), ["testcon-2099", "othercon-2099"]
+        )
+
+    def test_series_calendars(self):
+        series = self.out_dir / "series"
+        self.assertEqual(uids(series / "testcon.ics"), ["testcon-2099"])
+        self.assertEqual(uids(series / "othercon.ics"), ["othercon-2099"])
+        # Nothing current, but subscribers still get a valid calendar.
+        self.assertEqual(uids(series / "pastcon.ics"), [])
+        with open(series / "pastcon.ics") as f:
+            self.assertIn("X-WR-CALNAME:cons.fyi: Pastcon\n", f.read())
+
+    def test_region_calendars(self):
+        regions = self.out_dir / "regions"
+        self.assertEqual(sorted(p.name for p in regions.iterdir()), ["DE.ics", "US.ics"])
+        self.assertEqual(uids(regions / "US.ics"), ["testcon-2099"])
+        self.assertEqual(uids(regions / "DE.ics"), ["othercon-2099"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "playwright",
+# ]
+# ///
+"""Tests for tools/infer.py's page stripping and its cached, concurrent
+Inferrer, with a stub client and pages from a local HTTP server. Imports
+tools/prefetch.py, so run it via uv:
+uv run --script .github/scripts/test_infer.py"""
+import http.server
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+import urllib.request
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import infer  # noqa: E402
+
+PAGE = """<!doctype html>
+<html>
+<head>
+<title>Testcon</title>
+<meta name="description" content="The friendliest convention in Example City">
+<meta property="og:image" content="https://example.com/banner.png">
+<style>.nav { display: flex; }</style>
+<script>window.dataLayer = [];</script>
+<script type="application/ld+json">
+{"@type": "Event", "startDate": "2026-07-02", "location": "Example Hall"}
+</script>
+</head>
+<body>
+<nav class="nav"><a href="/">Home</a> <a href="/register">Register</a></nav>
+<h1>Testcon <span>2026</span></h1>
+<p>Join us <time datetime="2026-07-02">July 2</time> to 5 at the
+   Example Convention Center!</p>
+<p>Join us <time datetime="2026-07-02">July 2</time> to 5 at the
+   Example Convention Center!</p>
+<div><svg viewBox="0 0 10 10"><path d="M0 0L10 10"/></svg>Follow us</div>
+</body>
+</html>
+"""
+
+
+class TestStrip(unittest.TestCase):
+    def test_strip(self):
+        self.assertEqual(
+            infer.strip(PAGE),
+            "\n".join(
+                [
+                    "Testcon",
+                    "Home Register",
+                    "Testcon 2026",
+                    "Join us July 2 to 5 at the Example Convention Center!",
+                    "Follow us",
+                    "The friendliest convention in Example City",
+                    '{"@type": "Event", "startDate": "2026-07-02", "location": "Example Hall"}',
+                    "2026-07-02",
+                ]
+            ),
+        )
+
+    def test_long_pages_keep_dates(self):
+        filler = "".join(f"<p>Sponsor number {i} is wonderful</p>" for i in range(1000))
+        page = f"<h1>Testcon</h1>{filler}<p>When</p><p>August 14-16, 2026</p><p>Where</p>{filler}"
+        stripped = infer.strip(page, max_chars=2000)
+        self.assertEqual(stripped.split("\n"), ["When", "August 14-16, 2026", "Where"])
+
+    def test_dates(self):
+        for text in ["2026-07-02", "2.7.2026", "7/2/26", "Sept 4", "2026年7月", "7月2日"]:
+            with self.subTest(text=text):
+                self.assertTrue(infer.DATE.search(text))
+        for text in ["Marching band", "Room 1201", "version 2.0"]:
+            with self.subTest(text=text):
+                self.assertFalse(infer.DATE.search(text))
+
+
+class StubClient:
+    """Answers with the page's first line, after a delay, recording calls
+    and how many were in flight at once."""
+
+    def __init__(self, fail=()):
+        self.messages = self
+        self.prompts = []
+        self.fail = set(fail)
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def create(self, max_tokens, messages, model):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self.lock:
+            self.active -= 1
+            prompt = messages[0]["content"]
+            self.prompts.append(prompt)
+            page = prompt.partition("---\n")[2]
+            if page in self.fail:
+                self.fail.remove(page)
+                raise RuntimeError("overloaded")
+        return types.SimpleNamespace(content=[types.SimpleNamespace(text=page.split("\n")[0])])
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.server.pages[self.path].encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def fetch(url):
+    with urllib.request.urlopen(url) as f:
+        return f.read().decode()
+
+
+class TestInferrer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.pages = {f"/{i}": PAGE.replace("Testcon", f"Testcon {i}") for i in range(8)}
+        self.urls = [f"{self.base}/{i}" for i in range(8)]
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def inferrer(self, client, jobs=3):
+        cache = infer.InferCache(self.dir / "infer.sqlite")
+        self.addCleanup(cache.close)
+        inferrer = infer.Inferrer(client, fetch, cache, jobs=jobs)
+        self.addCleanup(inferrer.close)
+        return inferrer
+
+    def test_batch(self):
+        client = StubClient()
+        inferrer = self.inferrer(client)
+        inferrer.queue(self.urls)
+        inferrer.queue(self.urls)
+        self.assertEqual(
+            [inferrer.get(url) for url in self.urls], [f"Testcon {i}" for i in range(8)]
+        )
+        self.assertEqual(len(client.prompts), 8)
+        self.assertGreater(client.max_active, 1)
+        self.assertLessEqual(client.max_active, 3)
+        # Stripped pages are sent, not markup.
+        for prompt in client.prompts:
+            self.assertNotIn("<", prompt)
+            self.assertIn("Example Convention Center", prompt)
+            self.assertLess(len(prompt), len(PAGE))
+
+    def test_cached(self):
+        inferrer = self.inferrer(StubClient())
+        for url in self.urls:
+            inferrer.get(url)
+        # A restarted session is answered from the cache, until a page changes.
+        self.server.pages["/3"] = self.server.pages["/3"].replace("July 2", "July 9")
+        client = StubClient()
+        inferrer = self.inferrer(client)
+        self.assertEqual(inferrer.get(self.urls[0]), "Testcon 0")
+        self.assertEqual(inferrer.get(self.urls[3]), "Testcon 3")
+        self.assertEqual(len(client.prompts), 1)
+        self.assertIn("July 9", client.prompts[0])
+
+    def test_failure_is_retried(self):
+        client = StubClient(fail=[infer.strip(self.server.pages["/0"])])
+        inferrer = self.inferrer(client)
+        with self.assertRaisesRegex(RuntimeError, "overloaded"):
+            inferrer.get(self.urls[0])
+        self.assertEqual(inferrer.get(self.urls[0]), "Testcon 0")
+        self.assertEqual(len(client.prompts), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Unit tests for compacting per-rejection files into the rejections index.
+Run directly:
+python3 .github/scripts/test_keydates_compact.py"""
+import json
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+import keydates_compact
+import keydates_reject
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def rejection(event_id, date, category="hotel", kind="opens"):
+    return {"event_id": event_id, "category": category, "kind": kind, "date": date,
+            "reason": "r", "by": "sparkyfen", "at": "2026-07-27T00:00:00Z"}
+
+
+class TestCompact(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.dir = os.path.join(self.root, "rejections")
+        self.index = os.path.join(self.root, "rejections.json")
+        os.mkdir(self.dir)
+
+    def store(self, r):
+        path = keydates_reject.rejection_path(*(r[k] for k in keydates_reject.KEY))
+        with open(os.path.join(self.dir, os.path.basename(path)), "w") as f:
+            json.dump(r, f)
+
+    def compact(self):
+        return keydates_compact.compact(self.dir, self.index)
+
+    def test_sorted_index(self):
+        rs = [rejection("b-2026", "2026-01-01"), rejection("a-2026", "2026-03-01"),
+              rejection("a-2026", "2026-02-01"), rejection("a-2026", "2026-02-01", "dealers")]
+        for r in rs:
+            self.store(r)
+        self.assertEqual(self.compact(), (4, True))
+        with open(self.index) as f:
+            index = json.load(f)
+        self.assertEqual(
+            [(r["event_id"], r["category"], r["date"]) for r in index],
+            [("a-2026", "dealers", "2026-02-01"), ("a-2026", "hotel", "2026-02-01"),
+             ("a-2026", "hotel", "2026-03-01"), ("b-2026", "hotel", "2026-01-01")],
+        )
+
+    def test_idempotent(self):
+        self.store(rejection("a-2026", "2026-02-01"))
+        self.compact()
+        os.utime(self.index, ns=(0, 0))
+        self.assertEqual(self.compact(), (1, False))
+        self.assertEqual(os.stat(self.index).st_mtime_ns, 0)   # not rewritten
+        self.store(rejection("b-2026", "2026-02-01"))
+        self.assertEqual(self.compact(), (2, True))
+
+    def test_misnamed_file(self):
+        with open(os.path.join(self.dir, "0123456789abcdef.json"), "w") as f:
+            json.dump(rejection("a-2026", "2026-02-01"), f)
+        with self.assertRaisesRegex(ValueError, "belongs in"):
+            self.compact()
+
+    def test_no_rejections(self):
+        shutil.rmtree(self.dir)
+        self.assertEqual(self.compact(), (0, True))
+        with open(self.index) as f:
+            self.assertEqual(json.load(f), [])
+
+    def test_repo_index_is_compacted(self):
+        # Every rejection in the committed index has its own file.
+        stored = keydates_compact.read_rejections(REPO_ROOT / keydates_reject.REJECTIONS_DIR)
+        with open(REPO_ROOT / keydates_reject.REJECTIONS_INDEX) as f:
+            index = json.load(f)
+        self.assertEqual([r for r in index if r not in stored], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,9 @@ import contextlib
 import io
 import json
 import os
+import shutil
 import subprocess
+import sys
 import tempfile
 import types
 import unittest
@@ -62,22 +64,21 @@ class TestParse(unittest.TestCase):
 
 
 class FakeGit:
-    """Stands in for `subprocess.run(["git", ...])`. Models origin/main as an
-    in-memory list: `reset --hard origin/main` rewrites the working file to it
-    (optionally growing it first, to mimic another run landing between
-    attempts); a successful `push` promotes the working file to origin/main."""
-
-    def __init__(self, tmpfile, remote, push_rc, grow_on_reset=(), raise_first=None,
-                 corrupt=False):
-        self.tmpfile = tmpfile
-        self.remote = list(remote)
+    """Stands in for `subprocess.run(["git", ...])`. Models origin/main's
+    rejections directory as an in-memory {filename: contents}: `reset --hard
+    origin/main` rewrites the working directory to it (optionally growing it
+    first, to mimic another run landing between attempts); a successful
+    `push` promotes the working directory to origin/main."""
+
+    def __init__(self, tmpdir, remote, push_rc, grow_on_reset=(), raise_first=None):
+        self.tmpdir = tmpdir
+        self.remote = dict(remote)
         self.push_rc = list(push_rc)
         self.grow = list(grow_on_reset)
         self.reset_count = 0
         self.calls = []
         self.raise_first = raise_first   # subcommand to raise on, once
         self._raised = False
-        self.corrupt = corrupt           # reset writes invalid JSON (bad file on main)
 
     def __call__(self, argv, **kwargs):
         self.calls.append(argv)
@@ -89,105 +90,274 @@ class FakeGit:
         if sub == "reset":
             self.reset_count += 1
             if self.reset_count >= 2 and self.grow:   # a rival run landed
-                self.remote.append(self.grow.pop(0))
-            with open(self.tmpfile, "w") as f:
-                if self.corrupt:
-                    f.write("{ not valid json")
-                else:
-                    json.dump(self.remote, f)
+                self.remote.update([self.grow.pop(0)])
+            for name in os.listdir(self.tmpdir):
+                os.unlink(os.path.join(self.tmpdir, name))
+            for name, contents in self.remote.items():
+                with open(os.path.join(self.tmpdir, name), "w") as f:
+                    f.write(contents)
         elif sub == "push":
             rc = self.push_rc.pop(0) if self.push_rc else 0
             if rc == 0:
-                with open(self.tmpfile) as f:
-                    self.remote = json.load(f)   # our append is now on main
+                self.remote = self.files()   # our file is now on main
         return types.SimpleNamespace(returncode=rc)
 
+    def files(self):
+        files = {}
+        for name in os.listdir(self.tmpdir):
+            with open(os.path.join(self.tmpdir, name)) as f:
+                files[name] = f.read()
+        return files
+
     def subs(self):
         return [c[1] for c in self.calls if len(c) > 1]
 
 
+def stored(rejection):
+    """A rejection as (filename, contents), as keydates_reject.py stores it."""
+    path = keydates_reject.rejection_path(*(rejection[k] for k in keydates_reject.KEY))
+    return os.path.basename(path), json.dumps(rejection)
+
+
 class TestRecord(unittest.TestCase):
     ENV = {
         "COMMENT_BODY": "/reject anthrocon-2026 registration.closes 2026-06-26 — pre-reg deadline",
         "COMMENT_USER": "sparkyfen",
         "COMMENT_CREATED_AT": "2026-07-27T00:00:00Z",
     }
+    OURS = ("anthrocon-2026", "registration", "closes", "2026-06-26")
 
-    def _run(self, remote, push_rc, grow_on_reset=(), raise_first=None, corrupt=False):
-        fd, path = tempfile.mkstemp(suffix=".json")
-        os.close(fd)
-        with open(path, "w") as f:
-            json.dump(remote, f)
-        self.addCleanup(os.unlink, path)
-        fake = FakeGit(path, remote, push_rc, grow_on_reset, raise_first, corrupt)
+    def _run(self, remote, push_rc, grow_on_reset=(), raise_first=None, batch=None):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        fake = FakeGit(tmpdir, remote, push_rc, grow_on_reset, raise_first)
         out = io.StringIO()
-        with unittest.mock.patch.object(keydates_reject, "REJECTIONS_FILE", path), \
+        with unittest.mock.patch.object(keydates_reject, "REJECTIONS_DIR", tmpdir), \
              unittest.mock.patch.object(keydates_reject.subprocess, "run", fake), \
              unittest.mock.patch.object(keydates_reject.time, "sleep", lambda *_: None), \
              unittest.mock.patch.dict(os.environ, self.ENV, clear=True), \
+             unittest.mock.patch.object(sys, "stdin", io.StringIO(json.dumps(batch))), \
              contextlib.redirect_stdout(out):
-            rc = keydates_reject.main()
-        with open(path) as f:
+            rc = keydates_reject.main([] if batch is None else ["--batch"])
+        final = []
+        for contents in fake.remote.values():
             try:
-                final = json.load(f)       # None if the run left it corrupt
-            except json.JSONDecodeError:
-                final = None
+                final.append(json.loads(contents))
+            except json.JSONDecodeError:   # left out if a test planted it corrupt
+                pass
         return rc, out.getvalue(), final, fake
 
-    def test_happy_path_appends_and_pushes(self):
-        rc, sentinel, final, fake = self._run(remote=[], push_rc=[0])
+    def keys(self, final):
+        return [(r["event_id"], r["category"], r["kind"], r["date"]) for r in final]
+
+    def test_happy_path_adds_its_own_file_and_pushes(self):
+        rc, sentinel, final, fake = self._run(remote={}, push_rc=[0])
         self.assertEqual((rc, sentinel), (0, "ok"))
-        self.assertEqual([(r["event_id"], r["category"], r["kind"], r["date"]) for r in final],
-                         [("anthrocon-2026", "registration", "closes", "2026-06-26")])
+        self.assertEqual(self.keys(final), [self.OURS])
+        self.assertEqual(final[0]["reason"], "pre-reg deadline")
+        self.assertEqual(
+            list(fake.remote),
+            [os.path.basename(keydates_reject.rejection_path(*self.OURS))],
+        )
         self.assertIn("push", fake.subs())
 
     def test_push_race_recomputes_against_fresh_main(self):
         # first push loses the race; a rival reject ("other") landed meanwhile.
-        # The retry must re-read origin/main and re-append OURS on top of it —
+        # The retry must re-sync to origin/main and re-add OURS on top of it —
         # not clobber the rival, not duplicate ourselves.
         other = {"event_id": "x-2026", "category": "hotel", "kind": "opens",
                  "date": "2026-01-01", "reason": "r", "by": "u", "at": "t"}
         rc, sentinel, final, fake = self._run(
-            remote=[], push_rc=[1, 0], grow_on_reset=[other])
+            remote={}, push_rc=[1, 0], grow_on_reset=[stored(other)])
         self.assertEqual((rc, sentinel), (0, "ok"))
-        keys = [(r["event_id"], r["category"], r["kind"], r["date"]) for r in final]
+        keys = self.keys(final)
         self.assertIn(("x-2026", "hotel", "opens", "2026-01-01"), keys)          # rival preserved
-        self.assertEqual(keys.count(("anthrocon-2026", "registration", "closes", "2026-06-26")), 1)  # ours once
+        self.assertEqual(keys.count(self.OURS), 1)                                # ours once
         self.assertEqual(fake.subs().count("push"), 2)                            # retried
 
     def test_duplicate_after_resync_does_not_push(self):
         dup = {"event_id": "anthrocon-2026", "category": "registration", "kind": "closes",
                "date": "2026-06-26", "reason": "already", "by": "someone", "at": "earlier"}
-        rc, sentinel, final, fake = self._run(remote=[dup], push_rc=[0])
+        rc, sentinel, final, fake = self._run(remote=dict([stored(dup)]), push_rc=[0])
         self.assertEqual((rc, sentinel), (0, "duplicate"))
-        self.assertEqual(len(final), 1)                 # not re-appended
+        self.assertEqual(final, [dup])                  # not overwritten
         self.assertNotIn("push", fake.subs())           # nothing pushed
 
     def test_retry_exhaustion_emits_sentinel_and_exits_zero(self):
         # every push loses the race: still return the sentinel + exit 0 so the
         # React step runs and posts feedback (exit 1 would silently drop it).
-        rc, sentinel, final, fake = self._run(remote=[], push_rc=[1] * 25)
+        rc, sentinel, final, fake = self._run(remote={}, push_rc=[1] * 25)
         self.assertEqual((rc, sentinel), (0, "push-failure"))
         self.assertEqual(fake.subs().count("push"), 25)
 
-    def test_corrupt_rejections_file_fails_soft_not_silent(self):
-        # a corrupt keydates_rejections.json on main makes json.load raise every
-        # attempt; the loop must NOT crash silently — it emits push-failure and
-        # exits 0 so the React step still posts a 👎 (the whole point of the fix).
-        rc, sentinel, final, fake = self._run(remote=[], push_rc=[0], corrupt=True)
-        self.assertEqual((rc, sentinel), (0, "push-failure"))
-        self.assertNotIn("push", fake.subs())        # never got far enough to push
-        self.assertIsNone(final)                     # file stayed corrupt, never repaired
-        self.assertEqual(fake.subs().count("fetch"), 25)  # retried every attempt
+    def test_corrupt_rival_file_does_not_block(self):
+        # a corrupt rejection on main used to make every attempt fail to load
+        # the shared array; now each run only checks for its own file.
+        other = {"event_id": "x-2026", "category": "hotel", "kind": "opens", "date": "2026-01-01"}
+        name, _ = stored(other)
+        rc, sentinel, final, fake = self._run(remote={name: "{ not valid json"}, push_rc=[0])
+        self.assertEqual((rc, sentinel), (0, "ok"))
+        self.assertEqual(fake.remote[name], "{ not valid json")   # left alone
+        self.assertEqual(fake.subs().count("fetch"), 1)
+
+    def test_batch_push_race_retries_the_whole_batch(self):
+        other = {"event_id": "x-2026", "category": "hotel", "kind": "opens",
+                 "date": "2026-01-01", "reason": "r", "by": "u", "at": "t"}
+        batch = [
+            {"id": 1, "body": self.ENV["COMMENT_BODY"], "user": "sparkyfen"},
+            {"id": 2, "body": "/reject x-2026 hotel.opens 2026-01-01", "user": "sparkyfen"},
+            {"id": 3, "body": "/reject y-2026 hotel.opens 2026-01-01", "user": "sparkyfen"},
+        ]
+        rc, out, final, fake = self._run(
+            remote={}, push_rc=[1, 0], grow_on_reset=[stored(other)], batch=batch)
+        # The rival that landed in between turns ours into a duplicate.
+        self.assertEqual(json.loads(out), [{"id": 1, "result": "ok"},
+                                           {"id": 2, "result": "duplicate"},
+                                           {"id": 3, "result": "ok"}])
+        self.assertEqual(len(final), 3)
+        self.assertEqual(fake.subs().count("commit"), 2)   # one per attempt
+        self.assertEqual(fake.subs().count("push"), 2)
+
+    def test_batch_retry_exhaustion(self):
+        batch = [{"id": 1, "body": self.ENV["COMMENT_BODY"]}, {"id": 2, "body": "/reject x"}]
+        rc, out, final, fake = self._run(remote={}, push_rc=[1] * 25, batch=batch)
+        self.assertEqual((rc, json.loads(out)), (0, [{"id": 1, "result": "push-failure"},
+                                                     {"id": 2, "result": "parse-failure"}]))
 
     def test_transient_git_error_recovers_on_later_attempt(self):
         # the first `fetch` blows up with a CalledProcessError; the loop must
         # catch it, back off, and still record the reject on a later attempt.
         rc, sentinel, final, fake = self._run(
-            remote=[], push_rc=[0], raise_first="fetch")
+            remote={}, push_rc=[0], raise_first="fetch")
         self.assertEqual((rc, sentinel), (0, "ok"))
-        keys = [(r["event_id"], r["category"], r["kind"], r["date"]) for r in final]
-        self.assertIn(("anthrocon-2026", "registration", "closes", "2026-06-26"), keys)
+        self.assertIn(self.OURS, self.keys(final))
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keydates_reject.py")
+
+
+class TestBatch(unittest.TestCase):
+    """Runs --batch in a clone of a local bare repo standing in for origin."""
+
+    SEEDED = {"event_id": "megaplex-2026", "category": "dealers", "kind": "opens",
+              "date": "2026-04-05", "reason": "already", "by": "sparkyfen", "at": "t"}
+
+    def git(self, cwd, *args):
+        return subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=cwd, check=True, capture_output=True, text=True,
+        ).stdout
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.remote = os.path.join(self.root, "remote.git")
+        self.seed = os.path.join(self.root, "seed")
+        self.clone = os.path.join(self.root, "clone")
+        self.git(self.root, "init", "-q", "--bare", "-b", "main", self.remote)
+        self.git(self.root, "init", "-q", "-b", "main", self.seed)
+        self.add_rejection(self.SEEDED)
+        self.git(self.seed, "remote", "add", "origin", self.remote)
+        self.git(self.seed, "push", "-q", "origin", "main")
+        self.git(self.root, "clone", "-q", self.remote, self.clone)
+
+    def add_rejection(self, r):
+        """Commit a rejection in the seed checkout, as a rival run would."""
+        path = keydates_reject.rejection_path(*(r[k] for k in keydates_reject.KEY))
+        os.makedirs(os.path.join(self.seed, os.path.dirname(path)), exist_ok=True)
+        with open(os.path.join(self.seed, path), "w") as f:
+            json.dump(r, f)
+        self.git(self.seed, "add", path)
+        self.git(self.seed, "commit", "-q", "-m", "seed")
+
+    def commits(self):
+        return int(self.git(self.remote, "rev-list", "--count", "main"))
+
+    def stored(self):
+        names = self.git(self.remote, "ls-tree", "--name-only", "main",
+                         keydates_reject.REJECTIONS_DIR + "/").split()
+        return [json.loads(self.git(self.remote, "show", f"main:{name}")) for name in names]
+
+    def run_batch(self, comments, *args):
+        return subprocess.run(
+            [sys.executable, SCRIPT, "--batch", *args],
+            input=json.dumps(comments), cwd=self.clone, capture_output=True, text=True,
+        )
+
+    def test_one_commit_one_push(self):
+        comments = [
+            # As the GitHub API lists them.
+            {"id": 1, "body": "/reject anthrocon-2026 hotel.opens 2026-01-05 — too early",
+             "user": {"login": "sparkyfen"}, "created_at": "2026-07-27T00:00:00Z"},
+            {"id": 2, "body": "/reject anthrocon-2026 hotel.closes 2026-06-01",
+             "user": {"login": "tolfdog"}, "created_at": "2026-07-27T00:01:00Z"},
+            {"id": 3, "body": "/reject anthrocon-2026 hotel.opens 2026-01-05 — again",
+             "user": {"login": "tolfdog"}, "created_at": "2026-07-27T00:02:00Z"},
+            {"id": 4, "body": "/reject megaplex-2026 dealers.opens 2026-04-05",
+             "user": {"login": "tolfdog"}, "created_at": "2026-07-27T00:03:00Z"},
+            {"id": 5, "body": "/reject please", "user": {"login": "tolfdog"}},
+            {"id": 6, "body": "/reject anthrocon-2026 hotel.opens 2026-02-30",
+             "user": {"login": "tolfdog"}},
+        ]
+        before = self.commits()
+        result = self.run_batch(comments)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(
+            json.loads(result.stdout),
+            [{"id": 1, "result": "ok"}, {"id": 2, "result": "ok"},
+             {"id": 3, "result": "duplicate"}, {"id": 4, "result": "duplicate"},
+             {"id": 5, "result": "parse-failure"}, {"id": 6, "result": "invalid-date"}],
+        )
+        self.assertEqual(self.commits(), before + 1)
+        self.assertEqual(
+            self.git(self.remote, "log", "-1", "--format=%B", "main").strip(),
+            "Reject 2 key dates\n\n"
+            "anthrocon-2026 hotel.opens 2026-01-05\nanthrocon-2026 hotel.closes 2026-06-01",
+        )
+        stored = {(r["event_id"], r["kind"]): r for r in self.stored()}
+        self.assertEqual(set(stored), {("megaplex-2026", "opens"), ("anthrocon-2026", "opens"),
+                                       ("anthrocon-2026", "closes")})
+        self.assertEqual(stored["anthrocon-2026", "opens"]["by"], "sparkyfen")
+        self.assertEqual(stored["anthrocon-2026", "opens"]["reason"], "too early")
+
+    def test_dedups_against_fresh_main(self):
+        # A rival lands after our checkout; the batch re-syncs before deduping.
+        rival = {"event_id": "anthrocon-2026", "category": "hotel", "kind": "opens",
+                 "date": "2026-01-05", "reason": "r", "by": "tolfdog", "at": "t"}
+        self.add_rejection(rival)
+        self.git(self.seed, "push", "-q", "origin", "main")
+        before = self.commits()
+        result = self.run_batch([
+            {"id": 7, "body": "/reject anthrocon-2026 hotel.opens 2026-01-05", "user": "sparkyfen"},
+            {"id": 8, "body": "/reject anthrocon-2026 djs.opens 2026-03-01", "user": "sparkyfen"},
+        ])
+        self.assertEqual(json.loads(result.stdout),
+                         [{"id": 7, "result": "duplicate"}, {"id": 8, "result": "ok"}])
+        self.assertEqual(self.commits(), before + 1)
+        self.assertEqual(len(self.stored()), 3)
+
+    def test_nothing_new_makes_no_commit(self):
+        before = self.commits()
+        result = self.run_batch([
+            {"id": 9, "body": "/reject megaplex-2026 dealers.opens 2026-04-05", "user": "x"},
+            {"id": 10, "body": "not a reject", "user": "x"},
+        ])
+        self.assertEqual(json.loads(result.stdout),
+                         [{"id": 9, "result": "duplicate"}, {"id": 10, "result": "parse-failure"}])
+        self.assertEqual(self.commits(), before)
+
+    def test_from_file(self):
+        path = os.path.join(self.root, "comments.json")
+        with open(path, "w") as f:
+            json.dump([{"id": 11, "body": "/reject a-2026 panels.closes 2026-05-01"}], f)
+        result = self.run_batch([], path)
+        self.assertEqual(json.loads(result.stdout), [{"id": 11, "result": "ok"}])
+
+    def test_unreadable_batch(self):
+        result = self.run_batch({"body": "/reject a-2026 panels.closes 2026-05-01"})
+        self.assertEqual(result.returncode, 1)
+        self.assertEqual(result.stdout, "")
+        self.assertIn("expected a JSON list", result.stderr)
 
 
 if __name__ == "__main__":
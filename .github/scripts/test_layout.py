@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Tests for the flat and sharded series layouts in tools/layout.py. Run
+directly:
+python3 .github/scripts/test_layout.py"""
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import layout  # noqa: E402
+
+SERIES_IDS = ["anthrocon", "anthrocon-west", "biggest-little-fur-con", "2-fur-con"]
+# Ordered by filename, as sorted(os.listdir()) was: "-" sorts before ".".
+ORDER = ["2-fur-con", "anthrocon-west", "anthrocon", "biggest-little-fur-con"]
+
+
+class TestLayout(unittest.TestCase):
+    def setUp(self):
+        self.root = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        # Neither of these is a series file.
+        (self.root / "README.md").write_text("")
+        (self.root / "tools").mkdir()
+        (self.root / "tools" / "schema.json").write_text("{}")
+
+    def write(self, path, contents="{}"):
+        path = self.root / path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(contents)
+
+    def scan(self):
+        return layout.scan(self.root)
+
+    def contents(self):
+        return {
+            series_id: pathlib.Path(path).read_text() for series_id, path in self.scan().items()
+        }
+
+    def test_flat(self):
+        for series_id in SERIES_IDS:
+            self.write(f"{series_id}.json")
+        paths = self.scan()
+        self.assertEqual(list(paths), ORDER)
+        for series_id, path in paths.items():
+            self.assertEqual(path, os.path.join(self.root, f"{series_id}.json"))
+
+    def test_sharded_and_mixed(self):
+        self.write("series/a/anthrocon.json")
+        self.write("series/a/anthrocon-west.json")
+        self.write("series/2/2-fur-con.json")
+        self.write("biggest-little-fur-con.json")
+        paths = self.scan()
+        self.assertEqual(list(paths), ORDER)
+        self.assertEqual(
+            paths["anthrocon"], os.path.join(self.root, "series", "a", "anthrocon.json")
+        )
+
+    def test_in_both_layouts(self):
+        self.write("anthrocon.json")
+        self.write("series/a/anthrocon.json")
+        with self.assertRaisesRegex(ValueError, "anthrocon is in both"):
+            self.scan()
+
+    def test_migrate_round_trip(self):
+        for i, series_id in enumerate(SERIES_IDS):
+            self.write(f"{series_id}.json", str(i))
+        flat = self.contents()
+
+        moves = layout.migrate("sharded", self.root)
+        self.assertEqual(len(moves), len(SERIES_IDS))
+        self.assertTrue((self.root / "series" / "b" / "biggest-little-fur-con.json").exists())
+        self.assertEqual(list(self.root.glob("*.json")), [])
+        self.assertEqual(self.contents(), flat)
+        self.assertEqual(layout.migrate("sharded", self.root), [])
+
+        layout.migrate("flat", self.root)
+        self.assertFalse((self.root / "series").exists())
+        self.assertEqual(self.contents(), flat)
+
+    def test_path_for(self):
+        self.write("anthrocon.json")
+        anthrocon = os.path.join(self.root, "anthrocon.json")
+        self.assertEqual(layout.path_for("anthrocon", self.root), anthrocon)
+        self.assertEqual(
+            layout.path_for("newcon", self.root), os.path.join(self.root, "newcon.json")
+        )
+        # New series go in the sharded layout once there is one.
+        self.write("series/b/biggest-little-fur-con.json")
+        self.assertEqual(layout.path_for("anthrocon", self.root), anthrocon)
+        self.assertEqual(
+            layout.path_for("newcon", self.root),
+            os.path.join(self.root, "series", "n", "newcon.json"),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
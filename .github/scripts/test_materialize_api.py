@@ -0,0 +1,309 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "jsonschema",
+#   "tzfpy[tzdata]",
+#   "whenever",
+#   "langconv",
+#   "regex"
+# ]
+# ///
+"""Tests for materialize.py's in-process API, and that the CLI built on it
+writes the same files. Needs materialize.py's dependencies, so run it via uv:
+uv run --script .github/scripts/test_materialize_api.py"""
+import contextlib
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import layout  # noqa: E402
+import materialize  # noqa: E402
+import profiling  # noqa: E402
+import whenever  # noqa: E402
+from test_materialize_incremental import (  # noqa: E402
+    FIXTURES,
+    MATERIALIZE,
+    make_series,
+    read_output,
+)
+
+NOW = whenever.Instant.from_utc(2098, 1, 1)
+
+
+def setUpModule():
+    global CACHE_DIR
+    CACHE_DIR = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(CACHE_DIR)
+
+
+def new_materializer(el, **kwargs):
+    """A Materializer that keeps its caches in a temp dir, rather than in
+    tools/.cache, and only knows the rejections it is given."""
+    return materialize.Materializer(
+        el, **{"cache_dir": CACHE_DIR, "rejections": frozenset(), **kwargs}
+    )
+
+
+def materialize_all(sources, **kwargs):
+    """Materialize sources in-process, returning (errors, files)."""
+    el = materialize.ErrorRecorder()
+    materializer = new_materializer(el, **kwargs)
+    files = dict(materializer.series_outputs(sources))
+    if not el.errors:
+        files.update(materializer.global_outputs(now=NOW))
+    return el.errors, files
+
+
+class StageTracker(profiling.Profile):
+    """A Profile that records which stages are open."""
+
+    def __init__(self):
+        super().__init__(enabled=True)
+        self.open = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self.open.append(name)
+        try:
+            with super().stage(name):
+                yield
+        finally:
+            self.open.pop()
+
+
+class TestAPI(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_dir_and_dicts_agree(self):
+        data_dir = self.dir / "data"
+        data_dir.mkdir()
+        for series_id, series in FIXTURES.items():
+            with open(data_dir / f"{series_id}.json", "w") as f:
+                json.dump(series, f)
+        from_dicts = materialize_all(materialize.read_series_dicts(FIXTURES))
+        self.assertEqual(materialize_all(materialize.read_series_dir(data_dir)), from_dicts)
+        layout.migrate("sharded", data_dir)
+        self.assertEqual(materialize_all(materialize.read_series_dir(data_dir)), from_dicts)
+
+    def test_outputs(self):
+        errors, files = materialize_all(materialize.read_series_dicts(FIXTURES))
+        self.assertEqual(errors, [])
+        self.assertEqual(json.loads(files["series.json"]), ["othercon", "testcon"])
+        self.assertEqual(
+            json.loads(files["events.json"]), ["othercon-2099", "testcon-2099", "testcon-2098"]
+        )
+        event = json.loads(files["events/testcon-2099.json"])
+        self.assertEqual(event["seriesId"], "testcon")
+        self.assertEqual(event["timezone"], "America/New_York")
+        self.assertEqual(event["previousAttendance"], 100)
+        for path in ["calendar.ics", "series/testcon.ics", "regions/US.ics"]:
+            self.assertIn(path, files)
+        self.assertNotIn("changes.jsonl", files)
+
+    def test_now(self):
+        """Only events still current at now are listed as current."""
+        _, files = materialize_all(materialize.read_series_dicts(FIXTURES))
+        current = [json.loads(line)["id"] for line in files["current.jsonl"].splitlines()]
+        self.assertEqual(current, ["testcon-2098", "testcon-2099", "othercon-2099"])
+        last = [json.loads(line)["id"] for line in files["last.jsonl"].splitlines()]
+        self.assertEqual(last, ["testcon-2099", "othercon-2099"])
+
+    def test_changes(self):
+        el = materialize.ErrorRecorder()
+        materializer = new_materializer(el)
+        for _ in materializer.series_outputs(materialize.read_series_dicts(FIXTURES)):
+            pass
+        previous = {"events/gone.json": {"sha256": "0" * 64, "size": 1}}
+        files = dict(materializer.global_outputs(timestamp="then", previous=previous))
+        changes = [json.loads(line) for line in files["changes.jsonl"].splitlines()]
+        self.assertEqual(len(changes), 6)
+        self.assertIn(
+            {"timestamp": "then", "change": "removed", "type": "event", "id": "gone"}, changes
+        )
+
+    def test_errors(self):
+        series = {
+            **FIXTURES,
+            "dupecon": make_series("Dupecon", [("othercon-2099", "2099-05-01", "2099-05-03")]),
+            "badcon": {"name": "Badcon"},
+        }
+        errors, files = materialize_all(materialize.read_series_dicts(series))
+        self.assertEqual([id for id, _, _ in errors], ["badcon", "othercon/othercon-2099"])
+        self.assertNotIn("series/badcon.json", files)
+        self.assertIn("series/dupecon.json", files)
+
+    def test_stream(self):
+        """Streaming writes the same files, with the large ones in chunks."""
+        series = {
+            f"con{i:02}": make_series(
+                f"Con {i}", [(f"con{i:02}-2099", "2099-04-02", "2099-04-04")]
+            )
+            for i in range(12)
+        }
+        out_dirs = []
+        for stream, jobs in [(False, 1), (True, 3)]:
+            el = materialize.ErrorRecorder()
+            materializer = new_materializer(el, stream=stream, jobs=jobs)
+            out_dir = self.dir / f"stream-{stream}"
+            materialize.write_outputs(
+                out_dir, materializer.series_outputs(materialize.read_series_dicts(series))
+            )
+            chunked = set()
+            for path, contents in materializer.global_outputs(now=NOW):
+                if not isinstance(contents, bytes):
+                    chunked.add(path)
+                materialize.write_outputs(out_dir, [(path, contents)])
+            self.assertEqual(el.errors, [])
+            self.assertEqual("events.pack" in chunked, stream)
+            self.assertNotIn("series.json", chunked)
+            out_dirs.append(out_dir)
+
+        memory, stream = (
+            {p.relative_to(out_dir): p.read_bytes() for p in out_dir.rglob("*") if p.is_file()}
+            for out_dir in out_dirs
+        )
+        self.assertEqual(sorted(memory), sorted(stream))
+        for path in memory:
+            with self.subTest(path=str(path)):
+                self.assertEqual(memory[path], stream[path])
+
+    def test_rejections(self):
+        series = json.loads(json.dumps(FIXTURES))
+        key_dates = {
+            "registration": {"opens": {"date": "2099-01-01"}},
+            "hotel": {"opens": {"date": "2099-02-01"}, "closes": {"date": "2099-03-01"}},
+        }
+        series["testcon"]["events"][0]["keyDates"] = key_dates
+        series["othercon"]["events"][0]["keyDates"] = {"hotel": {"opens": {"date": "2099-02-01"}}}
+        rejections = {
+            ("testcon-2099", "registration", "opens", "2099-01-01"),
+            ("testcon-2099", "hotel", "closes", "2099-03-01"),
+            # Rejected for another date, so this one stays.
+            ("othercon-2099", "hotel", "opens", "2099-02-02"),
+        }
+        for jobs in [1, 2]:
+            with self.subTest(jobs=jobs):
+                el = materialize.ErrorRecorder()
+                materializer = new_materializer(el, jobs=jobs, rejections=rejections)
+                files = dict(materializer.series_outputs(materialize.read_series_dicts(series)))
+                self.assertEqual(el.errors, [])
+                event = json.loads(files["events/testcon-2099.json"])
+                self.assertEqual(event["keyDates"], {"hotel": {"opens": {"date": "2099-02-01"}}})
+                event = json.loads(files["events/othercon-2099.json"])
+                self.assertEqual(event["keyDates"], {"hotel": {"opens": {"date": "2099-02-01"}}})
+                self.assertEqual(
+                    materializer.suppressed,
+                    [
+                        ("testcon-2099", "registration", "opens", "2099-01-01"),
+                        ("testcon-2099", "hotel", "closes", "2099-03-01"),
+                    ],
+                )
+
+    def test_load_rejections(self):
+        def rejection(event_id, date):
+            return {"event_id": event_id, "category": "hotel", "kind": "opens", "date": date}
+
+        self.assertEqual(materialize.load_rejections(self.dir), frozenset())
+        (self.dir / ".github").mkdir()
+        with open(self.dir / materialize.REJECTIONS_INDEX, "w") as f:
+            json.dump([rejection("testcon-2099", "2099-02-01")], f)
+        self.assertEqual(
+            materialize.load_rejections(self.dir),
+            {("testcon-2099", "hotel", "opens", "2099-02-01")},
+        )
+        # The rejection files win over an index that hasn't caught up.
+        (self.dir / materialize.REJECTIONS_DIR).mkdir()
+        for name, event_id in [("a.json", "testcon-2099"), ("b.json", "othercon-2099")]:
+            with open(self.dir / materialize.REJECTIONS_DIR / name, "w") as f:
+                json.dump(rejection(event_id, "2099-03-01"), f)
+        self.assertEqual(
+            materialize.load_rejections(self.dir),
+            {
+                ("testcon-2099", "hotel", "opens", "2099-03-01"),
+                ("othercon-2099", "hotel", "opens", "2099-03-01"),
+            },
+        )
+
+    def test_stages_never_nest(self):
+        """No stage is open while the caller has an output, so the time it
+        takes to write one isn't counted in the stage that built it too."""
+        profile = StageTracker()
+        materializer = new_materializer(materialize.ErrorRecorder(), profile=profile)
+        for path, _ in materializer.series_outputs(materialize.read_series_dicts(FIXTURES)):
+            self.assertEqual(profile.open, [], path)
+        for path, _ in materializer.global_outputs(now=NOW, timestamp="then", previous={}):
+            self.assertEqual(profile.open, [], path)
+
+    def test_write_outputs(self):
+        materialize.write_outputs(
+            self.dir / "out", [("a.json", b"{}"), ("regions/US.ics", b"ics")]
+        )
+        self.assertEqual((self.dir / "out" / "regions" / "US.ics").read_bytes(), b"ics")
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "this test runs materialize.py via uv, which is not on PATH"
+)
+class TestCLI(unittest.TestCase):
+    def test_same_as_api(self):
+        """The CLI writes exactly what the API yields, besides the clock."""
+        with tempfile.TemporaryDirectory() as data_dir:
+            data_dir = pathlib.Path(data_dir)
+            for series_id, series in FIXTURES.items():
+                with open(data_dir / f"{series_id}.json", "w") as f:
+                    json.dump(series, f)
+            out_dir = data_dir / "out"
+            out_dir.mkdir()
+            # A copy of tools/, so the CLI's caches don't land in the real one.
+            tools_dir = pathlib.Path(CACHE_DIR) / "tools"
+            shutil.copytree(
+                MATERIALIZE.parent,
+                tools_dir,
+                ignore=shutil.ignore_patterns(".cache", "__pycache__", "data-importers"),
+            )
+            result = subprocess.run(
+                ["uv", "run", "--script", str(tools_dir / MATERIALIZE.name), str(out_dir)],
+                cwd=data_dir,
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(result.returncode, 0, result.stderr)
+
+            el = materialize.ErrorRecorder()
+            materializer = new_materializer(el)
+            api_dir = data_dir / "api"
+            materialize.write_outputs(
+                api_dir, materializer.series_outputs(materialize.read_series_dir(data_dir))
+            )
+            materialize.write_outputs(api_dir, materializer.global_outputs())
+
+            cli_files = {
+                p.relative_to(out_dir): read_output(p)
+                for p in out_dir.rglob("*")
+                if p.is_file() and p.name != "timestamp"
+            }
+            api_files = {
+                p.relative_to(api_dir): read_output(p) for p in api_dir.rglob("*") if p.is_file()
+            }
+            self.assertEqual(sorted(cli_files), sorted(api_files))
+            for path in cli_files:
+                with self.subTest(path=str(path)):
+                    self.assertEqual(cli_files[path], api_files[path])
+
+
+if __name__ == "__main__":
+    unittest.main()
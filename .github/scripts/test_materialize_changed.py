@@ -0,0 +1,161 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "jsonschema",
+#   "tzfpy[tzdata]",
+#   "whenever",
+#   "langconv",
+#   "regex"
+# ]
+# ///
+"""Tests for materialize.py's validate_changed, which validates only the
+series files it is given, and the --changed flag built on it. Needs
+materialize.py's dependencies, so run it via uv:
+uv run --script .github/scripts/test_materialize_changed.py"""
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent))
+
+import materialize  # noqa: E402
+from test_materialize_incremental import FIXTURES, MATERIALIZE, make_series  # noqa: E402
+
+
+def setUpModule():
+    global CACHE_DIR
+    CACHE_DIR = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(CACHE_DIR)
+
+
+class TestChanged(unittest.TestCase):
+    def setUp(self):
+        self.dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.data_dir = self.dir / "data"
+        self.data_dir.mkdir()
+        self.registry = self.dir / "catalog.sqlite"
+        for series_id, series in FIXTURES.items():
+            self.write_series(series_id, series)
+
+    def write_series(self, series_id, series):
+        with open(self.data_dir / f"{series_id}.json", "w") as f:
+            json.dump(series, f)
+
+    def validate(self, *series_ids):
+        """Validate the given series in-process, returning the errors."""
+        el = materialize.ErrorRecorder()
+        materialize.validate_changed(
+            [self.data_dir / f"{series_id}.json" for series_id in series_ids],
+            el,
+            registry_path=self.registry,
+            root=self.data_dir,
+            cache_dir=CACHE_DIR,
+        )
+        return el.errors
+
+    def test_valid(self):
+        self.assertEqual(self.validate("testcon"), [])
+        # Nothing is written beside the series.
+        self.assertEqual(
+            sorted(p.name for p in self.data_dir.iterdir()), ["othercon.json", "testcon.json"]
+        )
+
+    def test_only_listed_series_are_validated(self):
+        self.write_series(
+            "badcon", make_series("Badcon", [("badcon-2099", "2099-04-02", "2098-04-04")])
+        )
+        errors = self.validate("badcon")
+        self.assertEqual(len(errors), 1, errors)
+        self.assertIn("endDate 2098-04-04 is before startDate 2099-04-02", errors[0][2])
+        self.assertEqual(self.validate("testcon"), [])
+
+    def test_ids_are_unique_across_unlisted_series(self):
+        self.assertEqual(self.validate("testcon"), [])
+        self.write_series(
+            "dupecon", make_series("Dupecon", [("othercon-2099", "2099-05-01", "2099-05-03")])
+        )
+        self.assertEqual(
+            self.validate("dupecon"),
+            [
+                (
+                    "dupecon/othercon-2099",
+                    "$.id",
+                    "not unique across all series, also in othercon",
+                )
+            ],
+        )
+
+    def test_moved_event(self):
+        """Unlisted series are checked as they are now, and listed ones
+        against each other."""
+        self.write_series(
+            "othercon", make_series("Othercon", [("othercon-2100", "2100-05-01", "2100-05-03")])
+        )
+        self.write_series(
+            "newcon", make_series("Newcon", [("othercon-2099", "2099-05-01", "2099-05-03")])
+        )
+        self.assertEqual(self.validate("newcon"), [])
+        self.assertEqual(self.validate("newcon", "othercon"), [])
+
+        self.write_series(
+            "othercon", make_series("Othercon", [("othercon-2099", "2099-05-01", "2099-05-03")])
+        )
+        errors = self.validate("newcon", "othercon")
+        self.assertEqual(len(errors), 1, errors)
+        self.assertIn("not unique across all series, last seen in newcon", errors[0][2])
+
+
+class TestCLI(unittest.TestCase):
+    def test_changed(self):
+        """--changed validates just the listed files, and fails on errors."""
+        with tempfile.TemporaryDirectory() as data_dir:
+            data_dir = pathlib.Path(data_dir)
+            for series_id, series in FIXTURES.items():
+                with open(data_dir / f"{series_id}.json", "w") as f:
+                    json.dump(series, f)
+            with open(data_dir / "dupecon.json", "w") as f:
+                json.dump(
+                    make_series("Dupecon", [("othercon-2099", "2099-05-01", "2099-05-03")]), f
+                )
+            # A copy of tools/, so the CLI's caches don't land in the real one.
+            tools_dir = pathlib.Path(CACHE_DIR) / "tools"
+            shutil.copytree(
+                MATERIALIZE.parent,
+                tools_dir,
+                ignore=shutil.ignore_patterns(".cache", "__pycache__", "data-importers"),
+            )
+            result = subprocess.run(
+                [
+                    "uv",
+                    "run",
+                    "--script",
+                    str(tools_dir / MATERIALIZE.name),
+                    "--registry",
+                    str(pathlib.Path(CACHE_DIR) / "catalog.sqlite"),
+                    "--changed",
+                    "dupecon.json",
+                ],
+                cwd=data_dir,
+                capture_output=True,
+                text=True,
+            )
+            self.assertEqual(result.returncode, 1, result.stderr)
+            self.assertIn(
+                "dupecon/othercon-2099:$.id:not unique across all series, also in othercon",
+                result.stderr,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
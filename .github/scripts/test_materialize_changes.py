@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""Integration tests for materialize.py's changes.jsonl, the delta against a
+previous build's manifest.json. Runs the real script via uv. Run directly:
+python3 .github/scripts/test_materialize_changes.py"""
+import hashlib
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from test_materialize_incremental import FIXTURES, MATERIALIZE, make_series
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
+)
+class TestChanges(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        for series_id, series in FIXTURES.items():
+            self.write_series(series_id, series)
+
+    def write_series(self, series_id, series):
+        with open(self.data_dir / f"{series_id}.json", "w") as f:
+            json.dump(series, f)
+
+    def materialize(self, name, *args):
+        out_dir = self.data_dir / name
+        out_dir.mkdir()
+        result = subprocess.run(
+            ["uv", "run", "--script", str(MATERIALIZE), *args, str(out_dir)],
+            cwd=self.data_dir,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return out_dir
+
+    def write_manifest(self, out_dir):
+        """Write the manifest.json precompress.py would, for the JSON files."""
+        files = {}
+        for path in sorted(out_dir.rglob("*.json")):
+            data = path.read_bytes()
+            files[path.relative_to(out_dir).as_posix()] = {
+                "sha256": hashlib.sha256(data).hexdigest(),
+                "size": len(data),
+            }
+        # Not directly in data_dir, where it would be read as a series.
+        manifest = self.data_dir / "manifests" / f"{out_dir.name}.json"
+        manifest.parent.mkdir(exist_ok=True)
+        with open(manifest, "w") as f:
+            json.dump({"files": files}, f)
+        return manifest
+
+    def changes(self, out_dir):
+        with open(out_dir / "changes.jsonl") as f:
+            changes = [json.loads(line) for line in f]
+        with open(out_dir / "timestamp") as f:
+            timestamp = f.read()
+        for change in changes:
+            self.assertEqual(change.pop("timestamp"), timestamp)
+        return [
+            (change["change"], change["type"], change["id"], "sha256" in change)
+            for change in changes
+        ]
+
+    def test_no_changes(self):
+        manifest = self.write_manifest(self.materialize("before"))
+        after = self.materialize("after", "--previous-manifest", str(manifest))
+        self.assertEqual(self.changes(after), [])
+
+    def test_added_modified_removed(self):
+        manifest = self.write_manifest(self.materialize("before"))
+
+        series = json.loads(json.dumps(FIXTURES["testcon"]))
+        series["events"][0]["venue"] = "Other Hall"
+        self.write_series("testcon", series)
+        os.unlink(self.data_dir / "othercon.json")
+        self.write_series(
+            "newcon", make_series("Newcon", [("newcon-2099", "2099-06-01", "2099-06-02")])
+        )
+
+        after = self.materialize("after", "--previous-manifest", str(manifest))
+        self.assertEqual(
+            self.changes(after),
+            [
+                ("added", "series", "newcon", True),
+                ("removed", "series", "othercon", False),
+                ("modified", "series", "testcon", True),
+                ("added", "event", "newcon-2099", True),
+                ("removed", "event", "othercon-2099", False),
+                ("modified", "event", "testcon-2099", True),
+            ],
+        )
+
+        with open(after / "changes.jsonl") as f:
+            sha256 = json.loads(f.readline())["sha256"]
+        with open(after / "series" / "newcon.json", "rb") as f:
+            self.assertEqual(sha256, hashlib.sha256(f.read()).hexdigest())
+
+    def test_missing_manifest_adds_everything(self):
+        after = self.materialize(
+            "after", "--previous-manifest", str(self.data_dir / "missing.json")
+        )
+        self.assertEqual(
+            self.changes(after),
+            [
+                ("added", "series", "othercon", True),
+                ("added", "series", "testcon", True),
+                ("added", "event", "othercon-2099", True),
+                ("added", "event", "testcon-2098", True),
+                ("added", "event", "testcon-2099", True),
+            ],
+        )
+
+    def test_no_manifest_no_changes_file(self):
+        after = self.materialize("after")
+        self.assertFalse((after / "changes.jsonl").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
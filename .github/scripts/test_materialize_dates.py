@@ -1,18 +1,27 @@
-#!/usr/bin/env python3
-"""Integration tests for materialize.py's event date-order check. Runs the
-real script via uv in a temp directory, so it needs uv on PATH (present in CI
-via astral-sh/setup-uv). Run directly:
-python3 .github/scripts/test_materialize_dates.py"""
-import json
-import os
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "jsonschema",
+#   "tzfpy[tzdata]",
+#   "whenever",
+#   "langconv",
+#   "regex"
+# ]
+# ///
+"""Tests for materialize.py's event date-order check. Runs the materializer
+in-process, so it needs materialize.py's dependencies; run it via uv:
+uv run --script .github/scripts/test_materialize_dates.py"""
 import pathlib
 import shutil
-import subprocess
+import sys
 import tempfile
 import unittest
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
-MATERIALIZE = REPO_ROOT / "tools" / "materialize.py"
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import materialize  # noqa: E402
 
 
 def make_series_events(events):
@@ -42,40 +51,41 @@ def make_series(start_date, end_date):
     return make_series_events([("testcon-2027", start_date, end_date)])
 
 
+def setUpModule():
+    global CACHE_DIR
+    CACHE_DIR = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(CACHE_DIR)
+
+
 def run_materialize(series):
-    """Write ``series`` as a fixture and run materialize.py against it via uv.
-
-    Returns the CompletedProcess. materialize only globs *.json in its cwd, so
-    out/ can live alongside the fixture without being picked up as a series
-    file."""
-    with tempfile.TemporaryDirectory() as data_dir:
-        with open(os.path.join(data_dir, "testcon.json"), "w") as f:
-            json.dump(series, f)
-        out_dir = os.path.join(data_dir, "out")
-        os.mkdir(out_dir)
-        return subprocess.run(
-            ["uv", "run", "--script", str(MATERIALIZE), out_dir],
-            cwd=data_dir,
-            capture_output=True,
-            text=True,
-        )
+    """Materialize ``series`` in-process, returning the errors it logged as
+    (id, path, message) tuples. Caches go to a temp dir, not tools/.cache."""
+    el = materialize.ErrorRecorder()
+    materializer = materialize.Materializer(el, cache_dir=CACHE_DIR, rejections=frozenset())
+    for _ in materializer.series_outputs(materialize.read_series_dicts({"testcon": series})):
+        pass
+    return el.errors
+
+
+def messages(errors):
+    return "\n".join(f"{id}:{path}:{msg}" for id, path, msg in errors)
 
 
-@unittest.skipUnless(
-    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
-)
 class TestDateOrder(unittest.TestCase):
-    """End-to-end checks of the endDate >= startDate rule in materialize.py."""
+    """Checks of the endDate >= startDate rule in materialize.py."""
 
     def test_end_after_start_passes(self):
         """A multi-day event with endDate after startDate validates."""
-        result = run_materialize(make_series("2027-04-02", "2027-04-04"))
-        self.assertEqual(result.returncode, 0, result.stderr)
+        errors = run_materialize(make_series("2027-04-02", "2027-04-04"))
+        self.assertEqual(errors, [])
 
     def test_single_day_event_passes(self):
         """A single-day event (endDate == startDate) validates."""
-        result = run_materialize(make_series("2027-04-02", "2027-04-02"))
-        self.assertEqual(result.returncode, 0, result.stderr)
+        errors = run_materialize(make_series("2027-04-02", "2027-04-02"))
+        self.assertEqual(errors, [])
 
     def test_end_before_start_fails(self):
         """An event whose endDate precedes startDate fails with a clear message.
@@ -84,16 +94,17 @@ class TestDateOrder(unittest.TestCase):
         against startDate 2027-04-02 and passed validation, because the
         schema's formatMinimum/$data keyword is an ajv extension that
         python-jsonschema ignores."""
-        result = run_materialize(make_series("2027-04-02", "2026-04-04"))
-        self.assertEqual(result.returncode, 1, result.stderr)
-        self.assertIn("endDate 2026-04-04 is before startDate 2027-04-02", result.stderr)
+        errors = run_materialize(make_series("2027-04-02", "2026-04-04"))
+        self.assertIn(
+            "endDate 2026-04-04 is before startDate 2027-04-02", messages(errors)
+        )
 
     def test_later_event_in_series_fails(self):
         """The check runs for every event in a series, not just the first.
 
         Series files list events newest first, so an older event is the
         likely place for a bad date to hide."""
-        result = run_materialize(
+        errors = run_materialize(
             make_series_events(
                 [
                     ("testcon-2027", "2027-04-02", "2027-04-04"),
@@ -101,25 +112,37 @@ class TestDateOrder(unittest.TestCase):
                 ]
             )
         )
-        self.assertEqual(result.returncode, 1, result.stderr)
-        self.assertIn("testcon-2026", result.stderr)
-        self.assertIn(
-            "endDate 2026-04-01 is before startDate 2026-04-03", result.stderr
+        self.assertEqual(
+            errors,
+            [
+                (
+                    "testcon/testcon-2026",
+                    "$.endDate",
+                    "endDate 2026-04-01 is before startDate 2026-04-03",
+                )
+            ],
         )
 
+    def test_series_with_bad_dates_is_still_materialized(self):
+        """A date-order error is logged against the event, but unlike a
+        schema error it doesn't skip the series."""
+        el = materialize.ErrorRecorder()
+        materializer = materialize.Materializer(el, cache_dir=CACHE_DIR, rejections=frozenset())
+        series = make_series("2027-04-02", "2026-04-04")
+        sources = materialize.read_series_dicts({"testcon": series})
+        outputs = dict(materializer.series_outputs(sources))
+        self.assertEqual(len(el.errors), 1)
+        self.assertIn("events/testcon-2027.json", outputs)
+
     def test_schema_invalid_file_still_fails(self):
         """A schema-invalid file is reported and skipped, not crashed on.
 
         Regression for the has_errors fix: without it the file falls through
-        into the event loop and exits 1 via an uncaught KeyError, so the
-        traceback assertion is what discriminates."""
+        into the event loop and raises KeyError."""
         series = make_series("2027-04-02", "2027-04-04")
         del series["events"][0]["locale"]
-        result = run_materialize(series)
-        self.assertEqual(result.returncode, 1, result.stderr)
-        self.assertIn("required property", result.stderr)
-        self.assertIn("locale", result.stderr)
-        self.assertNotIn("Traceback", result.stderr)
+        errors = run_materialize(series)
+        self.assertEqual(errors, [("testcon", "$.events[0]", "'locale' is a required property")])
 
 
 if __name__ == "__main__":
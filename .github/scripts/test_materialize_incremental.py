@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Integration tests for materialize.py's --cache-dir incremental mode. Like
+test_materialize_dates.py, runs the real script via uv in a temp directory.
+Run directly:
+python3 .github/scripts/test_materialize_incremental.py"""
+import json
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+MATERIALIZE = REPO_ROOT / "tools" / "materialize.py"
+
+
+def make_series(name, events, **extra):
+    """Build a schema-valid series from (id, startDate, endDate) tuples."""
+    return {
+        "name": name,
+        **extra,
+        "events": [
+            {
+                "id": event_id,
+                "name": f"{name} ({event_id})",
+                "url": "https://example.com",
+                "startDate": start_date,
+                "endDate": end_date,
+                "venue": "Test Hall",
+                "address": "1 Test St, Pittsburgh, PA, USA",
+                "locale": "en-US",
+                "latLng": [40.4455472, -79.9962844],
+                "attendance": 100,
+            }
+            for event_id, start_date, end_date in events
+        ],
+    }
+
+
+FIXTURES = {
+    "testcon": make_series(
+        "Testcon",
+        [
+            ("testcon-2099", "2099-04-02", "2099-04-04"),
+            ("testcon-2098", "2098-04-03", "2098-04-05"),
+        ],
+        bluesky={"did": "did:plc:test"},
+    ),
+    "othercon": make_series("Othercon", [("othercon-2099", "2099-05-01", "2099-05-03")]),
+}
+
+
+def read_output(path):
+    """Read a materialized file, masking the parts that depend on the clock."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.name == "timestamp":
+        return b""
+    if path.suffix == ".ics":
+        data = b"".join(
+            line for line in data.splitlines(True) if not line.startswith(b"DTSTAMP:")
+        )
+    return data
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
+)
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        self.cache_dir = self.data_dir / "cache"
+        for series_id, series in FIXTURES.items():
+            self.write_series(series_id, series)
+
+    def write_series(self, series_id, series):
+        with open(self.data_dir / f"{series_id}.json", "w") as f:
+            json.dump(series, f)
+
+    def materialize(self, name, *args):
+        out_dir = self.data_dir / name
+        out_dir.mkdir()
+        result = subprocess.run(
+            ["uv", "run", "--script", str(MATERIALIZE), *args, str(out_dir)],
+            cwd=self.data_dir,
+            capture_output=True,
+            text=True,
+        )
+        return result, out_dir
+
+    def assertSameOutput(self, a, b):
+        """Every file under a and b is byte-identical, bar the clock."""
+        a_files = sorted(p.relative_to(a) for p in a.rglob("*") if p.is_file())
+        b_files = sorted(p.relative_to(b) for p in b.rglob("*") if p.is_file())
+        self.assertEqual(a_files, b_files)
+        for rel in a_files:
+            self.assertEqual(read_output(a / rel), read_output(b / rel), str(rel))
+
+    def manifest(self):
+        with open(self.cache_dir / "manifest.json") as f:
+            return json.load(f)
+
+    def test_cold_and_warm_builds_match_full_build(self):
+        full, full_dir = self.materialize("full")
+        self.assertEqual(full.returncode, 0, full.stderr)
+        cold, cold_dir = self.materialize("cold", "--cache-dir", str(self.cache_dir))
+        self.assertEqual(cold.returncode, 0, cold.stderr)
+        warm, warm_dir = self.materialize("warm", "--cache-dir", str(self.cache_dir))
+        self.assertEqual(warm.returncode, 0, warm.stderr)
+        self.assertSameOutput(full_dir, cold_dir)
+        self.assertSameOutput(full_dir, warm_dir)
+        self.assertEqual(sorted(self.manifest()["series"]), ["othercon", "testcon"])
+
+    def test_changed_series_is_rematerialized(self):
+        self.materialize("cold", "--cache-dir", str(self.cache_dir))
+        before = self.manifest()["series"]
+
+        series = json.loads(json.dumps(FIXTURES["testcon"]))
+        series["events"][0]["venue"] = "Other Hall"
+        self.write_series("testcon", series)
+
+        warm, warm_dir = self.materialize("warm", "--cache-dir", str(self.cache_dir))
+        self.assertEqual(warm.returncode, 0, warm.stderr)
+        full, full_dir = self.materialize("full")
+        self.assertSameOutput(full_dir, warm_dir)
+
+        after = self.manifest()["series"]
+        self.assertNotEqual(before["testcon"], after["testcon"])
+        self.assertEqual(before["othercon"], after["othercon"])
+        with open(warm_dir / "events" / "testcon-2099.json") as f:
+            self.assertEqual(json.load(f)["venue"], "Other Hall")
+
+    def test_removed_series_is_dropped(self):
+        self.materialize("cold", "--cache-dir", str(self.cache_dir))
+        os.unlink(self.data_dir / "othercon.json")
+        warm, warm_dir = self.materialize("warm", "--cache-dir", str(self.cache_dir))
+        self.assertEqual(warm.returncode, 0, warm.stderr)
+        self.assertFalse((warm_dir / "events" / "othercon-2099.json").exists())
+        self.assertEqual(list(self.manifest()["series"]), ["testcon"])
+        self.assertFalse((self.cache_dir / "series" / "othercon").exists())
+
+    def test_errors_are_reported_on_every_build(self):
+        """A series with a date-order error is never cached, so a warm build
+        can't quietly skip the check that failed the cold one."""
+        self.write_series(
+            "badcon", make_series("Badcon", [("badcon-2099", "2099-04-02", "2098-04-04")])
+        )
+        for name in ["cold", "warm"]:
+            result, _ = self.materialize(name, "--cache-dir", str(self.cache_dir))
+            self.assertEqual(result.returncode, 1, result.stderr)
+            self.assertIn("endDate 2098-04-04 is before startDate 2099-04-02", result.stderr)
+        self.assertNotIn("badcon", self.manifest()["series"])
+
+    def test_new_rejection_is_applied(self):
+        """Rejecting a key date invalidates the cache entry of just that
+        series, and a warm build still reports what the cold one left out."""
+        series = json.loads(json.dumps(FIXTURES["testcon"]))
+        series["events"][0]["keyDates"] = {"hotel": {"opens": {"date": "2099-02-01"}}}
+        self.write_series("testcon", series)
+        self.materialize("cold", "--cache-dir", str(self.cache_dir))
+        before = self.manifest()["series"]
+        othercon_entry = self.cache_dir / "series" / "othercon" / "series.json"
+        othercon_stored = os.stat(othercon_entry).st_mtime_ns
+
+        rejections_dir = self.data_dir / ".github" / "keydates_rejections"
+        rejections_dir.mkdir(parents=True)
+        with open(rejections_dir / "0123456789abcdef.json", "w") as f:
+            json.dump(
+                {
+                    "event_id": "testcon-2099",
+                    "category": "hotel",
+                    "kind": "opens",
+                    "date": "2099-02-01",
+                },
+                f,
+            )
+        for name in ["warm", "warmer"]:
+            result, out_dir = self.materialize(name, "--cache-dir", str(self.cache_dir))
+            self.assertEqual(result.returncode, 0, result.stderr)
+            self.assertIn("1 rejected key dates left out", result.stderr)
+            with open(out_dir / "events" / "testcon-2099.json") as f:
+                self.assertNotIn("keyDates", json.load(f))
+        full, full_dir = self.materialize("full")
+        self.assertSameOutput(full_dir, out_dir)
+
+        after = self.manifest()["series"]
+        self.assertNotEqual(before["testcon"], after["testcon"])
+        self.assertEqual(before["othercon"], after["othercon"])
+        self.assertEqual(os.stat(othercon_entry).st_mtime_ns, othercon_stored)
+
+    def test_corrupt_manifest_falls_back_to_full_build(self):
+        self.cache_dir.mkdir()
+        with open(self.cache_dir / "manifest.json", "w") as f:
+            f.write("{ not valid json")
+        full, full_dir = self.materialize("full")
+        cold, cold_dir = self.materialize("cold", "--cache-dir", str(self.cache_dir))
+        self.assertEqual(cold.returncode, 0, cold.stderr)
+        self.assertSameOutput(full_dir, cold_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
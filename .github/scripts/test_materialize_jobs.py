@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Integration tests for materialize.py's --jobs mode: output and error
+messages must not depend on how many workers ran. Runs the real script via
+uv. Run directly:
+python3 .github/scripts/test_materialize_jobs.py"""
+import json
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from test_materialize_incremental import MATERIALIZE, make_series, read_output
+
+
+def error_lines(stderr):
+    return [line for line in stderr.splitlines() if line.startswith("ERROR:")]
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
+)
+class TestJobs(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+
+    def write_series(self, series_id, series):
+        with open(self.data_dir / f"{series_id}.json", "w") as f:
+            json.dump(series, f)
+
+    def materialize(self, jobs, *args):
+        out_dir = self.data_dir / f"out-{jobs}"
+        out_dir.mkdir()
+        result = subprocess.run(
+            ["uv", "run", "--script", str(MATERIALIZE), "--jobs", str(jobs), *args, str(out_dir)],
+            cwd=self.data_dir,
+            capture_output=True,
+            text=True,
+        )
+        return result, out_dir
+
+    def test_output_matches_sequential(self):
+        for i in range(12):
+            self.write_series(
+                f"con{i:02}",
+                make_series(
+                    f"Con {i}",
+                    [
+                        (f"con{i:02}-2099", "2099-04-02", "2099-04-04"),
+                        (f"con{i:02}-2098", "2098-04-03", "2098-04-05"),
+                    ],
+                ),
+            )
+
+        sequential, sequential_dir = self.materialize(1)
+        self.assertEqual(sequential.returncode, 0, sequential.stderr)
+        parallel, parallel_dir = self.materialize(3)
+        self.assertEqual(parallel.returncode, 0, parallel.stderr)
+
+        files = sorted(p.relative_to(sequential_dir) for p in sequential_dir.rglob("*"))
+        self.assertEqual(files, sorted(p.relative_to(parallel_dir) for p in parallel_dir.rglob("*")))
+        for rel in files:
+            if (sequential_dir / rel).is_file():
+                self.assertEqual(
+                    read_output(sequential_dir / rel), read_output(parallel_dir / rel), str(rel)
+                )
+
+    def test_errors_match_sequential(self):
+        """Schema, date-order and duplicate-ID errors from different series are
+        logged in the same order whichever worker found them."""
+        for i in range(6):
+            self.write_series(
+                f"con{i:02}",
+                make_series(f"Con {i}", [(f"con{i:02}-2099", "2099-04-02", "2098-04-04")]),
+            )
+        self.write_series("dupcon", make_series("Dupcon", [("con00-2099", "2099-04-02", "2099-04-04")]))
+        invalid = make_series("Invalidcon", [("invalidcon-2099", "2099-04-02", "2099-04-04")])
+        del invalid["events"][0]["locale"]
+        self.write_series("invalidcon", invalid)
+
+        sequential, _ = self.materialize(1)
+        self.assertEqual(sequential.returncode, 1, sequential.stderr)
+        parallel, _ = self.materialize(4)
+        self.assertEqual(parallel.returncode, 1, parallel.stderr)
+        # Only errors need to match: the INFO stats depend on what each
+        # worker happened to have cached.
+        self.assertEqual(error_lines(sequential.stderr), error_lines(parallel.stderr))
+        self.assertIn("not unique across all series, last seen in con00", parallel.stderr)
+        self.assertIn("'locale' is a required property", parallel.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Integration tests for materialize.py --profile and build-stats.json. Runs
+the real script via uv. Run directly:
+python3 .github/scripts/test_materialize_profile.py"""
+import json
+import pathlib
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from test_materialize_incremental import FIXTURES, MATERIALIZE
+
+STAGES = {
+    "schema",
+    "load",
+    "parse",
+    "validate",
+    "tz lookup",
+    "render",
+    "write",
+    "index",
+    "sort",
+    "ics",
+    "jsonl",
+}
+
+
+@unittest.skipUnless(
+    shutil.which("uv"), "these tests run materialize.py via uv, which is not on PATH"
+)
+class TestProfile(unittest.TestCase):
+    def setUp(self):
+        self.data_dir = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        for series_id, series in FIXTURES.items():
+            with open(self.data_dir / f"{series_id}.json", "w") as f:
+                json.dump(series, f)
+
+    def materialize(self, name, *args):
+        out_dir = self.data_dir / name
+        out_dir.mkdir()
+        result = subprocess.run(
+            ["uv", "run", "--script", str(MATERIALIZE), *args, str(out_dir)],
+            cwd=self.data_dir,
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return out_dir
+
+    def build_stats(self, out_dir):
+        with open(out_dir / "build-stats.json") as f:
+            return json.load(f)
+
+    def test_stages_and_slowest_series(self):
+        for jobs in ["1", "2"]:
+            with self.subTest(jobs=jobs):
+                out_dir = self.materialize(
+                    f"jobs{jobs}", "--profile", "--profile-top", "1", "--jobs", jobs
+                )
+                stats = self.build_stats(out_dir)
+                self.assertEqual((stats["series"], stats["events"]), (2, 3))
+                self.assertLessEqual(STAGES, set(stats["stages"]))
+                self.assertEqual(stats["stages"]["parse"]["calls"], 2)
+                self.assertEqual(stats["stages"]["tz lookup"]["calls"], 3)
+                self.assertIsNone(stats["stages"]["parse"]["peak_memory"])
+                self.assertGreater(stats["total"]["peak_rss"], 0)
+                self.assertEqual(len(stats["slowest_series"]), 1)
+                self.assertIn(stats["slowest_series"][0]["id"], FIXTURES)
+
+    def test_memory(self):
+        stats = self.build_stats(self.materialize("out", "--profile", "--profile-memory"))
+        for name, stage in stats["stages"].items():
+            with self.subTest(name):
+                self.assertGreater(stage["peak_memory"], 0)
+
+    def test_cached_series(self):
+        cache_dir = str(self.data_dir / "cache")
+        self.materialize("cold", "--cache-dir", cache_dir)
+        stats = self.build_stats(self.materialize("warm", "--profile", "--cache-dir", cache_dir))
+        self.assertNotIn("parse", stats["stages"])
+        self.assertTrue(all(series["cached"] for series in stats["slowest_series"]))
+
+    def test_off_by_default(self):
+        self.assertFalse((self.materialize("out") / "build-stats.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
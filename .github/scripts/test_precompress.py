@@ -0,0 +1,82 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "brotli",
+# ]
+# ///
+"""Tests for tools/precompress.py. Needs brotli, so run it via uv:
+uv run --script .github/scripts/test_precompress.py"""
+import gzip
+import hashlib
+import json
+import pathlib
+import shutil
+import sys
+import tempfile
+import unittest
+
+import brotli
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import precompress  # noqa: E402
+
+SITE = {
+    "timestamp": b"2099-01-01T00:00:00.000000Z",
+    "calendar.ics": b"BEGIN:VCALENDAR\r\n" * 100,
+    "events/testcon-2099.json": json.dumps({"id": "testcon-2099", "name": "テストコン"}).encode(),
+    "series/testcon.json": b"{}",
+}
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.root = pathlib.Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        for path, data in SITE.items():
+            (self.root / path).parent.mkdir(parents=True, exist_ok=True)
+            (self.root / path).write_bytes(data)
+
+    def manifest(self):
+        with open(self.root / "manifest.json") as f:
+            return json.load(f)
+
+    def test_sidecars_round_trip(self):
+        precompress.precompress(self.root, jobs=2)
+        for path, data in SITE.items():
+            with self.subTest(path):
+                self.assertEqual(gzip.decompress((self.root / f"{path}.gz").read_bytes()), data)
+                self.assertEqual(brotli.decompress((self.root / f"{path}.br").read_bytes()), data)
+
+    def test_manifest(self):
+        precompress.precompress(self.root)
+        self.assertEqual(
+            self.manifest(),
+            {
+                "files": {
+                    path: {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+                    for path, data in sorted(SITE.items())
+                }
+            },
+        )
+        manifest = (self.root / "manifest.json").read_bytes()
+        self.assertEqual(gzip.decompress((self.root / "manifest.json.gz").read_bytes()), manifest)
+
+    def test_rerun_is_reproducible(self):
+        precompress.precompress(self.root)
+        first = {
+            p.relative_to(self.root): p.read_bytes() for p in self.root.rglob("*") if p.is_file()
+        }
+        precompress.precompress(self.root, jobs=4)
+        second = {
+            p.relative_to(self.root): p.read_bytes() for p in self.root.rglob("*") if p.is_file()
+        }
+        # No sidecars of sidecars, and byte-identical output.
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 3 * (len(SITE) + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "playwright",
+# ]
+# ///
+"""Tests for tools/prefetch.py's page cleaning, page cache and background
+prefetcher, which renders pages from a local HTTP server. Needs Playwright
+and its Chromium (`playwright install chromium`), so run it via uv:
+uv run --script .github/scripts/test_prefetch.py"""
+import datetime
+import http.server
+import os
+import pathlib
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import prefetch  # noqa: E402
+
+PAGE = """<!doctype html>
+<html>
+<head><title>Testcon</title><style>p { color: red; }</style>
+<script type="application/ld+json">{"@type": "Event", "startDate": "2026-07-02"}</script></head>
+<body>
+<!-- nothing to see here -->
+<script>document.write("<p>rendered &amp; scripted</p>");</script>
+<p>Testcon 2026: July 2&ndash;5, Example Convention Center</p>
+<noscript>Enable JavaScript</noscript>
+</body>
+</html>
+"""
+
+
+class TestClean(unittest.TestCase):
+    def test_clean(self):
+        cleaned = prefetch.clean(PAGE)
+        self.assertIn("<p>Testcon 2026: July 2&ndash;5, Example Convention Center</p>", cleaned)
+        self.assertIn("<title>Testcon</title>", cleaned)
+        self.assertIn('"startDate": "2026-07-02"}</script>', cleaned)
+        for dropped in ["color: red", "nothing to see", "document.write", "Enable JavaScript"]:
+            self.assertNotIn(dropped, cleaned)
+        self.assertNotIn("\n\n", cleaned)
+
+    def test_nested_and_void(self):
+        self.assertEqual(
+            prefetch.clean('<div><svg><g><path d="M0"/></g></svg><br><img src="a">x</div>'),
+            '<div><br><img src="a">x</div>',
+        )
+
+
+class TestPageCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def test_round_trip(self):
+        cache = prefetch.PageCache(self.dir)
+        self.assertIsNone(cache.get("https://example.com/"))
+        cache.put("https://example.com/", "<p>hi</p>")
+        self.assertEqual(cache.get("https://example.com/"), "<p>hi</p>")
+        self.assertIsNone(cache.get("https://example.com/other"))
+        # Persisted across instances, without stray temporary files.
+        self.assertEqual(prefetch.PageCache(self.dir).get("https://example.com/"), "<p>hi</p>")
+        self.assertEqual([p for p in os.listdir(self.dir) if p.endswith(".tmp")], [])
+
+    def test_ttl(self):
+        cache = prefetch.PageCache(self.dir, ttl=datetime.timedelta(hours=1))
+        cache.put("https://example.com/", "<p>hi</p>")
+        later = time.time() + 2 * 60 * 60
+        with mock.patch.object(prefetch.time, "time", return_value=later):
+            self.assertIsNone(cache.get("https://example.com/"))
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        time.sleep(0.2)
+        with server.lock:
+            server.active -= 1
+        if self.path == "/favicon.ico":
+            self.send_error(404)
+            return
+        body = PAGE.replace("Testcon", f"Testcon{self.path}").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPrefetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.server.lock = threading.Lock()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.hits = {}
+        self.server.active = 0
+        self.server.max_active = 0
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.cache = prefetch.PageCache(self.dir)
+        try:
+            self.prefetcher = prefetch.Prefetcher(self.cache, pages=2)
+        except Exception as e:
+            self.skipTest(f"can't launch Chromium: {e}")
+        self.addCleanup(self.prefetcher.close)
+
+    def urls(self, n):
+        return [f"{self.base}/{i}" for i in range(n)]
+
+    def page_hits(self):
+        return {path: n for path, n in self.server.hits.items() if path != "/favicon.ico"}
+
+    def test_prefetch(self):
+        urls = self.urls(6)
+        self.prefetcher.queue(urls)
+        contents = [self.prefetcher.get(url) for url in urls]
+        self.assertIn("Testcon/5 2026", contents[5])
+        self.assertIn("rendered &amp; scripted", contents[5])
+        self.assertNotIn("document.write", contents[5])
+        for url, content in zip(urls, contents):
+            self.assertEqual(self.cache.get(url), content)
+        # Each page was rendered once, through at most two pages at a time.
+        self.assertEqual(self.page_hits(), {f"/{i}": 1 for i in range(6)})
+        self.assertLessEqual(self.server.max_active, 2)
+
+    def test_cached(self):
+        url = self.urls(1)[0]
+        content = self.prefetcher.get(url)
+        self.prefetcher.queue([url, url])
+        self.assertEqual(self.prefetcher.get(url), content)
+        # Another session reads it from the cache on disk.
+        with prefetch.Prefetcher(prefetch.PageCache(self.dir), pages=1) as prefetcher:
+            self.assertEqual(prefetcher.get(url), content)
+        self.assertEqual(self.page_hits(), {"/0": 1})
+
+    def test_failure_is_retried(self):
+        url = "http://127.0.0.1:1/"
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.prefetcher.get(url)
+        self.assertIsNone(self.cache.get(url))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "tzfpy[tzdata]",
+# ]
+# ///
+"""Tests for the memoized timezone resolver in tools/timezones.py. Needs
+tzfpy, so run it via uv:
+uv run --script .github/scripts/test_timezones.py"""
+import json
+import os
+import pathlib
+import pickle
+import subprocess
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import timezones  # noqa: E402
+
+PITTSBURGH = (40.4455472, -79.9962844)
+AUCKLAND = (-36.9731497, 174.78584290000003)
+
+
+class TestTimezoneResolver(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = os.path.join(tmp.name, "cache", "timezones.json")
+
+    def test_memoizes_lookups(self):
+        resolver = timezones.TimezoneResolver()
+        self.assertEqual(resolver.resolve(*PITTSBURGH), "America/New_York")
+        self.assertEqual(resolver.resolve(*PITTSBURGH), "America/New_York")
+        self.assertEqual(resolver.resolve(*AUCKLAND), "Pacific/Auckland")
+        self.assertEqual((resolver.hits, resolver.misses), (1, 2))
+        self.assertGreater(resolver.load_time, 0)
+
+    def test_persists_between_builds(self):
+        resolver = timezones.TimezoneResolver(self.cache_path)
+        resolver.resolve(*PITTSBURGH)
+        resolver.save()
+
+        resolver = timezones.TimezoneResolver(self.cache_path)
+        self.assertEqual(resolver.resolve(*PITTSBURGH), "America/New_York")
+        self.assertEqual((resolver.hits, resolver.misses, resolver.load_time), (1, 0, 0.0))
+
+    def test_new_timezone_data_drops_entries(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, "w") as f:
+            json.dump(
+                {"version": "tzfpy/0 tzdata/0", "timezones": {"40.4455472,-79.9962844": "Bogus/Zone"}},
+                f,
+            )
+        resolver = timezones.TimezoneResolver(self.cache_path)
+        self.assertEqual(resolver.resolve(*PITTSBURGH), "America/New_York")
+        self.assertEqual(resolver.misses, 1)
+
+    def test_corrupt_cache_is_ignored(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        with open(self.cache_path, "w") as f:
+            f.write("{ not valid json")
+        resolver = timezones.TimezoneResolver(self.cache_path)
+        self.assertEqual(resolver.resolve(*PITTSBURGH), "America/New_York")
+
+    def test_worker_lookups_merge_into_parent(self):
+        parent = timezones.TimezoneResolver(self.cache_path)
+        worker = pickle.loads(pickle.dumps(parent))
+        worker.resolve(*PITTSBURGH)
+        worker.resolve(*PITTSBURGH)
+        parent.merge(worker.drain())
+        self.assertEqual((parent.hits, parent.misses), (1, 1))
+        self.assertEqual((worker.hits, worker.misses), (0, 0))
+        parent.save()
+
+        resolver = timezones.TimezoneResolver(self.cache_path)
+        self.assertEqual(resolver.resolve(*PITTSBURGH), "America/New_York")
+        self.assertEqual(resolver.misses, 0)
+
+    def test_warm_cache_never_imports_tzfpy(self):
+        resolver = timezones.TimezoneResolver(self.cache_path)
+        resolver.resolve(*PITTSBURGH)
+        resolver.save()
+
+        script = (
+            "import sys, timezones\n"
+            f"r = timezones.TimezoneResolver({self.cache_path!r})\n"
+            f"print(r.resolve(*{PITTSBURGH!r}), 'tzfpy' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=REPO_ROOT / "tools",
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "America/New_York False")
+
+
+if __name__ == "__main__":
+    unittest.main()
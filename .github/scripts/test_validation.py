@@ -0,0 +1,183 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "jsonschema",
+# ]
+# ///
+"""Tests that the compiled validator in tools/validation.py agrees with the
+generic one on tools/schema.json. Needs jsonschema, so run it via uv:
+uv run --script .github/scripts/test_validation.py"""
+import copy
+import glob
+import json
+import pathlib
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import validation  # noqa: E402
+
+with open(REPO_ROOT / "tools" / "schema.json") as f:
+    SCHEMA = json.load(f)
+
+SERIES = {
+    "name": "Testcon",
+    "bluesky": {"did": "did:plc:test", "handle": "testcon.example"},
+    "events": [
+        {
+            "id": "testcon-2027",
+            "name": "Testcon 2027",
+            "url": "https://example.com",
+            "startDate": "2027-04-02",
+            "endDate": "2027-04-04",
+            "venue": "Test Hall",
+            "address": "1 Test St",
+            "locale": "en-US",
+            "translations": {"ja-JP": {"name": "テストコン"}},
+            "latLng": [40.4, -79.9],
+            "attendance": 100,
+            "sources": ["fancons.com"],
+            "keyDates": {
+                "hotel": {
+                    "opens": {
+                        "date": "2027-01-05",
+                        "source": "https://bsky.app/profile/x/post/y",
+                        "asOf": "2026-12-01T00:00:00Z",
+                        "confidence": 0.9,
+                    }
+                }
+            },
+        }
+    ],
+}
+
+
+def mutate(path, value=None, delete=False):
+    series = copy.deepcopy(SERIES)
+    *parents, last = path
+    target = series
+    for key in parents:
+        target = target[key]
+    if delete:
+        del target[last]
+    else:
+        target[last] = value
+    return series
+
+
+E = ["events", 0]
+
+MUTATIONS = {
+    "missing name": mutate(["name"], delete=True),
+    "empty name": mutate(["name"], ""),
+    "events not a list": mutate(["events"], {}),
+    "event not an object": mutate(E, "testcon-2027"),
+    "missing locale": mutate([*E, "locale"], delete=True),
+    "bad id pattern": mutate([*E, "id"], "Testcon-2027"),
+    "bad url pattern": mutate([*E, "url"], "ftp://example.com"),
+    "impossible date": mutate([*E, "startDate"], "2027-02-30"),
+    "non-ISO date": mutate([*E, "startDate"], "2027-4-2"),
+    "end before start": mutate([*E, "endDate"], "2027-04-01"),
+    "start date not a string": mutate([*E, "startDate"], 20270101),
+    "end date not a string": mutate([*E, "endDate"], 20270401),
+    "latitude out of range": mutate([*E, "latLng"], [91, 0]),
+    "longitude is a bool": mutate([*E, "latLng"], [0, True]),
+    "latLng too short": mutate([*E, "latLng"], [0]),
+    "latLng too long": mutate([*E, "latLng"], [0, 0, 0]),
+    "fractional attendance": mutate([*E, "attendance"], 1.5),
+    "boolean attendance": mutate([*E, "attendance"], True),
+    "canceled not a bool": mutate([*E, "canceled"], 1),
+    "source not a string": mutate([*E, "sources"], ["a", 1]),
+    "empty translated name": mutate([*E, "translations", "ja-JP", "name"], ""),
+    "translation not an object": mutate([*E, "translations", "ja-JP"], "x"),
+    "bluesky extra property": mutate(["bluesky", "extra"], 1),
+    "bluesky bad did": mutate(["bluesky", "did"], "plc:test"),
+    "unknown key date category": mutate([*E, "keyDates", "parking"], {}),
+    "key date missing date": mutate([*E, "keyDates", "hotel", "opens", "date"], delete=True),
+    "key date confidence too high": mutate([*E, "keyDates", "hotel", "opens", "confidence"], 2),
+}
+
+VALID = {
+    "integral float attendance": mutate([*E, "attendance"], 100.0),
+    "single-day event": mutate([*E, "endDate"], "2027-04-02"),
+    "unknown top-level property": mutate(["extra"], 1),
+    "no optional fields": {"name": "Testcon", "events": []},
+}
+
+
+class TestCompiledValidator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.TemporaryDirectory()
+        cls.validator = validation.Validator(SCHEMA, cls.cache_dir.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.cache_dir.cleanup()
+
+    def errors(self, validator, series):
+        return [(e.json_path, e.message) for e in validator.iter_errors(series)]
+
+    def test_schema_compiles(self):
+        self.assertIsNotNone(self.validator.compiled)
+
+    def test_repo_series_are_valid(self):
+        for fn in sorted(glob.glob(str(REPO_ROOT / "*.json"))):
+            with open(fn) as f:
+                series = json.load(f)
+            with self.subTest(fn=fn):
+                self.assertTrue(self.validator.compiled(series))
+                self.assertEqual(self.errors(self.validator.generic, series), [])
+
+    def test_valid_documents(self):
+        for name, series in {"base": SERIES, **VALID}.items():
+            with self.subTest(name):
+                self.assertTrue(self.validator.compiled(series))
+                self.assertEqual(self.errors(self.validator, series), [])
+
+    def test_invalid_documents(self):
+        for name, series in MUTATIONS.items():
+            with self.subTest(name):
+                self.assertFalse(self.validator.compiled(series))
+                errors = self.errors(self.validator, series)
+                self.assertNotEqual(errors, [])
+                self.assertEqual(errors, self.errors(self.validator.generic, series))
+
+    def test_date_order_message(self):
+        self.assertEqual(
+            self.errors(self.validator, MUTATIONS["end before start"]),
+            [("$.events[0].endDate", "endDate 2027-04-01 is before startDate 2027-04-02")],
+        )
+
+    def test_non_string_date_message(self):
+        self.assertEqual(
+            self.errors(self.validator, MUTATIONS["start date not a string"]),
+            [("$.events[0].startDate", "20270101 is not of type 'string'")],
+        )
+
+    def test_cached_module_is_reused(self):
+        cached = list(pathlib.Path(self.cache_dir.name).glob("schema_*.py"))
+        self.assertEqual(len(cached), 1)
+        validator = validation.Validator(SCHEMA, self.cache_dir.name)
+        self.assertEqual(validator.compiled.__code__.co_filename, str(cached[0]))
+
+    def test_schema_change_invalidates_cache(self):
+        schema = copy.deepcopy(SCHEMA)
+        schema["properties"]["name"]["minLength"] = 3
+        validator = validation.Validator(schema, self.cache_dir.name)
+        self.assertFalse(validator.compiled({"name": "ab", "events": []}))
+        self.assertTrue(self.validator.compiled({"name": "ab", "events": []}))
+
+    def test_unsupported_schema_falls_back(self):
+        schema = {"type": "object", "dependentRequired": {"a": ["b"]}}
+        validator = validation.Validator(schema, self.cache_dir.name)
+        self.assertIsNone(validator.compiled)
+        self.assertEqual(len(self.errors(validator, {"a": 1})), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+# ]
+# ///
+"""Benchmark the tools on a synthetic dataset, optionally comparing against
+a baseline to flag regressions.
+
+./tools/bench.py --scale 10
+./tools/bench.py --scale 10 --baseline-ref origin/main
+./tools/bench.py --scale 10 --baseline results.json --update-baseline
+
+Wall time only means something against a run on the same machine, so the
+usual baseline is --baseline-ref: the tools as of a git ref, benchmarked
+on the same data right before these. No baseline results are committed: a
+--baseline file is one recorded with --update-baseline, and is only
+comparable on the machine that recorded it.
+
+Each tool runs on its own copy of tools/, so materialize.py starts with
+empty timezone and zh caches and never touches the real ones, and is timed
+in the Python environment uv resolves for its script, without uv itself.
+"""
+
+import argparse
+import io
+import json
+import os
+import pathlib
+import platform
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import synthetic
+
+
+TOOLS_DIR = pathlib.Path(__file__).resolve().parent
+
+# format.py takes files as arguments, so pass them in batches that fit in
+# the argument list.
+FORMAT_BATCH = 2000
+
+
+def tool_python(script):
+    """The interpreter uv resolves for a script, creating its environment."""
+    subprocess.run(["uv", "sync", "--quiet", "--script", str(script)], check=True)
+    return subprocess.run(
+        ["uv", "python", "find", "--script", str(script)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def run(argv, cwd):
+    """Run a command, returning its wall time, CPU time and peak RSS."""
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(argv, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr)
+        # wait4 rather than wait, for the child's resource usage.
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+        returncode = os.waitstatus_to_exitcode(status)
+        if returncode != 0:
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(returncode, argv, stderr=stderr.read())
+    return {
+        "wall": wall,
+        "cpu": usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is in KiB on Linux.
+        "peak_rss": usage.ru_maxrss * 1024,
+    }
+
+
+def combine(runs):
+    """Combine runs that together make up one benchmark."""
+    return {
+        "wall": sum(r["wall"] for r in runs),
+        "cpu": sum(r["cpu"] for r in runs),
+        "peak_rss": max(r["peak_rss"] for r in runs),
+    }
+
+
+def best(runs):
+    """The best of repeated runs of the same benchmark, metric by metric."""
+    return {metric: min(r[metric] for r in runs) for metric in runs[0]}
+
+
+def takes_jobs(script):
+    """Whether a materialize.py takes --jobs. Before the process pool was
+    added it took nothing but the output directory, and ran serially."""
+    with open(script) as f:
+        return '"--jobs"' in f.read()
+
+
+def bench_materialize(tools, data_dir, work_dir, args):
+    script = tools / "materialize.py"
+    python = tool_python(script)
+    jobs = ["--jobs", str(args.jobs)]
+    if not takes_jobs(script):
+        if args.jobs != 1:
+            print(f"{script} has no --jobs, so it runs serially", file=sys.stderr)
+        jobs = []
+    runs = {"materialize (cold)": [], "materialize (warm)": []}
+    for _ in range(args.repeat):
+        # Cold starts with empty timezone and zh caches, which warm fills.
+        shutil.rmtree(tools / ".cache", ignore_errors=True)
+        for name, name_runs in runs.items():
+            out_dir = work_dir / "out"
+            shutil.rmtree(out_dir, ignore_errors=True)
+            out_dir.mkdir()
+            name_runs.append(
+                run([python, str(script), *jobs, str(out_dir)], data_dir)
+            )
+    return {name: best(name_runs) for name, name_runs in runs.items()}
+
+
+def bench_format(tools, data_dir, work_dir, args):
+    script = tools / "format.py"
+    python = tool_python(script)
+    files = sorted(fn for fn in os.listdir(data_dir) if fn.endswith(".json"))
+    return {
+        "format": best(
+            [
+                combine(
+                    [
+                        run([python, str(script), *files[i : i + FORMAT_BATCH]], data_dir)
+                        for i in range(0, len(files), FORMAT_BATCH)
+                    ]
+                )
+                for _ in range(args.repeat)
+            ]
+        )
+    }
+
+
+def bench_find_missing_events(tools, data_dir, work_dir, args):
+    script = tools / "find_missing_events.py"
+    python = tool_python(script)
+    return {
+        "find_missing_events": best(
+            [run([python, str(script)], data_dir) for _ in range(args.repeat)]
+        )
+    }
+
+
+BENCHMARKS = {
+    "materialize": bench_materialize,
+    "format": bench_format,
+    "find_missing_events": bench_find_missing_events,
+}
+
+
+def export_tools(ref, dest):
+    """Write tools/ as of a git ref to dest."""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", f"{ref}:tools"],
+        cwd=TOOLS_DIR.parent,
+        check=True,
+        capture_output=True,
+    ).stdout
+    dest.mkdir(parents=True)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest, filter="data")
+
+
+def bench_tools(tools, data_dir, work_dir, names, args):
+    results = {}
+    for name in names:
+        results.update(BENCHMARKS[name](tools, data_dir, work_dir, args))
+    return results
+
+
+def print_results(results, n_series, n_events, label=""):
+    for result in results.values():
+        result["series_per_second"] = n_series / result["wall"]
+        result["events_per_second"] = n_events / result["wall"]
+    for name, result in results.items():
+        print(
+            f"{label + name:>27}: {result['wall']:8.3f} s wall, {result['cpu']:8.3f} s CPU, "
+            f"{result['peak_rss'] / 2**20:7.1f} MiB peak, "
+            f"{result['events_per_second']:10,.0f} events/s"
+        )
+
+
+def compare(results, baseline, tolerance):
+    """Return a line for each metric worse than the baseline by more than
+    tolerance, as a fraction."""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric in ["wall", "peak_rss"]:
+            if result[metric] > before[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: {metric} {result[metric]:.4g} vs baseline {before[metric]:.4g} "
+                    f"({result[metric] / before[metric] - 1:+.0%})"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    synthetic.add_arguments(parser)
+    parser.add_argument(
+        "--scale",
+        type=float,
+        help="multiply the default series count, e.g. 10 or 1000; overrides --series",
+    )
+    parser.add_argument(
+        "--tools",
+        default=",".join(BENCHMARKS),
+        help="comma-separated tools to benchmark",
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="materialize.py --jobs")
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="run each tool this many times and keep the best",
+    )
+    baseline = parser.add_mutually_exclusive_group()
+    baseline.add_argument(
+        "--baseline-ref",
+        metavar="REF",
+        help="also benchmark tools/ as of this git ref, on the same data, and compare against it",
+    )
+    baseline.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        help="compare against results recorded on this machine with --update-baseline",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="record this run as the baseline instead of comparing against it",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="flag metrics worse than the baseline by more than this fraction",
+    )
+    parser.add_argument("--output", type=pathlib.Path, help="also write results here")
+    args = parser.parse_args()
+
+    if args.scale is not None:
+        args.series = round(synthetic.DEFAULTS["series"] * args.scale)
+    options = synthetic.options_from_args(args)
+    for name in args.tools.split(","):
+        if name not in BENCHMARKS:
+            parser.error(f"unknown tool {name!r}")
+    config = {**options, "tools": args.tools.split(","), "jobs": args.jobs}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        data_dir = tmp / "data"
+        n_events = synthetic.generate(data_dir, **options)
+
+        baseline_results = None
+        if args.baseline_ref is not None:
+            baseline_tools = tmp / "baseline" / "tools"
+            export_tools(args.baseline_ref, baseline_tools)
+            baseline_results = bench_tools(
+                baseline_tools, data_dir, tmp, config["tools"], args
+            )
+
+        tools = tmp / "tools"
+        shutil.copytree(
+            TOOLS_DIR, tools, ignore=shutil.ignore_patterns(".cache", "__pycache__")
+        )
+        results = bench_tools(tools, data_dir, tmp, config["tools"], args)
+
+    print(f"{options['series']:,} series, {n_events:,} events")
+    if baseline_results is not None:
+        print_results(baseline_results, options["series"], n_events, "base ")
+    print_results(results, options["series"], n_events)
+
+    report = {
+        "config": config,
+        "machine": {
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if baseline_results is None:
+        if args.baseline is None:
+            return
+
+        if args.update_baseline:
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+            return
+
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["config"] != config:
+            sys.exit(
+                f"{args.baseline} was recorded with {baseline['config']}, not {config}; "
+                "pass the same options or --update-baseline"
+            )
+        if baseline["machine"] != report["machine"]:
+            sys.exit(
+                f"{args.baseline} was recorded on {baseline['machine']}, not "
+                f"{report['machine']}; use --baseline-ref or --update-baseline"
+            )
+        baseline_results = baseline["results"]
+
+    regressions = compare(results, baseline_results, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "numpy"
+# ]
+# ///
+"""Compare the columnar bundles materialize.py writes with the JSONL files
+they mirror, by size and by how long a client takes to load them into
+per-field NumPy arrays. Run on a materialized output directory:
+./tools/bench_columnar.py out/"""
+
+import argparse
+import gzip
+import json
+import pathlib
+import time
+import numpy
+import columnar
+
+
+def load_jsonl(path):
+    """Load a JSONL file into the same per-field arrays as a bundle, the way
+    a client without bundles would."""
+    with open(path) as f:
+        rows = [json.loads(line) for line in f]
+    fields = {field for row in rows for field in row}
+    columns = {}
+    for field in fields:
+        values = [row.get(field) for row in rows]
+        match columnar.TYPES.get(field, "json"):
+            case "date":
+                columns[field] = numpy.array(
+                    [value or "NaT" for value in values], dtype="datetime64[D]"
+                )
+            case "latlng":
+                columns[field] = numpy.array(
+                    [value or [numpy.nan, numpy.nan] for value in values], dtype=float
+                )
+            case "count":
+                columns[field] = numpy.array(
+                    [-1 if value is None else value for value in values], dtype="int32"
+                )
+            case "bool":
+                columns[field] = numpy.array([bool(value) for value in values])
+            case _:
+                column = numpy.empty(len(values), dtype=object)
+                column[:] = values
+                columns[field] = column
+    return columns
+
+
+def load_bundle(path):
+    bundle = columnar.load(path)
+    return {field: bundle[field] for field in bundle.columns}
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_dir", type=pathlib.Path)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name in ["current", "last"]:
+        print(f"{name}:")
+        for path, load in [
+            (args.output_dir / f"{name}.jsonl", load_jsonl),
+            (args.output_dir / f"{name}.columns", load_bundle),
+        ]:
+            data = path.read_bytes()
+            elapsed = best_of(args.repeat, lambda: load(path))
+            print(
+                f"{path.name:>16}: {len(data):8,} bytes, "
+                f"{len(gzip.compress(data, mtime=0)):8,} gzipped, "
+                f"loaded in {elapsed * 1e3:6.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
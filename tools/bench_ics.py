@@ -0,0 +1,98 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+# ]
+# ///
+"""Measure ICS writer throughput on every event in the repo, as
+materialize.py renders them. Run from the repo root:
+./tools/bench_ics.py"""
+
+import argparse
+import datetime
+import io
+import json
+import time
+import ics
+import layout
+
+
+def per_character_foldline(line, limit=75):
+    """The writer's previous fold, for comparison."""
+    buf = io.StringIO()
+    n = 0
+    for c in line:
+        m = len(c.encode("utf-8"))
+        if n + m > limit:
+            buf.write("\r\n ")
+            n = 1
+        buf.write(c)
+        n += m
+    return buf.getvalue()
+
+
+def load_events():
+    events = []
+    for fn in layout.scan().values():
+        with open(fn) as f:
+            events.extend(json.load(f)["events"])
+    return events
+
+
+def render_calendar(events, dtstamp):
+    return "".join(
+        ics.render_calendar(
+            "cons.fyi",
+            [
+                ics.render_event(
+                    event,
+                    event["startDate"].replace("-", ""),
+                    (
+                        datetime.date.fromisoformat(event["endDate"])
+                        + datetime.timedelta(days=1)
+                    ).strftime("%Y%m%d"),
+                    dtstamp,
+                )
+                for event in events
+            ],
+        )
+    )
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    events = load_events()
+    dtstamp = "20000101T000000Z"
+    calendar = render_calendar(events, dtstamp)
+    size = len(calendar.encode("utf-8"))
+    lines = calendar.replace("\r\n ", "").split("\r\n")
+
+    print(f"{len(events)} events, {len(lines)} lines, {size / 1e6:.2f} MB")
+    for name, foldline in [
+        ("per-character fold", per_character_foldline),
+        ("ics.foldline", ics.foldline),
+    ]:
+        elapsed = best_of(args.repeat, lambda: [foldline(line) for line in lines])
+        print(f"{name:>20}: {elapsed * 1e3:7.2f} ms, {size / elapsed / 1e6:7.1f} MB/s")
+
+    elapsed = best_of(args.repeat, lambda: render_calendar(events, dtstamp))
+    print(
+        f"{'full calendar':>20}: {elapsed * 1e3:7.2f} ms, "
+        f"{size / elapsed / 1e6:7.1f} MB/s, {len(events) / elapsed:,.0f} events/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
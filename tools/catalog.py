@@ -0,0 +1,292 @@
+"""A SQLite index of the series files, for tools that only need a few fields
+of every series and would otherwise parse them all on every run.
+
+series_catalog = Catalog()
+series_catalog.refresh()
+for row in series_catalog.no_upcoming(datetime.date.today()):
+    print(row["id"], row["latest_start"])
+
+Or just bring it up to date, from the repo root:
+
+python3 tools/catalog.py
+
+refresh() only reads series files whose mtime or size changed since they
+were last indexed, and only reparses those whose contents did. A file that
+can't be indexed is skipped with a warning, keeping what was last indexed
+from it, and retried on the next refresh. Dates are stored as ISO strings,
+which sort as dates.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import layout
+
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), ".cache", "catalog.sqlite")
+
+# Bump whenever the tables, or what goes in them, change.
+VERSION = 3
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE files (
+    series_id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL
+);
+-- latest_* describe the event with the latest start, and url is that of the
+-- newest event, as listed first in the file.
+CREATE TABLE series (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT,
+    latest_start TEXT,
+    latest_locale TEXT,
+    latest_region TEXT
+);
+CREATE TABLE events (
+    id TEXT NOT NULL,
+    series_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    locale TEXT NOT NULL,
+    region TEXT NOT NULL,
+    guessed INTEGER NOT NULL,
+    canceled INTEGER NOT NULL,
+    venue TEXT NOT NULL,
+    address TEXT,
+    lat REAL,
+    lng REAL,
+    -- As JSON.
+    translations TEXT
+);
+CREATE INDEX events_id ON events (id);
+CREATE INDEX events_series_id ON events (series_id);
+CREATE INDEX events_start_date ON events (start_date);
+"""
+
+
+def region_of(locale):
+    """The region subtag of a locale, e.g. US for en-US."""
+    return locale.rpartition("-")[2]
+
+
+class Catalog:
+    def __init__(self, path=CATALOG_PATH, root="."):
+        self.root = os.path.abspath(root)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+
+        try:
+            meta = dict(self.db.execute("SELECT key, value FROM meta").fetchall())
+        except sqlite3.OperationalError:
+            meta = {}
+        # An index of another checkout, or from another version, is rebuilt.
+        if meta != {"version": str(VERSION), "root": self.root}:
+            with self.db:
+                for (table,) in self.db.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                ).fetchall():
+                    self.db.execute(f"DROP TABLE {table}")
+            self.db.executescript(SCHEMA)
+            with self.db:
+                self.db.executemany(
+                    "INSERT INTO meta VALUES (?, ?)",
+                    [("version", str(VERSION)), ("root", self.root)],
+                )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def refresh(self, skip=()):
+        """Bring the index up to date with the series files, returning how
+        many were (reparsed, removed). Series in skip are left as they were
+        last indexed, e.g. while their files may not even parse."""
+        indexed = {row["series_id"]: row for row in self.db.execute("SELECT * FROM files")}
+        paths = layout.scan(self.root)
+        reparsed = 0
+        with self.db:
+            for series_id, path in paths.items():
+                if series_id in skip:
+                    continue
+                st = os.stat(path)
+                relpath = os.path.relpath(path, self.root)
+                row = indexed.get(series_id)
+                if row is not None and (row["path"], row["mtime_ns"], row["size"]) == (
+                    relpath,
+                    st.st_mtime_ns,
+                    st.st_size,
+                ):
+                    continue
+
+                with open(path, "rb") as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                if row is None or row["sha256"] != digest:
+                    # Whatever a series that fails partway through wrote is
+                    # rolled back, leaving what was last indexed from it.
+                    self.db.execute("SAVEPOINT index_series")
+                    try:
+                        self.index_series(series_id, json.loads(data))
+                    except (
+                        ValueError,
+                        LookupError,
+                        TypeError,
+                        AttributeError,
+                        sqlite3.Error,
+                    ) as e:
+                        self.db.execute("ROLLBACK TO index_series")
+                        logging.warning("%s: not indexed: %r", relpath, e)
+                        continue
+                    finally:
+                        self.db.execute("RELEASE index_series")
+                    reparsed += 1
+                self.db.execute(
+                    "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                    (series_id, relpath, st.st_mtime_ns, st.st_size, digest),
+                )
+
+            removed = indexed.keys() - paths.keys()
+            for series_id in removed:
+                self.db.execute("DELETE FROM files WHERE series_id = ?", (series_id,))
+                self.db.execute("DELETE FROM series WHERE id = ?", (series_id,))
+                self.db.execute("DELETE FROM events WHERE series_id = ?", (series_id,))
+        return reparsed, len(removed)
+
+    def index_series(self, series_id, series):
+        events = series["events"]
+        latest = max(events, key=lambda event: event["startDate"], default=None)
+        self.db.execute("DELETE FROM events WHERE series_id = ?", (series_id,))
+        self.db.execute(
+            "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                series_id,
+                series["name"],
+                events[0]["url"] if events else None,
+                latest and latest["startDate"],
+                latest and latest["locale"],
+                latest and region_of(latest["locale"]),
+            ),
+        )
+        self.db.executemany(
+            "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    event["id"],
+                    series_id,
+                    position,
+                    event["name"],
+                    event["url"],
+                    event["startDate"],
+                    event["endDate"],
+                    event["locale"],
+                    region_of(event["locale"]),
+                    "guessed" in event.get("sources", []),
+                    event.get("canceled", False),
+                    event["venue"],
+                    event.get("address"),
+                    *event.get("latLng", [None, None]),
+                    json.dumps(event["translations"]) if "translations" in event else None,
+                )
+                for position, event in enumerate(events)
+            ],
+        )
+
+    def series_of_events(self, event_ids):
+        """{event_id: [series_id, ...]} for each of event_ids that any series
+        lists, with the series in ID order."""
+        found = {}
+        for event_id in event_ids:
+            rows = self.db.execute(
+                "SELECT series_id FROM events WHERE id = ? ORDER BY series_id", (event_id,)
+            ).fetchall()
+            if rows:
+                found[event_id] = [row["series_id"] for row in rows]
+        return found
+
+    def no_upcoming(self, today, horizon=0, region=None, locale=None):
+        """Series with no event starting within horizon days of today, or
+        on or after today with the default horizon of 0, ordered by the
+        start of their latest event. Series without events come first.
+        region and locale filter on the latest event."""
+        cutoff = (today + datetime.timedelta(days=horizon)).isoformat()
+        where = ["(latest_start IS NULL OR latest_start < ?)"]
+        params = [cutoff]
+        if region is not None:
+            where.append("latest_region = ?")
+            params.append(region)
+        if locale is not None:
+            where.append("latest_locale = ?")
+            params.append(locale)
+        return self.db.execute(
+            f"SELECT * FROM series WHERE {' AND '.join(where)} ORDER BY latest_start, id",
+            params,
+        ).fetchall()
+
+    def events(self, start=None, end=None, region=None, locale=None, guessed=None):
+        """Events overlapping the dates from start to end inclusive, either
+        of which may be open, ordered by start date and then as the series
+        files list them."""
+        where = []
+        params = []
+        if start is not None:
+            where.append("end_date >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            where.append("start_date <= ?")
+            params.append(end.isoformat())
+        if region is not None:
+            where.append("region = ?")
+            params.append(region)
+        if locale is not None:
+            where.append("locale = ?")
+            params.append(locale)
+        if guessed is not None:
+            where.append("guessed = ?")
+            params.append(guessed)
+        return self.db.execute(
+            "SELECT * FROM events"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY start_date, series_id || '.json', position",
+            params,
+        ).fetchall()
+
+    def venues(self):
+        """Every distinct venue and address, with the locale, coordinates
+        and translations of the latest event there."""
+        # SQLite takes the bare columns from the row with the MAX().
+        return self.db.execute(
+            "SELECT venue, address, lat, lng, locale, translations, MAX(start_date) AS start_date"
+            " FROM events GROUP BY venue, address ORDER BY venue, address"
+        ).fetchall()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    with Catalog() as series_catalog:
+        reparsed, removed = series_catalog.refresh()
+    logging.info("%d series reparsed, %d removed", reparsed, removed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Simplified/Traditional Chinese conversion for zh events.
+
+Building a langconv converter costs more than converting every string in the
+dataset, most builds have only a handful of zh events, and the same venues
+and addresses come back year after year. ChineseConverter only loads
+langconv for a script once something needs converting, memoizes conversions
+in a bounded LRU, and persists that LRU between builds.
+"""
+
+import collections
+import importlib
+import importlib.metadata
+import json
+import logging
+import os
+import time
+import regex
+
+
+HAN = regex.compile(r"\p{sc=Han}")
+
+# langconv language definitions for each script we convert into.
+LANGUAGES = {
+    "zh-Hant": ("zh-hant", "zh/hant.json", ["zh-hant", "zh-TW"]),
+    "zh-Hans": ("zh-hans", "zh/hans.json", ["zh-hans"]),
+}
+
+
+def has_han(s):
+    return HAN.search(s) is not None
+
+
+def data_version():
+    """Identify the conversion tables without importing langconv."""
+    return f"langconv/{importlib.metadata.version('langconv')}"
+
+
+class ChineseConverter:
+    def __init__(self, cache_path=None, maxsize=8192):
+        self.cache_path = cache_path
+        self.maxsize = maxsize
+        self.version = data_version()
+        # (script, text) -> converted text, least recently used first.
+        self.conversions = collections.OrderedDict()
+        self.learned = {}
+        self.converters = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.dirty = False
+
+        if cache_path is None:
+            return
+
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        if cache.get("version") == self.version:
+            for script, text, converted in cache.get("conversions", []):
+                self.put((script, text), converted)
+
+    def __getstate__(self):
+        # Worker processes get a copy of the memo, but load langconv for
+        # themselves if they need it.
+        return {**self.__dict__, "converters": {}}
+
+    def put(self, key, converted):
+        self.conversions[key] = converted
+        self.conversions.move_to_end(key)
+        if len(self.conversions) > self.maxsize:
+            self.conversions.popitem(last=False)
+
+    def converter(self, script):
+        converter = self.converters.get(script)
+        if converter is None:
+            start = time.perf_counter()
+            langconv_converter = importlib.import_module("langconv.converter")
+            langconv_language = importlib.import_module("langconv.language")
+            name, data_file, tags = LANGUAGES[script]
+            converter = langconv_converter.LanguageConverter.from_language(
+                langconv_language.Language.from_json_files(
+                    name, [langconv_language.get_data_file_path(data_file)], tags
+                )
+            )
+            self.converters[script] = converter
+            self.load_time += time.perf_counter() - start
+        return converter
+
+    def convert_all(self, requests):
+        """Convert a batch of (script, text) pairs, returning the results in
+        order. Each distinct pair is converted at most once."""
+        results = []
+        for key in requests:
+            converted = self.conversions.get(key)
+            if converted is not None:
+                self.hits += 1
+                self.conversions.move_to_end(key)
+            else:
+                self.misses += 1
+                script, text = key
+                converted = self.converter(script).convert(text)
+                self.put(key, converted)
+                self.learned[key] = converted
+                self.dirty = True
+            results.append(converted)
+        return results
+
+    def drain(self):
+        """Return and reset the stats and conversions since the last drain,
+        for merging into the converter of another process."""
+        delta = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "load_time": self.load_time,
+            "learned": self.learned,
+        }
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.learned = {}
+        return delta
+
+    def merge(self, delta):
+        self.hits += delta["hits"]
+        self.misses += delta["misses"]
+        self.load_time += delta["load_time"]
+        for key, converted in delta["learned"].items():
+            if self.conversions.get(key) != converted:
+                self.put(key, converted)
+                self.dirty = True
+
+    def log_stats(self):
+        logging.info(
+            "zh conversions: %d hits, %d misses, langconv loaded in %.3fs",
+            self.hits,
+            self.misses,
+            self.load_time,
+        )
+
+    def save(self):
+        if self.cache_path is None or not self.dirty:
+            return
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": self.version,
+                    "conversions": [
+                        [script, text, converted]
+                        for (script, text), converted in self.conversions.items()
+                    ],
+                },
+                f,
+                ensure_ascii=False,
+                indent=0,
+            )
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
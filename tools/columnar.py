@@ -0,0 +1,264 @@
+"""Columnar bundles of events, for clients that load a whole list at once.
+
+A bundle stores the same events as a JSONL file, but as one packed array per
+field instead of one object per line. Strings are dictionary-encoded into a
+table shared by every column, so a locale, venue or seriesId repeated across
+rows is stored once. Writing needs only the standard library; load() reads a
+bundle straight into NumPy arrays.
+
+Layout, all little-endian, with every array aligned to 8 bytes:
+
+    b"CONSFYI1"                 magic
+    arrays                      at the offsets given in the header
+    header                      UTF-8 JSON, see below
+    uint64                      length of the header
+    b"CONSFYI1"                 magic
+
+The header is {"rows": n, "strings": {"count": k, "offsets": [offset,
+length], "data": [offset, length]}, "columns": {name: {"type": type, "data":
+[offset, length]}}}. The string table is k + 1 uint32 byte offsets into a
+UTF-8 blob, string i being data[offsets[i]:offsets[i + 1]]. Column types:
+
+    string      int32 index into the string table, -1 if missing
+    json        as string, for any other field, as compact JSON
+    date        int32 days since 1970-01-01, INT32_MIN if missing
+    count       int32, -1 if missing
+    bool        uint8, 0 if missing
+    latlng      float64 pairs, NaN if missing
+"""
+
+import array
+import datetime
+import io
+import json
+import struct
+import sys
+
+
+MAGIC = b"CONSFYI1"
+
+# Fields with a column type of their own. Every other field is a json column.
+TYPES = {
+    "id": "string",
+    "seriesId": "string",
+    "name": "string",
+    "url": "string",
+    "startDate": "date",
+    "endDate": "date",
+    "venue": "string",
+    "address": "string",
+    "locale": "string",
+    "timezone": "string",
+    "latLng": "latlng",
+    "attendance": "count",
+    "previousAttendance": "count",
+    "canceled": "bool",
+}
+
+INT32_MIN = -(2**31)
+EPOCH = datetime.date(1970, 1, 1)
+
+# (array typecode, missing value) for each column type.
+ARRAYS = {
+    "string": ("i", -1),
+    "json": ("i", -1),
+    "date": ("i", INT32_MIN),
+    "count": ("i", -1),
+    "bool": ("B", 0),
+    "latlng": ("d", float("nan")),
+}
+
+
+def pad(n):
+    return -n % 8
+
+
+class StringTable:
+    def __init__(self):
+        self.indices = {}
+
+    def intern(self, s):
+        index = self.indices.get(s)
+        if index is None:
+            index = self.indices[s] = len(self.indices)
+        return index
+
+    def encode(self):
+        offsets = array.array("I", [0])
+        data = bytearray()
+        for s in self.indices:
+            data += s.encode("utf-8")
+            offsets.append(len(data))
+        return offsets, bytes(data)
+
+
+def write(events, path):
+    """Write a list of event records to a bundle at path."""
+    with open(path, "wb") as f:
+        f.write(dumps(events))
+
+
+def dumps(events):
+    """Encode event records as a bundle. events is iterated twice, once to
+    find the fields and once to fill the columns, so it can be a view that
+    decodes events on the fly rather than a list."""
+    strings = StringTable()
+    # Only fields that appear in at least one event get a column.
+    seen = set()
+    extra = []
+    for event in events:
+        for field in event:
+            if field not in seen:
+                seen.add(field)
+                if field not in TYPES:
+                    extra.append(field)
+    fields = [field for field in TYPES if field in seen] + extra
+
+    types = [TYPES.get(field, "json") for field in fields]
+    columns = [array.array(ARRAYS[type][0]) for type in types]
+    rows = 0
+    for event in events:
+        rows += 1
+        for field, type, column in zip(fields, types, columns):
+            value = event.get(field)
+            if value is None:
+                missing = ARRAYS[type][1]
+                if type == "latlng":
+                    column.extend([missing, missing])
+                else:
+                    column.append(missing)
+                continue
+            match type:
+                case "string":
+                    column.append(strings.intern(value))
+                case "json":
+                    column.append(
+                        strings.intern(
+                            json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                        )
+                    )
+                case "date":
+                    column.append((datetime.date.fromisoformat(value) - EPOCH).days)
+                case "count":
+                    column.append(int(value))
+                case "bool":
+                    column.append(int(value))
+                case "latlng":
+                    column.extend(value)
+    columns = dict(zip(fields, zip(types, columns)))
+
+    offsets, data = strings.encode()
+    blobs = [offsets, data, *(column for _, column in columns.values())]
+    spans = []
+    f = io.BytesIO()
+    f.write(MAGIC)
+    position = len(MAGIC)
+    for blob in blobs:
+        if isinstance(blob, array.array):
+            if sys.byteorder == "big":
+                blob.byteswap()
+            blob = blob.tobytes()
+        spans.append([position, len(blob)])
+        f.write(blob)
+        f.write(b"\0" * pad(len(blob)))
+        position += len(blob) + pad(len(blob))
+
+    header = json.dumps(
+        {
+            "rows": rows,
+            "strings": {
+                "count": len(strings.indices),
+                "offsets": spans[0],
+                "data": spans[1],
+            },
+            "columns": {
+                field: {"type": type, "data": span}
+                for (field, (type, _)), span in zip(columns.items(), spans[2:])
+            },
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    f.write(header)
+    f.write(struct.pack("<Q", len(header)))
+    f.write(MAGIC)
+    return f.getvalue()
+
+
+class Bundle:
+    """A loaded bundle. columns holds each field's arrays as stored, which
+    share memory with the file's contents; bundle[field] decodes one."""
+
+    def __init__(self, rows, strings, types, columns):
+        self.rows = rows
+        self.strings = strings
+        self.types = types
+        self.columns = columns
+
+    def __len__(self):
+        return self.rows
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def __getitem__(self, field):
+        import numpy
+
+        column = self.columns[field]
+        match self.types[field]:
+            case "string":
+                # Index -1, missing, picks the None on the end.
+                return numpy.append(self.strings, None)[column]
+            case "json":
+                # Decode each distinct value once. The last entry, for -1,
+                # stays None.
+                table = numpy.empty(len(self.strings) + 1, dtype=object)
+                for i in numpy.unique(column[column >= 0]):
+                    table[i] = json.loads(self.strings[i])
+                return table[column]
+            case "date":
+                dates = column.astype("int64")
+                dates[column == INT32_MIN] = numpy.iinfo("int64").min
+                return dates.view("datetime64[D]")
+            case "bool":
+                return column.view(bool)
+            case _:
+                return column
+
+
+def load(path):
+    """Read a bundle into NumPy arrays."""
+    import numpy
+
+    with open(path, "rb") as f:
+        buf = f.read()
+    if buf[: len(MAGIC)] != MAGIC or buf[-len(MAGIC) :] != MAGIC:
+        raise ValueError(f"{path} is not an events bundle")
+    header_end = len(buf) - len(MAGIC) - 8
+    (header_length,) = struct.unpack_from("<Q", buf, header_end)
+    header = json.loads(buf[header_end - header_length : header_end])
+
+    def view(span, dtype):
+        offset, length = span
+        dtype = numpy.dtype(dtype)
+        return numpy.frombuffer(buf, dtype, length // dtype.itemsize, offset)
+
+    rows = header["rows"]
+    offsets = view(header["strings"]["offsets"], "<u4").tolist()
+    offset, length = header["strings"]["data"]
+    data = buf[offset : offset + length]
+    strings = numpy.array(
+        [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])],
+        dtype=object,
+    )
+
+    types = {}
+    columns = {}
+    for field, column in header["columns"].items():
+        type = column["type"]
+        types[field] = type
+        typecode = {"i": "<i4", "B": "u1", "d": "<f8"}[ARRAYS[type][0]]
+        columns[field] = view(column["data"], typecode)
+        if type == "latlng":
+            columns[field] = columns[field].reshape(rows, 2)
+
+    return Bundle(rows, strings, types, columns)
@@ -0,0 +1,103 @@
+"""Every event in one file, for clients that want more than a handful.
+
+events.pack holds each materialized event as a line of compact JSON, so it
+can also be read as JSONL. events.idx maps each event ID to the byte offset
+and length of its line, without the newline, as {"id": [offset, length]}. A
+client can fetch one event with a single HTTP request for
+`Range: bytes=offset-(offset + length - 1)`, or mmap the pack and look events
+up locally with EventPack.
+"""
+
+import io
+import json
+import mmap
+
+
+def write(events, pack_path, idx_path):
+    """Write events, an iterable of event records, to a pack and its index."""
+    pack, idx = dumps(events)
+    with open(pack_path, "wb") as f:
+        f.write(pack)
+    with open(idx_path, "wb") as f:
+        f.write(idx)
+
+
+def dumps(events):
+    """Encode events, an iterable of event records, as (pack, idx) bytes."""
+    f = io.BytesIO()
+    writer = Writer(f)
+    for event in events:
+        writer.add(event)
+    return f.getvalue(), writer.dumps_idx()
+
+
+class Writer:
+    """Appends events to a pack one at a time, as they are materialized,
+    keeping only the index in memory."""
+
+    def __init__(self, f):
+        self.f = f
+        self.idx = {}
+        self.offset = 0
+
+    def add(self, event):
+        """Append an event, returning the offset and length of its line."""
+        record = json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        span = [self.offset, len(record)]
+        self.idx[event["id"]] = span
+        self.f.write(record)
+        self.f.write(b"\n")
+        self.offset += len(record) + 1
+        return span
+
+    def dumps_idx(self):
+        return json.dumps(self.idx, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EventPack:
+    """Read-only, mmap-backed lookup of events by ID.
+
+    with EventPack("events.pack", "events.idx") as pack:
+        event = pack["anthrocon-2025"]
+    """
+
+    def __init__(self, pack_path, idx_path):
+        with open(idx_path) as f:
+            self.idx = json.load(f)
+        with open(pack_path, "rb") as f:
+            # mmap can't map an empty file.
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.idx else None
+
+    def raw(self, event_id):
+        """The event's compact JSON, undecoded."""
+        offset, length = self.idx[event_id]
+        return self.mmap[offset : offset + length]
+
+    def __getitem__(self, event_id):
+        return json.loads(self.raw(event_id))
+
+    def get(self, event_id, default=None):
+        if event_id not in self.idx:
+            return default
+        return self[event_id]
+
+    def __contains__(self, event_id):
+        return event_id in self.idx
+
+    def __iter__(self):
+        return iter(self.idx)
+
+    def __len__(self):
+        return len(self.idx)
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
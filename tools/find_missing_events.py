@@ -6,59 +6,78 @@
 # ]
 # ///
 
+import argparse
+import catalog
 import datetime
-import os
-import json
 import tabulate
 
 
 def main():
-    now = datetime.date.today()
-
-    guessed = []
-    no_upcoming = []
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--region", help="only series and events in this region, e.g. US")
+    parser.add_argument("--locale", help="only series and events in this locale, e.g. en-US")
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        default=0,
+        metavar="DAYS",
+        help="also list series whose next event starts within this many days",
+    )
+    parser.add_argument(
+        "--from",
+        dest="start",
+        type=datetime.date.fromisoformat,
+        help="also list events on or after this date",
+    )
+    parser.add_argument(
+        "--to",
+        dest="end",
+        type=datetime.date.fromisoformat,
+        help="also list events on or before this date",
+    )
+    args = parser.parse_args()
 
-    for fn in sorted(os.listdir(".")):
-        series_id, ext = os.path.splitext(fn)
-        if ext != ".json":
-            continue
+    now = datetime.date.today()
 
-        with open(fn) as f:
-            series = json.load(f)
-            start = max(
-                (
-                    datetime.date.fromisoformat(event["startDate"])
-                    for event in series["events"]
-                ),
-                default=None,
+    with catalog.Catalog() as series_catalog:
+        series_catalog.refresh()
+        no_upcoming = series_catalog.no_upcoming(
+            now, args.horizon, region=args.region, locale=args.locale
+        )
+        guessed = series_catalog.events(region=args.region, locale=args.locale, guessed=True)
+        events = None
+        if args.start is not None or args.end is not None:
+            events = series_catalog.events(
+                args.start, args.end, region=args.region, locale=args.locale
             )
-            if start is None or start < now:
-                no_upcoming.append((start, series_id, series))
-            for event in series["events"]:
-                if "guessed" in event.get("sources", []):
-                    guessed.append(event)
-
-    no_upcoming.sort()
 
     print(
         tabulate.tabulate(
-            (
-                (date, id, series["events"][0]["url"])
-                for date, id, series in no_upcoming
-            ),
+            ((series["latest_start"], series["id"], series["url"]) for series in no_upcoming),
             headers=["date", "id", "url"],
         )
     )
     print("")
 
-    guessed.sort(key=lambda event: event["startDate"])
     print(
         tabulate.tabulate(
-            ((event["startDate"], event["id"], event["url"]) for event in guessed),
+            ((event["start_date"], event["id"], event["url"]) for event in guessed),
             headers=["date", "id", "url"],
         )
     )
 
+    if events is not None:
+        print("")
+        print(
+            tabulate.tabulate(
+                (
+                    (event["start_date"], event["end_date"], event["id"], event["url"])
+                    for event in events
+                ),
+                headers=["date", "end", "id", "url"],
+            )
+        )
+
 
 if __name__ == "__main__":
     main()
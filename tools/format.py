@@ -5,50 +5,138 @@
 #   "orjson"
 # ]
 # ///
+"""Canonically format series files: keys in schema order, two-space indent.
 
+./tools/format.py                  # every series file, in either layout
+./tools/format.py anthrocon.json   # just these
+./tools/format.py --check          # report files that aren't canonical
+
+Files already in canonical form are left untouched.
+"""
+
+import argparse
+import concurrent.futures
 import itertools
+import layout
 import orjson
 import sys
 import os
 
 
-def reorder(obj, schema):
+def compile_reorder(schema):
+    """Compile a schema into a function that puts a value's keys in schema
+    order, with any keys the schema doesn't list after them in their
+    original order. Returns None where a value is kept as it is."""
     match schema["type"]:
         case "object":
-            props = schema.get("properties", {})
-            return {k: reorder(obj[k], props[k]) for k in props if k in obj} | {
-                k: v for k, v in obj.items() if k not in props
-            }
-        case "array":
-            return [
-                reorder(u, s)
-                for u, s in zip(
-                    obj,
-                    itertools.chain(
-                        schema.get("prefixItems", []),
-                        itertools.cycle([schema["items"]]) if "items" in schema else [],
-                    ),
-                )
+            props = [
+                (k, compile_reorder(s)) for k, s in schema.get("properties", {}).items()
             ]
+            known = {k for k, _ in props}
+
+            def reorder_object(obj):
+                out = {
+                    k: obj[k] if reorder is None else reorder(obj[k])
+                    for k, reorder in props
+                    if k in obj
+                }
+                if len(out) < len(obj):
+                    out |= {k: v for k, v in obj.items() if k not in known}
+                return out
+
+            return reorder_object
+        case "array":
+            prefix = [compile_reorder(s) for s in schema.get("prefixItems", [])]
+            has_items = "items" in schema
+            items = compile_reorder(schema["items"]) if has_items else None
+            if has_items and items is None and all(reorder is None for reorder in prefix):
+                return None
+
+            def reorder_array(obj):
+                # Without items, elements past prefixItems are dropped.
+                out = [u if reorder is None else reorder(u) for u, reorder in zip(obj, prefix)]
+                if has_items:
+                    rest = obj[len(prefix) :]
+                    out.extend(rest if items is None else map(items, rest))
+                return out
+
+            return reorder_array
         case _:
-            return obj
+            return None
+
+
+# Set once per process by init_worker.
+worker_reorder = None
+
+
+def init_worker(schema):
+    global worker_reorder
+    worker_reorder = compile_reorder(schema)
+
+
+def format_file(fn, check):
+    """Format one file, returning whether it was already canonical. With
+    check, nothing is written."""
+    with open(fn, "rb") as f:
+        data = f.read()
+    obj = orjson.loads(data)
+    out = orjson.dumps(
+        obj if worker_reorder is None else worker_reorder(obj),
+        option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE,
+    )
+    if out == data:
+        return True
+    if not check:
+        with open(fn, "wb") as f:
+            f.write(out)
+    return False
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "files", nargs="*", help="files to format; every series file if none are given"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="write nothing, and exit 1 listing the files that aren't canonical",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes to format files with",
+    )
+    args = parser.parse_args()
+
     with open(os.path.join(os.path.dirname(__file__), "schema.json"), "rb") as f:
         schema = orjson.loads(f.read())
 
-    for fn in sys.argv[1:]:
-        with open(fn, "r+b") as f:
-            out = orjson.dumps(
-                reorder(orjson.loads(f.read()), schema),
-                option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE,
-            )
+    files = args.files or list(layout.scan().values())
 
-            f.seek(0)
-            f.truncate(0)
+    if args.jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(
+            args.jobs, initializer=init_worker, initargs=(schema,)
+        ) as executor:
+            canonical = list(
+                executor.map(
+                    format_file,
+                    files,
+                    itertools.repeat(args.check),
+                    chunksize=max(1, len(files) // (args.jobs * 4)),
+                )
+            )
+    else:
+        init_worker(schema)
+        canonical = [format_file(fn, args.check) for fn in files]
 
-            f.write(out)
+    if args.check:
+        not_canonical = [fn for fn, ok in zip(files, canonical) if not ok]
+        for fn in not_canonical:
+            print(f"{fn} is not canonically formatted", file=sys.stderr)
+        if not_canonical:
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+"""Venues of past events, so update_wizard can fill in a venue it has seen
+before without asking Google Maps, and a persistent cache of the Google
+Places responses it does ask for.
+
+venues = Gazetteer.from_catalog(series_catalog)
+for venue in venues.lookup("hyatt regency orlando"):
+    print(venue.venue, venue.address, venue.lat_lng)
+
+gmaps = CachedPlaces(googlemaps.Client(key=...))
+
+Names match after normalization (case, width, punctuation and "&" are
+ignored), and then fuzzily. A venue's translated names match too.
+"""
+
+import difflib
+import json
+import os
+import sqlite3
+import unicodedata
+
+
+PLACES_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".cache", "places.sqlite")
+
+
+def normalize(name):
+    name = unicodedata.normalize("NFKC", name).casefold().replace("&", " and ")
+    return " ".join("".join(c if c.isalnum() else " " for c in name).split())
+
+
+def venue_translations(translations):
+    """The venue and address of an event's translations, without the
+    event's own translated name."""
+    return {
+        lang: {k: v for k, v in t.items() if k in ("venue", "address")}
+        for lang, t in translations.items()
+        if "venue" in t or "address" in t
+    }
+
+
+class Venue:
+    __slots__ = ("venue", "address", "lat_lng", "locale", "translations")
+
+    def __init__(self, venue, address=None, lat_lng=None, locale=None, translations=None):
+        self.venue = venue
+        self.address = address
+        self.lat_lng = lat_lng
+        self.locale = locale
+        self.translations = translations or {}
+
+    @classmethod
+    def from_event(cls, event):
+        return cls(
+            event["venue"],
+            event.get("address"),
+            tuple(event["latLng"]) if "latLng" in event else None,
+            event["locale"],
+            venue_translations(event.get("translations", {})),
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            row["venue"],
+            row["address"],
+            (row["lat"], row["lng"]) if row["lat"] is not None else None,
+            row["locale"],
+            venue_translations(json.loads(row["translations"] or "{}")),
+        )
+
+    def names(self):
+        yield self.venue
+        for t in self.translations.values():
+            if "venue" in t:
+                yield t["venue"]
+
+
+class Gazetteer:
+    def __init__(self, venues):
+        self.by_name = {}
+        for venue in venues:
+            self.add(venue)
+
+    @classmethod
+    def from_catalog(cls, series_catalog):
+        return cls(Venue.from_row(row) for row in series_catalog.venues())
+
+    def add(self, venue):
+        for name in {normalize(name) for name in venue.names()}:
+            self.by_name.setdefault(name, []).append(venue)
+
+    def lookup(self, name, limit=5, cutoff=0.75):
+        """Known venues called name, then those with names like it, at most
+        limit of them."""
+        key = normalize(name)
+        # An exact match scores highest, so comes first.
+        names = difflib.get_close_matches(key, self.by_name, n=limit, cutoff=cutoff)
+        found = []
+        for name in names:
+            for venue in self.by_name[name]:
+                if venue not in found:
+                    found.append(venue)
+        return found[:limit]
+
+
+class CachedPlaces:
+    """The Google Places calls of a googlemaps.Client, answered from a
+    persistent cache when the same request was made before. Session tokens
+    don't count towards a request being the same."""
+
+    def __init__(self, gmaps, path=PLACES_CACHE_PATH):
+        self.gmaps = gmaps
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses"
+            " (request TEXT PRIMARY KEY, response TEXT NOT NULL)"
+        )
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def call(self, method, *args, **kwargs):
+        request = json.dumps(
+            [method, args, {k: v for k, v in kwargs.items() if k != "session_token"}],
+            sort_keys=True,
+        )
+        row = self.db.execute(
+            "SELECT response FROM responses WHERE request = ?", (request,)
+        ).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        response = getattr(self.gmaps, method)(*args, **kwargs)
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?)",
+                (request, json.dumps(response)),
+            )
+        return response
+
+    def places_autocomplete(self, *args, **kwargs):
+        return self.call("places_autocomplete", *args, **kwargs)
+
+    def place(self, *args, **kwargs):
+        return self.call("place", *args, **kwargs)
@@ -0,0 +1,87 @@
+"""iCalendar output.
+
+Every event is rendered once into a folded VEVENT block, and that block is
+then streamed into each calendar the event belongs to: the global calendar,
+its series' calendar and its region's calendar.
+"""
+
+ESCAPES = str.maketrans(
+    {
+        "\\": "\\\\",
+        "\n": r"\n",
+        ",": r"\,",
+        ";": r"\;",
+    }
+)
+
+
+def escape_ics(s):
+    return s.translate(ESCAPES)
+
+
+def foldline(line, limit=75):
+    """Fold a content line so no physical line exceeds limit octets, never
+    splitting a UTF-8 sequence. Continuation lines start with a space, which
+    counts towards their limit."""
+    if line.isascii():
+        # One octet per character, so the line can be sliced directly.
+        if len(line) <= limit:
+            return line
+        parts = [line[:limit]]
+        parts.extend(line[i : i + limit - 1] for i in range(limit, len(line), limit - 1))
+        return "\r\n ".join(parts)
+
+    parts = []
+    start = 0
+    n = 0
+    for i, c in enumerate(line):
+        o = ord(c)
+        m = 1 if o < 0x80 else 2 if o < 0x800 else 3 if o < 0x10000 else 4
+        if n + m > limit:
+            parts.append(line[start:i])
+            start = i
+            n = 1
+        n += m
+    parts.append(line[start:])
+    return "\r\n ".join(parts)
+
+
+def render_lines(lines):
+    return "".join(f"{foldline(line)}\r\n" for line in lines)
+
+
+def render_event(event, start_date, end_date, dtstamp):
+    """Render an event as a VEVENT block. start_date and end_date are
+    YYYYMMDD, with end_date exclusive, and dtstamp is YYYYMMDDTHHMMSSZ."""
+    location = event["venue"]
+    if "address" in event:
+        location += f", {event['address']}"
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{event['id']}",
+        f"SUMMARY:{escape_ics(event['name'])}",
+        f"DTSTART;VALUE=DATE:{start_date}",
+        f"DTEND;VALUE=DATE:{end_date}",
+        f"DTSTAMP:{dtstamp}",
+        f"URL:{escape_ics(event['url'])}",
+        f"LOCATION:{escape_ics(location)}",
+    ]
+    if "latLng" in event:
+        lat, lng = event["latLng"]
+        lines.append(f"GEO:{lat:.6f};{lng:.6f}")
+    lines.append("END:VEVENT")
+    return render_lines(lines)
+
+
+def render_calendar(name, vevents):
+    """Yield a calendar of pre-rendered VEVENT blocks, chunk by chunk."""
+    yield render_lines(
+        [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//cons.fyi//EN",
+            f"X-WR-CALNAME:{escape_ics(name)}",
+        ]
+    )
+    yield from vevents
+    yield render_lines(["END:VCALENDAR"])
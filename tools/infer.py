@@ -0,0 +1,257 @@
+"""Infer a convention's next dates and venue from its website.
+
+inferrer = Inferrer(claude, prefetcher.get, InferCache(), jobs=4)
+inferrer.queue(urls)            # infer these in the background
+print(inferrer.get(urls[0]))    # cached, in flight, or inferred now
+
+Pages are stripped down to their visible text and anything that looks like
+a date before they are sent, rather than sent as markup. Answers are
+cached by URL, model and the stripped page's hash, so a page that hasn't
+changed is never sent twice.
+"""
+
+import concurrent.futures
+import hashlib
+import html.parser
+import os
+import re
+import sqlite3
+import threading
+import prefetch
+
+
+INFER_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".cache", "infer.sqlite")
+
+MODEL = "claude-haiku-4-5"
+
+PROMPT = """Extract the following information from this web page, if present:
+
+- startDate: Convention start date (ISO YYYY-mm-dd format)
+- endDate: Convention end date (ISO YYYY-mm-dd format)
+- venue: Convention venue
+
+Output it as JSON with those field names, or null if not possible.
+---
+{page}"""
+
+# Past this many characters, only lines with dates on them, and their
+# neighbours, are kept.
+MAX_CHARS = 16000
+
+MONTHS = (
+    "jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?"
+    "|sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?"
+)
+
+DATE = re.compile(
+    rf"\b({MONTHS})\b"
+    r"|\b\d{4}-\d{1,2}-\d{1,2}\b"
+    r"|\b\d{1,2}[./]\d{1,2}[./]\d{2,4}\b"
+    r"|\d{4}\s*年|\d{1,2}\s*月\s*\d{1,2}\s*日",
+    re.IGNORECASE,
+)
+
+BLOCK_ELEMENTS = {
+    "address",
+    "article",
+    "aside",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dt",
+    "figcaption",
+    "footer",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "header",
+    "li",
+    "main",
+    "nav",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "td",
+    "th",
+    "title",
+    "tr",
+    "ul",
+}
+
+DESCRIPTION_METAS = {"description", "og:description", "og:title", "twitter:description"}
+
+
+class TextExtractor(html.parser.HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+        self.line = []
+        self.fragments = []
+        self.dropping = []
+        self.structured_data = None
+
+    def flush(self):
+        line = " ".join("".join(self.line).split())
+        if line and (not self.lines or self.lines[-1] != line):
+            self.lines.append(line)
+        self.line = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropping or prefetch.is_dropped(tag, attrs):
+            if tag not in prefetch.VOID_ELEMENTS:
+                self.dropping.append(tag)
+            return
+        attrs = dict(attrs)
+        if tag == "script":
+            self.structured_data = []
+        elif tag == "time" and attrs.get("datetime"):
+            self.fragments.append(attrs["datetime"])
+        elif tag == "meta" and attrs.get("content"):
+            name = (attrs.get("name") or attrs.get("property") or "").lower()
+            if name in DESCRIPTION_METAS or DATE.search(attrs["content"]):
+                self.fragments.append(attrs["content"])
+        if tag in BLOCK_ELEMENTS:
+            self.flush()
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            if tag in self.dropping:
+                while self.dropping.pop() != tag:
+                    pass
+            return
+        if tag == "script" and self.structured_data is not None:
+            self.fragments.append(" ".join("".join(self.structured_data).split()))
+            self.structured_data = None
+        if tag in BLOCK_ELEMENTS:
+            self.flush()
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        if self.structured_data is not None:
+            self.structured_data.append(data)
+        else:
+            self.line.append(data)
+
+
+def strip(content, max_chars=MAX_CHARS):
+    """A page's visible text, one block per line, followed by any dates,
+    descriptions and structured data found in its markup. Long pages are cut
+    down to the lines with dates on them, with a line either side."""
+    extractor = TextExtractor()
+    extractor.feed(content)
+    extractor.close()
+    extractor.flush()
+
+    lines = extractor.lines
+    if sum(len(line) + 1 for line in lines) > max_chars:
+        keep = set()
+        for i, line in enumerate(lines):
+            if DATE.search(line):
+                keep.update((i - 1, i, i + 1))
+        lines = [line for i, line in enumerate(lines) if i in keep]
+
+    text = "\n".join([*lines, *dict.fromkeys(extractor.fragments)])
+    return text[:max_chars]
+
+
+class InferCache:
+    """Inferred answers in SQLite, safe to share between threads."""
+
+    def __init__(self, path=INFER_CACHE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "url TEXT NOT NULL, model TEXT NOT NULL, sha256 TEXT NOT NULL, answer TEXT NOT NULL,"
+            " PRIMARY KEY (url, model, sha256))"
+        )
+        self.lock = threading.Lock()
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, url, model, digest):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT answer FROM answers WHERE url = ? AND model = ? AND sha256 = ?",
+                (url, model, digest),
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def put(self, url, model, digest, answer):
+        with self.lock, self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)", (url, model, digest, answer)
+            )
+
+
+class Inferrer:
+    """Infers from pages on a pool of at most `jobs` threads. fetch(url)
+    returns a page's content, and must be safe to call from any thread."""
+
+    def __init__(self, client, fetch, cache, jobs=4, model=MODEL):
+        self.client = client
+        self.fetch = fetch
+        self.cache = cache
+        self.model = model
+        self.executor = concurrent.futures.ThreadPoolExecutor(jobs)
+        self.futures = {}
+        self.lock = threading.Lock()
+
+    def infer(self, url):
+        page = strip(self.fetch(url))
+        digest = hashlib.sha256(page.encode()).hexdigest()
+        answer = self.cache.get(url, self.model, digest)
+        if answer is not None:
+            return answer
+        msg = self.client.messages.create(
+            max_tokens=1024,
+            messages=[{"role": "user", "content": PROMPT.format(page=page)}],
+            model=self.model,
+        )
+        answer = msg.content[0].text
+        self.cache.put(url, self.model, digest, answer)
+        return answer
+
+    def submit(self, url):
+        """A future for the answer for url, inferring it unless it is
+        already in flight."""
+        with self.lock:
+            future = self.futures.get(url)
+            # Failed or canceled inferences are tried again.
+            if future is None or future.cancelled() or (future.done() and future.exception()):
+                future = self.executor.submit(self.infer, url)
+                self.futures[url] = future
+            return future
+
+    def queue(self, urls):
+        """Start inferring from urls in the background, in order."""
+        for url in urls:
+            self.submit(url)
+
+    def get(self, url):
+        """The answer for url, waiting for it if need be."""
+        return self.submit(url).result()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
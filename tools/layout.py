@@ -0,0 +1,120 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+# ]
+# ///
+"""Where series files live.
+
+Series files are either flat, as <id>.json in the repo root, or sharded by
+the first character of their ID, as series/<c>/<id>.json, which keeps
+directories small as the catalog grows. Either way the series ID is the
+filename. Every tool accepts both layouts, even mixed, and finds series
+files with a single os.scandir walk.
+
+Move every series file into one layout, from the repo root:
+
+./tools/layout.py sharded
+./tools/layout.py flat
+"""
+
+import argparse
+import os
+
+
+SHARDED_DIR = "series"
+
+LAYOUTS = ["flat", "sharded"]
+
+
+def series_path(series_id, layout, root="."):
+    """The path of a series file in a layout."""
+    if layout == "sharded":
+        return os.path.normpath(
+            os.path.join(root, SHARDED_DIR, series_id[0], f"{series_id}.json")
+        )
+    return os.path.normpath(os.path.join(root, f"{series_id}.json"))
+
+
+def scan(root="."):
+    """Return {series_id: path} for every series file under root, in
+    either layout, ordered by filename as a flat listing would be.
+
+    Raises ValueError if a series is in both layouts."""
+    paths = {}
+
+    def add(entry):
+        series_id, ext = os.path.splitext(entry.name)
+        if ext != ".json" or not entry.is_file():
+            return
+        if series_id in paths:
+            raise ValueError(f"{series_id} is in both {paths[series_id]} and {entry.path}")
+        paths[series_id] = os.path.normpath(entry.path)
+
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name != SHARDED_DIR or not entry.is_dir():
+                add(entry)
+                continue
+            with os.scandir(entry.path) as shards:
+                for shard in shards:
+                    if not shard.is_dir():
+                        continue
+                    with os.scandir(shard.path) as files:
+                        for file in files:
+                            add(file)
+
+    return dict(sorted(paths.items(), key=lambda item: f"{item[0]}.json"))
+
+
+def detect(root="."):
+    """The layout new series files should go in: sharded once the sharded
+    directory exists, flat otherwise."""
+    if os.path.isdir(os.path.join(root, SHARDED_DIR)):
+        return "sharded"
+    return "flat"
+
+
+def path_for(series_id, root="."):
+    """The path of a series file, where it is if it exists, or where a new
+    one should go."""
+    path = series_path(series_id, "flat", root)
+    if os.path.exists(path):
+        return path
+    return series_path(series_id, detect(root), root)
+
+
+def migrate(layout, root="."):
+    """Move every series file under root into layout, returning the
+    (old, new) path of each file moved."""
+    moves = []
+    for series_id, path in scan(root).items():
+        new_path = series_path(series_id, layout, root)
+        if path == new_path:
+            continue
+        os.makedirs(os.path.dirname(new_path) or ".", exist_ok=True)
+        os.rename(path, new_path)
+        moves.append((path, new_path))
+
+    # Clear out shards, and the sharded directory itself, left empty.
+    sharded_dir = os.path.join(root, SHARDED_DIR)
+    if os.path.isdir(sharded_dir):
+        for shard in os.listdir(sharded_dir):
+            shard_dir = os.path.join(sharded_dir, shard)
+            if os.path.isdir(shard_dir) and not os.listdir(shard_dir):
+                os.rmdir(shard_dir)
+        if not os.listdir(sharded_dir):
+            os.rmdir(sharded_dir)
+    return moves
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("layout", choices=LAYOUTS)
+    args = parser.parse_args()
+    for path, new_path in migrate(args.layout):
+        print(f"{path} -> {new_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,36 +10,29 @@
 # ]
 # ///
 
-import json
-import jsonschema.validators
+import argparse
+import collections
+import concurrent.futures
+import hashlib
 import io
+import json
 import itertools
 import logging
 import pathlib
-import regex
+import shutil
 import sys
 import os
-import tzfpy
+import tempfile
+import catalog
+import chinese
+import columnar
+import eventpack
+import ics
+import layout
+import profiling
+import timezones
+import validation
 import whenever
-from langconv.converter import LanguageConverter
-from langconv.language import Language, get_data_file_path
-
-
-lc_hant = LanguageConverter.from_language(
-    Language.from_json_files(
-        "zh-hant",
-        [get_data_file_path("zh/hant.json")],
-        ["zh-hant", "zh-TW"],
-    )
-)
-
-lc_hans = LanguageConverter.from_language(
-    Language.from_json_files(
-        "zh-hans",
-        [get_data_file_path("zh/hans.json")],
-        ["zh-hans"],
-    )
-)
 
 
 logging.basicConfig(level=logging.INFO)
@@ -54,267 +47,1043 @@ class ErrorLogger:
         self.ok = False
 
 
-def escape_ics(s):
-    return s.translate(
-        str.maketrans(
-            {
-                "\\": "\\\\",
-                "\n": r"\n",
-                ",": r"\,",
-                ";": r"\;",
-            }
-        )
-    )
+class ErrorRecorder:
+    """Collects errors so they can be replayed into an ErrorLogger later.
 
+    Worker processes use this so that the parent logs every error in series
+    order, however the work was scheduled.
+    """
 
-def foldline(line, limit=75):
-    buf = io.StringIO()
-    n = 0
-    for c in line:
-        m = len(c.encode("utf-8"))
-        if n + m > limit:
-            buf.write("\r\n ")
-            n = 1
-        buf.write(c)
-        n += m
-    return buf.getvalue()
+    def __init__(self):
+        self.errors = []
 
+    def log(self, id, path, msg):
+        self.errors.append((id, path, msg))
 
-def main():
-    el = ErrorLogger()
 
-    now = whenever.Instant.now().to_tz("UTC")
+# Anything that changes how a series is materialized must be listed here, so
+# that editing it invalidates the build cache.
+TOOL_FILES = [
+    "materialize.py",
+    "materialize.py.lock",
+    "chinese.py",
+    "layout.py",
+    "timezones.py",
+    "validation.py",
+]
 
-    (_, output_dir) = sys.argv
-    output_dir = pathlib.Path(output_dir)
+# Caches that are safe to share between builds: the compiled validator,
+# timezone lookups and zh conversions. Each entry is keyed by whatever would make it stale.
+CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache")
 
-    with open(output_dir / "timestamp", "w") as f:
-        f.write(now.py_datetime().strftime("%Y-%m-%dT%H:%M:%S.%fZ"))
+# How many series to submit to each worker ahead of the one being written,
+# which bounds how many raw and materialized series are held at once.
+LOOKAHEAD = 8
+
+# The size of the chunks outputs are streamed in.
+CHUNK_SIZE = 1 << 20
 
-    with open(os.path.join(os.path.dirname(__file__), "schema.json")) as f:
-        schema = json.load(f)
+# Key dates rejected on the keydates bot's PRs, one file per rejection, and
+# the index compacted from them, relative to the data directory.
+REJECTIONS_DIR = os.path.join(".github", "keydates_rejections")
+REJECTIONS_INDEX = os.path.join(".github", "keydates_rejections.json")
 
-    series_path = output_dir / "series"
-    os.mkdir(series_path)
 
-    events_path = output_dir / "events"
-    os.mkdir(events_path)
+def hash_files(paths):
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(hashlib.sha256(f.read()).digest())
+    return h.hexdigest()
 
-    all_series = {}
-    events = {}
 
-    jsonschema.validators.Draft202012Validator.check_schema(schema)
-    validator = jsonschema.validators.Draft202012Validator(
-        schema, format_checker=jsonschema.validators.Draft202012Validator.FORMAT_CHECKER
+def load_rejections(path="."):
+    """The (event_id, category, kind, date) of every rejected key date in a
+    data directory, as a set, so that checking a key date against them takes
+    the same time however many there are. The rejection files are the source
+    of truth; the index is only read if there is no directory of them."""
+    rejections = []
+    try:
+        names = sorted(os.listdir(os.path.join(path, REJECTIONS_DIR)))
+    except FileNotFoundError:
+        try:
+            with open(os.path.join(path, REJECTIONS_INDEX)) as f:
+                rejections = json.load(f)
+        except FileNotFoundError:
+            pass
+    else:
+        for name in names:
+            if name.endswith(".json"):
+                with open(os.path.join(path, REJECTIONS_DIR, name)) as f:
+                    rejections.append(json.load(f))
+    return frozenset(
+        (rejection["event_id"], rejection["category"], rejection["kind"], rejection["date"])
+        for rejection in rejections
     )
 
-    for fn in sorted(os.listdir(".")):
-        series_id, ext = os.path.splitext(fn)
-        if ext != ".json":
-            continue
 
-        with open(fn) as f:
-            series = json.load(f)
+class BuildCache:
+    """Materialized series from previous builds, keyed by input hash.
 
-        has_errors = False
-        for error in validator.iter_errors(series):
-            el.log(series_id, error.json_path, error.message)
-            has_errors = True
-        if has_errors:
-            continue
+    The manifest records the hash of schema.json, of the tool itself and, for
+    every series file that materialized cleanly, of the file, its event IDs
+    and the rejected key dates of those events. An entry is only reused if
+    all of them still match, in which case the cached output files are
+    copied verbatim instead of being regenerated. So a new rejection only
+    rematerializes the series it applies to.
+    """
 
-        for event, previous_event in itertools.zip_longest(
-            series["events"], series["events"][1:], fillvalue=None
-        ):
-            assert event is not None
-
-            # schema.json expresses this as formatMinimum/$data, an ajv
-            # extension python-jsonschema ignores, so enforce it here.
-            # Comparing parsed values rather than strings keeps this
-            # independent of which ISO date spellings the format checker
-            # happens to admit.
-            if whenever.Date.parse_iso(event["endDate"]) < whenever.Date.parse_iso(
-                event["startDate"]
-            ):
-                el.log(
-                    f"{series_id}/{event['id']}",
-                    "$.endDate",
-                    f"endDate {event['endDate']} is before startDate {event['startDate']}",
-                )
+    def __init__(self, path, schema_hash, tool_hash, rejections=frozenset()):
+        self.path = path
+        self.schema_hash = schema_hash
+        self.tool_hash = tool_hash
+        # event_id -> the rejections of its key dates.
+        self.rejections = collections.defaultdict(list)
+        for key in rejections:
+            self.rejections[key[0]].append(key)
+        self.entries = {}
+        self.new_entries = {}
 
-            event_locale_is_zh = event["locale"][:3] == "zh-"
-            tls = event.get("translations", {})
+        try:
+            with open(path / "manifest.json") as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
 
-            if event_locale_is_zh or "zh-Hans" in tls or "zh-Hant" in tls:
-                input_locale = {
-                    "zh-TW": "zh-Hant",
-                    "zh-HK": "zh-Hant",
-                    "zh-MO": "zh-Hant",
-                    "zh-CN": "zh-Hans",
-                }[event["locale"]]
+        if (
+            manifest.get("schema") == schema_hash
+            and manifest.get("tool") == tool_hash
+        ):
+            self.entries = manifest.get("series", {})
 
-                output_locale = {
-                    "zh-Hans": "zh-Hant",
-                    "zh-Hant": "zh-Hans",
-                }[input_locale]
+    def rejections_hash(self, event_ids):
+        """The hash of the rejections of key dates of event_ids."""
+        keys = sorted(key for event_id in event_ids for key in self.rejections.get(event_id, ()))
+        return hashlib.sha256(json.dumps(keys).encode("utf-8")).hexdigest()
 
-                lc = {
-                    "zh-Hans": lc_hans,
-                    "zh-Hant": lc_hant,
-                }[output_locale]
+    def has(self, series_id, digest):
+        entry = self.entries.get(series_id)
+        return (
+            isinstance(entry, dict)
+            and entry.get("sha256") == digest
+            and entry.get("rejections") == self.rejections_hash(entry.get("events", []))
+        )
 
-                input_tls = tls.get(input_locale, {})
+    def load(self, series_id, digest):
+        """Return a cached series, its output files and the key dates that
+        were suppressed from it, or None on a miss."""
+        if not self.has(series_id, digest):
+            return None
 
-                name = input_tls.get(
-                    "name", event["name"] if event_locale_is_zh else None
-                )
-                venue = input_tls.get(
-                    "venue", event["venue"] if event_locale_is_zh else None
-                )
-                address = input_tls.get(
-                    "address", event["address"] if event_locale_is_zh else None
-                )
+        entry_path = self.path / "series" / series_id
+        try:
+            with open(entry_path / "series.json", "rb") as f:
+                files = {f"series/{series_id}.json": f.read()}
+            series = json.loads(files[f"series/{series_id}.json"])
+            for event in series["events"]:
+                path = f"events/{event['id']}.json"
+                with open(entry_path / path, "rb") as f:
+                    files[path] = f.read()
+            suppressed = []
+            if os.path.exists(entry_path / "suppressed.json"):
+                with open(entry_path / "suppressed.json") as f:
+                    suppressed = [tuple(key) for key in json.load(f)]
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
 
-                output_tls = {
-                    **(
-                        {"name": name}
-                        if name is not None and regex.search(r"\p{sc=Han}", name)
-                        else {}
-                    ),
-                    **(
-                        {"venue": lc.convert(venue)}
-                        if venue is not None and regex.search(r"\p{sc=Han}", venue)
-                        else {}
-                    ),
-                    **(
-                        {"address": lc.convert(address)}
-                        if address is not None and regex.search(r"\p{sc=Han}", address)
-                        else {}
-                    ),
-                }
-
-                if output_tls:
-                    event.setdefault("translations", {})[output_locale] = output_tls
-
-            event_id = event["id"]
-            if "latLng" in event:
-                (lat, lng) = event["latLng"]
-                event["timezone"] = tzfpy.get_tz(lng, lat)
-            event["seriesId"] = series_id
-            if "bluesky" in series:
-                event["bluesky"] = series["bluesky"]
-
-            if previous_event is not None and "attendance" in previous_event:
-                event["previousAttendance"] = previous_event["attendance"]
-
-            if event_id in events:
-                el.log(
-                    f"{series_id}/{event_id}",
-                    "$.id",
-                    f"not unique across all series, last seen in {events[event_id]['seriesId']}",
-                )
-            events[event_id] = event
+        self.new_entries[series_id] = self.entries[series_id]
+        return series, files, suppressed
 
-            with open(events_path / f"{event_id}.json", "w") as f:
-                json.dump(event, f, indent=2, ensure_ascii=False)
+    def store(self, series_id, digest, files, suppressed=()):
+        entry_path = self.path / "series" / series_id
+        shutil.rmtree(entry_path, ignore_errors=True)
+        os.makedirs(entry_path / "events")
+        for path, contents in files.items():
+            if path.startswith("series/"):
+                path = "series.json"
+            with open(entry_path / path, "wb") as f:
+                f.write(contents)
+        if suppressed:
+            with open(entry_path / "suppressed.json", "w") as f:
+                json.dump(suppressed, f)
+        event_ids = [
+            path[len("events/") : -len(".json")] for path in files if path.startswith("events/")
+        ]
+        self.new_entries[series_id] = {
+            "sha256": digest,
+            "events": event_ids,
+            "rejections": self.rejections_hash(event_ids),
+        }
 
-        with open(series_path / fn, "w") as f:
-            json.dump(series, f, indent=2, ensure_ascii=False)
-        all_series[series_id] = series
+    def save(self):
+        # Drop entries for series that failed or no longer exist.
+        try:
+            stale = set(os.listdir(self.path / "series")) - set(self.new_entries)
+        except FileNotFoundError:
+            stale = set()
+        for series_id in stale:
+            shutil.rmtree(self.path / "series" / series_id)
 
-    if not el.ok:
-        sys.exit(1)
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.path / "manifest.json", "w") as f:
+            json.dump(
+                {
+                    "schema": self.schema_hash,
+                    "tool": self.tool_hash,
+                    "series": dict(sorted(self.new_entries.items())),
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
 
-    with open(output_dir / "series.json", "w") as f:
-        json.dump(sorted(list(all_series.keys())), f, ensure_ascii=False)
 
-    with open(output_dir / "events.json", "w") as f:
-        json.dump(list(events), f, ensure_ascii=False)
+class EventRecord:
+    """Everything the global outputs sort and filter a materialized event by,
+    parsed once when the event is loaded. The event itself stays in the
+    event pack, at offset."""
 
-    now = whenever.Instant.now()
+    __slots__ = (
+        "id",
+        "series_id",
+        "start",
+        "end",
+        "current_until",
+        "canceled",
+        "sort_key",
+        "region",
+        "offset",
+        "length",
+    )
 
-    def pred(event):
-        end_time = (
-            whenever.Date.parse_iso(event["endDate"])
-            .add(days=1)
+    def __init__(self, event, offset, length):
+        self.id = event["id"]
+        self.series_id = event["seriesId"]
+        self.offset = offset
+        self.length = length
+        # The region subtag of the locale, e.g. US for en-US.
+        self.region = event["locale"].rpartition("-")[2]
+        self.start = whenever.Date.parse_iso(event["startDate"])
+        self.end = whenever.Date.parse_iso(event["endDate"])
+        # Events stay current until a week after noon the day after they end,
+        # in their own timezone.
+        self.current_until = (
+            self.end.add(days=1)
             .at(whenever.Time(12, 0))
             .assume_tz(event.get("timezone", "UTC"))
+            .add(days=7)
+            .to_instant()
         )
-        return now < end_time.add(days=7) and not event.get("canceled", False)
-
-    current = sorted(
-        (event for event in events.values() if pred(event)),
-        key=lambda event: (
-            whenever.Date.parse_iso(event["startDate"]),
-            whenever.Date.parse_iso(event["endDate"]),
-            event["id"],
-        ),
-    )
+        self.canceled = event.get("canceled", False)
+        self.sort_key = (self.start, self.end, self.id)
+
+    def is_current(self, now):
+        return now < self.current_until and not self.canceled
+
+
+def validate_series(el, validator, series_id, series):
+    """Check a series against schema.json, returning False if it is invalid.
+
+    An event that ends before it starts doesn't make the series invalid: it
+    is logged against the event, and the series is still materialized.
+    """
+    errors = list(validator.iter_errors(series))
+    schema_errors = [error for error in errors if error.validator != "formatMinimum"]
+    for error in schema_errors:
+        el.log(series_id, error.json_path, error.message)
+    if schema_errors:
+        return False
+
+    for error in errors:
+        _, index, prop = error.absolute_path
+        el.log(f"{series_id}/{series['events'][index]['id']}", f"$.{prop}", error.message)
+    return True
+
+
+def drop_rejected_key_dates(event, rejections):
+    """Remove an event's rejected key dates, returning the (event_id,
+    category, kind, date) of each one removed."""
+    dropped = []
+    key_dates = event["keyDates"]
+    for category, kinds in list(key_dates.items()):
+        for kind, key_date in list(kinds.items()):
+            key = (event["id"], category, kind, key_date["date"])
+            if key in rejections:
+                del kinds[kind]
+                dropped.append(key)
+                if not kinds:
+                    del key_dates[category]
+    if dropped and not key_dates:
+        del event["keyDates"]
+    return dropped
+
+
+def materialize_series(
+    series_id, series, tz_resolver, zh_converter, profile=None, rejections=frozenset()
+):
+    """Materialize a schema-valid series in place, returning the key dates
+    that were dropped from it for having been rejected."""
+    if profile is None:
+        profile = profiling.Profile()
+
+    suppressed = []
+
+    # (translations, field, script, text) for every string to be converted,
+    # so the whole series goes through the converter in one batch.
+    conversions = []
+
+    for event, previous_event in itertools.zip_longest(
+        series["events"], series["events"][1:], fillvalue=None
+    ):
+        assert event is not None
+
+        event_locale_is_zh = event["locale"][:3] == "zh-"
+        tls = event.get("translations", {})
+
+        if event_locale_is_zh or "zh-Hans" in tls or "zh-Hant" in tls:
+            input_locale = {
+                "zh-TW": "zh-Hant",
+                "zh-HK": "zh-Hant",
+                "zh-MO": "zh-Hant",
+                "zh-CN": "zh-Hans",
+            }[event["locale"]]
+
+            output_locale = {
+                "zh-Hans": "zh-Hant",
+                "zh-Hant": "zh-Hans",
+            }[input_locale]
+
+            input_tls = tls.get(input_locale, {})
+
+            name = input_tls.get("name", event["name"] if event_locale_is_zh else None)
+            venue = input_tls.get(
+                "venue", event["venue"] if event_locale_is_zh else None
+            )
+            address = input_tls.get(
+                "address", event["address"] if event_locale_is_zh else None
+            )
+
+            output_tls = {}
+            if name is not None and chinese.has_han(name):
+                output_tls["name"] = name
+            for field, text in [("venue", venue), ("address", address)]:
+                if text is not None and chinese.has_han(text):
+                    # Filled in once the batch is converted below.
+                    output_tls[field] = None
+                    conversions.append((output_tls, field, output_locale, text))
+
+            if output_tls:
+                event.setdefault("translations", {})[output_locale] = output_tls
+
+        if "latLng" in event:
+            (lat, lng) = event["latLng"]
+            with profile.stage("tz lookup"):
+                event["timezone"] = tz_resolver.resolve(lat, lng)
+        event["seriesId"] = series_id
+        if "bluesky" in series:
+            event["bluesky"] = series["bluesky"]
+
+        if previous_event is not None and "attendance" in previous_event:
+            event["previousAttendance"] = previous_event["attendance"]
+
+        if rejections and "keyDates" in event:
+            suppressed.extend(drop_rejected_key_dates(event, rejections))
+
+    if conversions:
+        with profile.stage("zh conversion"):
+            converted = zh_converter.convert_all(
+                [(script, text) for _, _, script, text in conversions]
+            )
+        for (output_tls, field, _, _), text in zip(conversions, converted):
+            output_tls[field] = text
+
+    return suppressed
+
+
+def diff_records(previous, hashes, timestamp):
+    """Compare record hashes against the files of a previous manifest.json,
+    yielding a change for each series and event added, modified or removed."""
+    for type, directory in [("series", "series/"), ("event", "events/")]:
+
+        def records(files):
+            return {
+                path[len(directory) : -len(".json")]: entry
+                for path, entry in files.items()
+                if path.startswith(directory)
+                and path.endswith(".json")
+                and "/" not in path[len(directory) :]
+            }
+
+        before = {id: entry["sha256"] for id, entry in records(previous).items()}
+        after = records(hashes)
+        for id in sorted(before.keys() | after.keys()):
+            if id not in after:
+                change = "removed"
+            elif id not in before:
+                change = "added"
+            elif before[id] != after[id]:
+                change = "modified"
+            else:
+                continue
+            record = {"timestamp": timestamp, "change": change, "type": type, "id": id}
+            if id in after:
+                record["sha256"] = after[id]
+            yield record
+
+
+# Set once per process by init_worker, so the schema is only compiled once
+# per worker rather than once per series.
+worker_validator = None
+worker_tz_resolver = None
+worker_zh_converter = None
+worker_rejections = frozenset()
+worker_profile = None
+
+
+def init_worker(schema, cache_dir, tz_resolver, zh_converter, rejections, profile):
+    global worker_validator, worker_tz_resolver, worker_zh_converter, worker_rejections
+    global worker_profile
+    worker_profile = profile
+    worker_profile.start()
+    with worker_profile.stage("schema"):
+        worker_validator = validation.Validator(schema, cache_dir)
+    worker_tz_resolver = tz_resolver
+    worker_zh_converter = zh_converter
+    worker_rejections = rejections
+
+
+def process_series(series_id, raw):
+    """Validate, materialize and render one series file.
+
+    Returns (series, errors, files, suppressed, lookups, timings), where
+    series is None if the file failed schema validation, files maps output
+    paths, relative to the output directory, to their contents, suppressed
+    lists the rejected key dates left out of them, lookups holds what this
+    series added to the timezone and zh caches and timings is what it added
+    to the profile. Nothing is written here: the caller writes files in
+    series order so the output doesn't depend on scheduling.
+    """
+    profile = worker_profile
+    er = ErrorRecorder()
+    with profile.time_series(series_id):
+        with profile.stage("parse"):
+            series = json.loads(raw)
+        with profile.stage("validate"):
+            valid = validate_series(er, worker_validator, series_id, series)
+        if valid:
+            suppressed = materialize_series(
+                series_id,
+                series,
+                worker_tz_resolver,
+                worker_zh_converter,
+                profile,
+                worker_rejections,
+            )
+
+            with profile.stage("render"):
+                files = {}
+                for event in series["events"]:
+                    files[f"events/{event['id']}.json"] = json.dumps(
+                        event, indent=2, ensure_ascii=False
+                    ).encode("utf-8")
+                files[f"series/{series_id}.json"] = json.dumps(
+                    series, indent=2, ensure_ascii=False
+                ).encode("utf-8")
+
+    if not valid:
+        return None, er.errors, {}, [], None, profile.drain()
+    lookups = {
+        "timezones": worker_tz_resolver.drain(),
+        "zh": worker_zh_converter.drain(),
+    }
+    return series, er.errors, files, suppressed, lookups, profile.drain()
+
+
+def read_series_dir(path="."):
+    """Yield (series_id, raw) for each series file in a directory, in either
+    layout, in filename order."""
+    for series_id, fn in layout.scan(path).items():
+        with open(fn, "rb") as f:
+            yield series_id, f.read()
+
+
+def read_series_dicts(series):
+    """Yield (series_id, raw) for series dicts keyed by series ID, in ID
+    order, as read_series_dir would for the same series written to files."""
+    for series_id in sorted(series):
+        yield series_id, json.dumps(series[series_id], ensure_ascii=False).encode("utf-8")
+
+
+class Materializer:
+    """Validates and materializes series into the files of the data site,
+    without touching the filesystem beyond the caches.
+
+    el = ErrorRecorder()
+    materializer = Materializer(el)
+    files = dict(materializer.series_outputs(read_series_dir()))
+    if not el.errors:
+        files.update(materializer.global_outputs())
+
+    Outputs are yielded as (path, contents) pairs, with paths relative to the
+    output directory, for write_outputs or the caller to do with as they
+    like. series_outputs must be exhausted before global_outputs, which
+    builds on every series it saw.
+
+    Key dates in rejections, a set of (event_id, category, kind, date) that
+    defaults to load_rejections(), are left out of the outputs, and listed
+    in suppressed instead.
+
+    The compiled validator, and the timezone and zh caches unless they are
+    passed in, are kept in cache_dir, which defaults to tools/.cache.
+
+    Only what the global outputs sort and filter by is kept for each event,
+    with the events themselves in the event pack, so memory grows with the
+    number of series and events rather than their size. With stream, the
+    pack and the rendered calendar entries are spooled to temporary files
+    rather than held in memory, and outputs that grow with the data are
+    yielded as iterables of byte chunks, each of which must be consumed
+    before moving on to the next output.
+    """
+
+    def __init__(
+        self,
+        el,
+        *,
+        schema=None,
+        jobs=1,
+        cache=None,
+        tz_resolver=None,
+        zh_converter=None,
+        rejections=None,
+        cache_dir=CACHE_DIR,
+        profile=None,
+        stream=False,
+    ):
+        self.el = el
+        self.cache_dir = cache_dir
+        self.jobs = jobs
+        self.cache = cache
+        self.profile = profile if profile is not None else profiling.Profile()
+        self.stream = stream
+
+        if schema is None:
+            with self.profile.stage("schema"):
+                with open(os.path.join(os.path.dirname(__file__), "schema.json")) as f:
+                    schema = json.load(f)
+        self.schema = schema
+
+        if tz_resolver is None:
+            tz_resolver = timezones.TimezoneResolver(os.path.join(cache_dir, "timezones.json"))
+        self.tz_resolver = tz_resolver
+        if zh_converter is None:
+            zh_converter = chinese.ChineseConverter(os.path.join(cache_dir, "zh.json"))
+        self.zh_converter = zh_converter
+        if rejections is None:
+            rejections = load_rejections()
+        self.rejections = rejections
+
+        # (event_id, category, kind, date) of each rejected key date left out.
+        self.suppressed = []
+        # series_id -> name, for the series calendars.
+        self.series_names = {}
+        # event_id -> EventRecord.
+        self.events = {}
+        # The newest event of each series.
+        self.last = []
+        # The sha256 of each series and event file, keyed by path.
+        self.hashes = {}
+        self.pack = eventpack.Writer(self.spool())
+
+    def spool(self):
+        """A scratch file for output that grows with the data."""
+        return tempfile.TemporaryFile() if self.stream else io.BytesIO()
+
+    def output(self, chunks):
+        """Output contents from byte chunks: the chunks themselves when
+        streaming, or else joined."""
+        return chunks if self.stream else b"".join(chunks)
 
-    with open(output_dir / "calendar.ics", "w") as f:
-
-        def write_line(line):
-            f.write(foldline(line))
-            f.write("\r\n")
-
-        write_line("BEGIN:VCALENDAR")
-        write_line("VERSION:2.0")
-        write_line("PRODID:-//cons.fyi//EN")
-        write_line("X-WR-CALNAME:cons.fyi")
-        for event in current:
-            start_date = (
-                whenever.Date.parse_iso(event["startDate"])
-                .py_date()
-                .strftime("%Y%m%d")
+    def read_event(self, record):
+        return json.loads(read_span(self.pack.f, record.offset, record.length))
+
+    def series_outputs(self, sources):
+        """Validate and materialize series from sources, an iterable of
+        (series_id, raw) such as read_series_dir yields, yielding each
+        series and event file in series order. Errors go to the error
+        logger; series that fail schema validation are skipped."""
+        profile = self.profile
+        cache = self.cache
+
+        init_worker(
+            self.schema,
+            self.cache_dir,
+            self.tz_resolver,
+            self.zh_converter,
+            self.rejections,
+            profile,
+        )
+        executor = None
+        window = 1
+        if self.jobs > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(
+                self.jobs,
+                initializer=init_worker,
+                initargs=(
+                    self.schema,
+                    self.cache_dir,
+                    self.tz_resolver,
+                    self.zh_converter,
+                    self.rejections,
+                    profiling.Profile(profile.enabled, profile.trace_memory),
+                ),
             )
-            end_date = (
-                whenever.Date.parse_iso(event["endDate"])
-                .add(days=1)
-                .py_date()
-                .strftime("%Y%m%d")
+            window = self.jobs * LOOKAHEAD
+
+        # Series that aren't cached are submitted ahead, then results are
+        # consumed in order below, exactly as a sequential run would.
+        pending = collections.deque()
+        sources = iter(sources)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                with profile.stage("load"):
+                    source = next(sources, None)
+                if source is None:
+                    exhausted = True
+                    break
+                series_id, raw = source
+
+                digest = None
+                future = None
+                if cache is not None:
+                    with profile.stage("cache"):
+                        digest = hashlib.sha256(raw).hexdigest()
+                if executor is not None and (
+                    cache is None or not cache.has(series_id, digest)
+                ):
+                    future = executor.submit(process_series, series_id, raw)
+                pending.append((series_id, raw, digest, future))
+
+            if not pending:
+                break
+            series_id, raw, digest, future = pending.popleft()
+
+            cached = None
+            if cache is not None:
+                with profile.time_series(series_id, cached=True), profile.stage("cache"):
+                    cached = cache.load(series_id, digest)
+
+            if cached is not None:
+                series, files, suppressed = cached
+            else:
+                if future is not None:
+                    series, errors, files, suppressed, lookups, timings = future.result()
+                else:
+                    series, errors, files, suppressed, lookups, timings = process_series(
+                        series_id, raw
+                    )
+                profile.merge(timings)
+
+                for error in errors:
+                    self.el.log(*error)
+                if series is None:
+                    continue
+
+                # Workers look things up against their own copy of the
+                # caches, so fold what they found back into ours.
+                self.tz_resolver.merge(lookups["timezones"])
+                self.zh_converter.merge(lookups["zh"])
+
+                # Never cache a series with errors, so they are reported
+                # again on the next build.
+                if cache is not None and not errors:
+                    with profile.stage("cache"):
+                        cache.store(series_id, digest, files, suppressed)
+
+            for event_id, category, kind, date in suppressed:
+                logging.info(
+                    "%s/%s:$.keyDates.%s.%s:left out rejected date %s",
+                    series_id,
+                    event_id,
+                    category,
+                    kind,
+                    date,
+                )
+            self.suppressed.extend(suppressed)
+
+            for path, contents in files.items():
+                self.hashes[path] = hashlib.sha256(contents).hexdigest()
+                yield path, contents
+
+            with profile.stage("index"):
+                for i, event in enumerate(series["events"]):
+                    event_id = event["id"]
+                    if event_id in self.events:
+                        self.el.log(
+                            f"{series_id}/{event_id}",
+                            "$.id",
+                            f"not unique across all series, last seen in {self.events[event_id].series_id}",
+                        )
+                    record = EventRecord(event, *self.pack.add(event))
+                    self.events[event_id] = record
+                    if i == 0:
+                        self.last.append(record)
+
+            self.series_names[series_id] = series["name"]
+
+        if executor is not None:
+            executor.shutdown()
+
+        with profile.stage("save caches"):
+            if cache is not None:
+                cache.save()
+            self.tz_resolver.save()
+            self.zh_converter.save()
+        self.tz_resolver.log_stats()
+        self.zh_converter.log_stats()
+        logging.info("%d rejected key dates left out", len(self.suppressed))
+
+    def global_outputs(self, now=None, timestamp=None, previous=None):
+        """Yield the files built from every series: the indexes, the event
+        pack, the calendars and the JSONL and columnar listings.
+
+        now decides which events are current, and defaults to the present.
+        With previous, the files of a previous build's manifest.json, also
+        yield changes.jsonl, stamped with timestamp.
+        """
+        profile = self.profile
+        events = self.events
+        if now is None:
+            now = whenever.Instant.now()
+        if timestamp is None:
+            timestamp = now.py_datetime().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+        # Stages never nest, so outputs are only yielded once theirs is over,
+        # as the caller times writing them.
+        with profile.stage("indexes"):
+            series_index = json.dumps(sorted(self.series_names), ensure_ascii=False).encode(
+                "utf-8"
+            )
+            events_index = json.dumps(list(events), ensure_ascii=False).encode("utf-8")
+        yield "series.json", series_index
+        yield "events.json", events_index
+
+        with profile.stage("events.pack"):
+            idx = self.pack.dumps_idx()
+        yield "events.pack", self.output(read_chunks(self.pack.f))
+        yield "events.idx", idx
+
+        if previous is not None:
+            with profile.stage("changes"):
+                changes = "".join(
+                    json.dumps(change, ensure_ascii=False) + "\n"
+                    for change in diff_records(previous, self.hashes, timestamp)
+                ).encode("utf-8")
+            yield "changes.jsonl", changes
+
+        with profile.stage("sort"):
+            current = sorted(
+                (record for record in events.values() if record.is_current(now)),
+                key=lambda record: record.sort_key,
             )
+            self.last.sort(key=lambda record: record.sort_key)
+
+        with profile.stage("ics"):
+            # Each current event is rendered once, into a spool that every
+            # calendar it appears in is read back from.
             dtstamp = now.py_datetime().strftime("%Y%m%dT%H%M%SZ")
-            location = event["venue"]
-            if "address" in event:
-                location += f", {event['address']}"
-            write_line("BEGIN:VEVENT")
-            write_line(f"UID:{event['id']}")
-            write_line(f"SUMMARY:{escape_ics(event['name'])}")
-            write_line(f"DTSTART;VALUE=DATE:{start_date}")
-            write_line(f"DTEND;VALUE=DATE:{end_date}")
-            write_line(f"DTSTAMP:{dtstamp}")
-            write_line(f"URL:{escape_ics(event['url'])}")
-            write_line(f"LOCATION:{escape_ics(location)}")
-            if "latLng" in event:
-                lat, lng = event["latLng"]
-                write_line(f"GEO:{lat:.6f};{lng:.6f}")
-            write_line("END:VEVENT")
-        write_line("END:VCALENDAR")
-
-    with open(output_dir / "current.jsonl", "w") as f:
-        for event in current:
-            json.dump(event, f, ensure_ascii=False)
-            f.write("\n")
+            vevents = self.spool()
+            spans = []
+            offset = 0
+            for record in current:
+                vevent = ics.render_event(
+                    self.read_event(record),
+                    record.start.py_date().strftime("%Y%m%d"),
+                    record.end.add(days=1).py_date().strftime("%Y%m%d"),
+                    dtstamp,
+                ).encode("utf-8")
+                vevents.write(vevent)
+                spans.append((offset, len(vevent)))
+                offset += len(vevent)
+
+            # Every series and region gets a calendar, even with nothing
+            # current in it, so subscriptions keep working between events.
+            series_spans = {series_id: [] for series_id in sorted(self.series_names)}
+            region_spans = {
+                region: [] for region in sorted({record.region for record in events.values()})
+            }
+            for record, span in zip(current, spans):
+                series_spans[record.series_id].append(span)
+                region_spans[record.region].append(span)
 
-    last = sorted(
-        (
-            event
-            for event in (
-                next(iter(series["events"]), None) for _, series in all_series.items()
+            calendars = [("calendar.ics", "cons.fyi", spans)]
+            calendars.extend(
+                (
+                    f"series/{series_id}.ics",
+                    f"cons.fyi: {self.series_names[series_id]}",
+                    series_events,
+                )
+                for series_id, series_events in series_spans.items()
+            )
+            calendars.extend(
+                (f"regions/{region}.ics", f"cons.fyi: {region}", region_events)
+                for region, region_events in region_spans.items()
             )
-            if event is not None
-        ),
-        key=lambda event: (
-            whenever.Date.parse_iso(event["startDate"]),
-            whenever.Date.parse_iso(event["endDate"]),
-            event["id"],
-        ),
+
+        def calendar(name, spans):
+            for chunk in ics.render_calendar(
+                name, (read_span(vevents, *span).decode("utf-8") for span in spans)
+            ):
+                yield chunk.encode("utf-8")
+
+        for path, name, calendar_spans in calendars:
+            with profile.stage("ics"):
+                contents = self.output(calendar(name, calendar_spans))
+            yield path, contents
+        vevents.close()
+
+        def jsonl(records):
+            for record in records:
+                yield (json.dumps(self.read_event(record), ensure_ascii=False) + "\n").encode(
+                    "utf-8"
+                )
+
+        with profile.stage("jsonl"):
+            current_jsonl = self.output(jsonl(current))
+        yield "current.jsonl", current_jsonl
+        with profile.stage("jsonl"):
+            last_jsonl = self.output(jsonl(self.last))
+        yield "last.jsonl", last_jsonl
+
+        with profile.stage("columns"):
+            current_columns = columnar.dumps(PackedEvents(self, current))
+            last_columns = columnar.dumps(PackedEvents(self, self.last))
+        yield "current.columns", current_columns
+        yield "last.columns", last_columns
+
+
+class PackedEvents:
+    """Events in a Materializer's pack, decoded afresh on each iteration."""
+
+    def __init__(self, materializer, records):
+        self.materializer = materializer
+        self.records = records
+
+    def __iter__(self):
+        return (self.materializer.read_event(record) for record in self.records)
+
+
+def read_span(f, offset, length):
+    f.seek(offset)
+    return f.read(length)
+
+
+def read_chunks(f):
+    f.seek(0)
+    while chunk := f.read(CHUNK_SIZE):
+        yield chunk
+
+
+def validate_changed(
+    paths,
+    el,
+    jobs=1,
+    registry_path=catalog.CATALOG_PATH,
+    root=".",
+    cache_dir=CACHE_DIR,
+    profile=None,
+):
+    """Validate just the series files at paths, as a full build would, but
+    check their event IDs against the catalog of every other series under
+    root rather than by materializing them all. The catalog is brought up to
+    date first, which only reparses the series that changed since it was
+    last used. Errors go to the error logger, and nothing is written but the
+    catalog and the caches in cache_dir."""
+    if profile is None:
+        profile = profiling.Profile()
+
+    sources = []
+    for path in paths:
+        series_id, _ = os.path.splitext(os.path.basename(path))
+        with open(path, "rb") as f:
+            sources.append((series_id, f.read()))
+    sources.sort()
+
+    materializer = Materializer(
+        el, jobs=jobs, rejections=frozenset(), cache_dir=cache_dir, profile=profile
     )
+    for _ in materializer.series_outputs(sources):
+        pass
 
-    with open(output_dir / "last.jsonl", "w") as f:
-        for event in last:
-            json.dump(event, f, ensure_ascii=False)
-            f.write("\n")
+    # The changed series are checked against each other above, and their
+    # files may not parse, so the catalog keeps whatever it had for them.
+    changed = {series_id for series_id, _ in sources}
+    with profile.stage("registry"), catalog.Catalog(registry_path, root) as registry:
+        registry.refresh(skip=changed)
+        found = registry.series_of_events(materializer.events)
+    for event_id, series_ids in found.items():
+        others = [series_id for series_id in series_ids if series_id not in changed]
+        if others:
+            el.log(
+                f"{materializer.events[event_id].series_id}/{event_id}",
+                "$.id",
+                f"not unique across all series, also in {', '.join(others)}",
+            )
+
+
+def write_outputs(output_dir, outputs, profile=None):
+    """Write (path, contents) pairs under output_dir, creating directories
+    as needed. contents is bytes or, from a streaming Materializer, an
+    iterable of byte chunks."""
+    if profile is None:
+        profile = profiling.Profile()
+    made = set()
+    for path, contents in outputs:
+        with profile.stage("write"):
+            parent = os.path.dirname(path)
+            if parent not in made:
+                os.makedirs(os.path.join(output_dir, parent), exist_ok=True)
+                made.add(parent)
+            with open(os.path.join(output_dir, path), "wb") as f:
+                if isinstance(contents, bytes):
+                    f.write(contents)
+                else:
+                    f.writelines(contents)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "output_dir", nargs="?", type=pathlib.Path, help="required, unless with --changed"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=pathlib.Path,
+        help="reuse series materialized by a previous build from this directory",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes to materialize series with",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="write the time taken by each stage, and the slowest series, to build-stats.json",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="with --profile, also trace the peak memory of each stage, which is slower",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="with --profile, how many of the slowest series to list",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="spool events to temporary files rather than holding them in memory",
+    )
+    parser.add_argument(
+        "--previous-manifest",
+        type=pathlib.Path,
+        help="write changes.jsonl relative to the build this manifest.json came from",
+    )
+    parser.add_argument(
+        "--changed",
+        nargs="+",
+        metavar="FILE",
+        help="only validate these series files, checking event IDs against the catalog of the"
+        " rest, and write nothing",
+    )
+    parser.add_argument(
+        "--registry",
+        type=pathlib.Path,
+        default=catalog.CATALOG_PATH,
+        help="with --changed, the catalog to check event IDs against",
+    )
+    args = parser.parse_args()
+
+    if args.changed is not None and args.output_dir is not None:
+        parser.error("--changed writes nothing, so takes no output directory")
+    if args.changed is None and args.output_dir is None:
+        parser.error("the following arguments are required: output_dir")
+
+    profile = profiling.Profile(args.profile, args.profile_memory)
+    profile.start()
+
+    el = ErrorLogger()
+
+    if args.changed is not None:
+        validate_changed(args.changed, el, args.jobs, args.registry, profile=profile)
+        sys.exit(0 if el.ok else 1)
+
+    now = whenever.Instant.now().to_tz("UTC")
+
+    output_dir = args.output_dir
+
+    timestamp = now.py_datetime().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    with open(output_dir / "timestamp", "w") as f:
+        f.write(timestamp)
+
+    os.mkdir(output_dir / "series")
+    os.mkdir(output_dir / "events")
+
+    rejections = load_rejections()
+
+    cache = None
+    if args.cache_dir is not None:
+        tools_dir = os.path.dirname(__file__)
+        cache = BuildCache(
+            args.cache_dir,
+            hash_files([os.path.join(tools_dir, "schema.json")]),
+            hash_files([os.path.join(tools_dir, fn) for fn in TOOL_FILES]),
+            rejections,
+        )
+
+    materializer = Materializer(
+        el,
+        jobs=args.jobs,
+        cache=cache,
+        rejections=rejections,
+        profile=profile,
+        stream=args.stream,
+    )
+    write_outputs(output_dir, materializer.series_outputs(read_series_dir()), profile)
+
+    if not el.ok:
+        sys.exit(1)
+
+    previous = None
+    if args.previous_manifest is not None:
+        try:
+            with open(args.previous_manifest) as f:
+                previous = json.load(f)["files"]
+        except FileNotFoundError:
+            logging.warning("%s not found, so every record is added", args.previous_manifest)
+            previous = {}
+
+    write_outputs(
+        output_dir,
+        materializer.global_outputs(timestamp=timestamp, previous=previous),
+        profile,
+    )
+
+    if args.profile:
+        profile.write(
+            output_dir / "build-stats.json",
+            top=args.profile_top,
+            timestamp=timestamp,
+            jobs=args.jobs,
+            series=len(materializer.series_names),
+            events=len(materializer.events),
+            suppressed_key_dates=len(materializer.suppressed),
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+#   "brotli"
+# ]
+# ///
+"""Write .gz and .br sidecars for every file in a built site, plus a
+manifest.json of each file's SHA-256 and size, so consumers can tell what
+changed between deploys without downloading it. Run it last, once nothing
+else will write to the site:
+
+./tools/precompress.py --jobs "$(nproc)" out/
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import hashlib
+import json
+import os
+import pathlib
+import brotli
+
+
+SIDECARS = (".gz", ".br")
+MANIFEST = "manifest.json"
+
+
+def compress_file(path):
+    """Write sidecars for one file, returning its manifest entry."""
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # mtime=0 keeps the gzip header, and so the sidecar, reproducible.
+    with open(f"{path}.gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    with open(f"{path}.br", "wb") as f:
+        f.write(brotli.compress(data, quality=11))
+
+    return {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+
+
+def site_files(root):
+    """Every file under root other than sidecars and the manifest, as paths
+    relative to root."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            path = pathlib.Path(dirpath, fn)
+            if path.suffix in SIDECARS:
+                continue
+            rel = path.relative_to(root)
+            if rel.as_posix() == MANIFEST:
+                continue
+            yield rel
+
+
+def precompress(root, jobs=1):
+    """Compress every file under root and write its manifest, returning the
+    manifest's files. zlib and brotli release the GIL while compressing, so
+    threads are enough to compress files in parallel."""
+    with concurrent.futures.ThreadPoolExecutor(jobs) as executor:
+        paths = [rel.as_posix() for rel in site_files(root)]
+        files = dict(
+            zip(paths, executor.map(compress_file, [root / path for path in paths]))
+        )
+
+    with open(root / MANIFEST, "w") as f:
+        json.dump({"files": files}, f, indent=0)
+        f.write("\n")
+    compress_file(root / MANIFEST)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("site_dir", type=pathlib.Path)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of files to compress at once",
+    )
+    args = parser.parse_args()
+
+    precompress(args.site_dir, args.jobs)
+
+
+if __name__ == "__main__":
+    main()
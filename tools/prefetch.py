@@ -0,0 +1,242 @@
+"""Render series websites ahead of the reviewer, and cache them on disk.
+
+with prefetch.Prefetcher(prefetch.PageCache()) as prefetcher:
+    prefetcher.queue(urls[i : i + 8])   # render these in the background
+    content = prefetcher.get(urls[i])   # cached, in flight, or fetched now
+
+Pages are rendered with Playwright's async API on an event loop in a
+background thread, at most `pages` at once, and cleaned of scripts, styles
+and the like before they are cached. Cached pages are reused until they are
+older than the cache's TTL, across runs.
+"""
+
+import asyncio
+import concurrent.futures
+import datetime
+import hashlib
+import html
+import html.parser
+import json
+import os
+import tempfile
+import threading
+import time
+from playwright.async_api import async_playwright
+
+
+PAGE_CACHE_DIR = os.path.join(os.path.dirname(__file__), ".cache", "pages")
+
+PAGE_TTL = datetime.timedelta(days=1)
+
+# Elements whose contents say nothing about a convention's dates or venue.
+DROPPED_ELEMENTS = {"script", "style", "noscript", "template", "svg", "iframe"}
+
+# Scripts of this type hold schema.org data, often with an Event's dates,
+# so are kept.
+STRUCTURED_DATA_TYPE = "application/ld+json"
+
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "br",
+    "col",
+    "embed",
+    "hr",
+    "img",
+    "input",
+    "link",
+    "meta",
+    "source",
+    "track",
+    "wbr",
+}
+
+
+def is_dropped(tag, attrs):
+    return tag in DROPPED_ELEMENTS and not (
+        tag == "script" and dict(attrs).get("type") == STRUCTURED_DATA_TYPE
+    )
+
+
+class Cleaner(html.parser.HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.out = []
+        self.dropping = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.dropping or is_dropped(tag, attrs):
+            if tag not in VOID_ELEMENTS:
+                self.dropping.append(tag)
+            return
+        self.out.append(f"<{tag}")
+        for k, v in attrs:
+            self.out.append(f" {k}" if v is None else f' {k}="{html.escape(v)}"')
+        self.out.append(">")
+
+    def handle_startendtag(self, tag, attrs):
+        if not self.dropping and not is_dropped(tag, attrs):
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if self.dropping:
+            if tag in self.dropping:
+                while self.dropping.pop() != tag:
+                    pass
+            return
+        # Any script still open here is structured data.
+        if (tag == "script" or tag not in DROPPED_ELEMENTS) and tag not in VOID_ELEMENTS:
+            self.out.append(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(data)
+
+    def handle_entityref(self, name):
+        self.handle_data(f"&{name};")
+
+    def handle_charref(self, name):
+        self.handle_data(f"&#{name};")
+
+
+def clean(content):
+    """Strip a rendered page of comments and of elements that can't hold
+    anything worth reading, other than structured data, and collapse runs
+    of blank lines."""
+    cleaner = Cleaner()
+    cleaner.feed(content)
+    cleaner.close()
+    lines = (line.rstrip() for line in "".join(cleaner.out).splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class PageCache:
+    """Cleaned pages on disk, one file per URL."""
+
+    def __init__(self, path=PAGE_CACHE_DIR, ttl=PAGE_TTL):
+        self.path = path
+        self.ttl = ttl
+        os.makedirs(path, exist_ok=True)
+
+    def entry_path(self, url):
+        return os.path.join(self.path, f"{hashlib.sha256(url.encode()).hexdigest()}.json")
+
+    def get(self, url):
+        """The cached page for url, or None if there is none younger than
+        the TTL."""
+        try:
+            with open(self.entry_path(url)) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if entry["url"] != url or time.time() - entry["fetched"] > self.ttl.total_seconds():
+            return None
+        return entry["content"]
+
+    def put(self, url, content):
+        # Written to a temporary file and renamed into place, so readers on
+        # other threads never see half an entry.
+        fd, tmp = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"url": url, "fetched": time.time(), "content": content}, f)
+        os.replace(tmp, self.entry_path(url))
+
+
+class Prefetcher:
+    """Renders pages through a pool of at most `pages` browser pages, on an
+    event loop in a background thread."""
+
+    def __init__(self, cache, pages=4, timeout=datetime.timedelta(seconds=30)):
+        self.cache = cache
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        try:
+            self.run(self.start(pages))
+        except BaseException:
+            self.stop_loop()
+            raise
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def start(self, pages):
+        self.playwright = await async_playwright().start()
+        try:
+            self.browser = await self.playwright.chromium.launch()
+        except BaseException:
+            await self.playwright.stop()
+            raise
+        self.pool = asyncio.Queue()
+        for _ in range(pages):
+            self.pool.put_nowait(await self.browser.new_page())
+
+    async def render(self, url):
+        page = await self.pool.get()
+        try:
+            await page.goto(url, timeout=self.timeout.total_seconds() * 1000)
+            content = clean(await page.content())
+        finally:
+            self.pool.put_nowait(page)
+        self.cache.put(url, content)
+        return content
+
+    def fetch(self, url):
+        """A future for the cleaned page at url, rendering it unless it is
+        cached or already in flight."""
+        with self.lock:
+            future = self.in_flight.get(url)
+            if future is not None:
+                return future
+            future = concurrent.futures.Future()
+            content = self.cache.get(url)
+            if content is not None:
+                future.set_result(content)
+                return future
+            future = asyncio.run_coroutine_threadsafe(self.render(url), self.loop)
+            self.in_flight[url] = future
+
+        def done(future):
+            with self.lock:
+                # Failures aren't kept, so get() tries again.
+                if self.in_flight.get(url) is future:
+                    del self.in_flight[url]
+
+        future.add_done_callback(done)
+        return future
+
+    def queue(self, urls):
+        """Start rendering urls in the background, in order."""
+        for url in urls:
+            self.fetch(url)
+
+    def get(self, url):
+        """The cleaned page at url, waiting for it if need be."""
+        return self.fetch(url).result()
+
+    def close(self):
+        with self.lock:
+            for future in self.in_flight.values():
+                future.cancel()
+        try:
+            self.run(self.stop())
+        finally:
+            self.stop_loop()
+
+    async def stop(self):
+        await self.browser.close()
+        await self.playwright.stop()
+
+    def stop_loop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
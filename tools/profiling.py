@@ -0,0 +1,117 @@
+"""Per-stage timing for materialize.py --profile.
+
+A Profile accumulates wall time, CPU time and, with tracemalloc, peak
+traced memory for each named stage, plus the time taken by each series.
+Stages never nest, so the time in each is counted once. Worker processes
+profile into their own copy, which the parent merges, as it does for
+timezone lookups and zh conversions.
+"""
+
+import contextlib
+import json
+import resource
+import time
+import tracemalloc
+
+
+class Profile:
+    def __init__(self, enabled=False, trace_memory=False):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        # name -> {"calls", "wall", "cpu", "peak_memory"}
+        self.stages = {}
+        # series_id -> {"wall", "cpu", "cached"}
+        self.series = {}
+        self.start_wall = time.perf_counter()
+
+    def start(self):
+        """Start tracing memory, if asked to, in this process."""
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            peak_memory = tracemalloc.get_traced_memory()[1] if self.trace_memory else None
+            self.add_stage(name, 1, wall, cpu, peak_memory)
+
+    def add_stage(self, name, calls, wall, cpu, peak_memory):
+        stats = self.stages.setdefault(
+            name, {"calls": 0, "wall": 0.0, "cpu": 0.0, "peak_memory": None}
+        )
+        stats["calls"] += calls
+        stats["wall"] += wall
+        stats["cpu"] += cpu
+        if peak_memory is not None:
+            stats["peak_memory"] = max(stats["peak_memory"] or 0, peak_memory)
+
+    @contextlib.contextmanager
+    def time_series(self, series_id, cached=False):
+        if not self.enabled:
+            yield
+            return
+
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.series[series_id] = {
+                "wall": time.perf_counter() - wall,
+                "cpu": time.process_time() - cpu,
+                "cached": cached,
+            }
+
+    def drain(self):
+        """Return and reset the timings since the last drain, for merging
+        into the profile of another process."""
+        delta = {"stages": self.stages, "series": self.series}
+        self.stages = {}
+        self.series = {}
+        return delta
+
+    def merge(self, delta):
+        for name, stats in delta["stages"].items():
+            self.add_stage(name, **stats)
+        self.series.update(delta["series"])
+
+    def write(self, path, top=10, **extra):
+        """Write build-stats.json. Stages that ran in worker processes are
+        summed across workers, so they can add up to more than the total."""
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        slowest = sorted(self.series.items(), key=lambda item: item[1]["wall"], reverse=True)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    **extra,
+                    "total": {
+                        "wall": time.perf_counter() - self.start_wall,
+                        "cpu": usage.ru_utime
+                        + usage.ru_stime
+                        + children.ru_utime
+                        + children.ru_stime,
+                        # ru_maxrss is in KiB on Linux.
+                        "peak_rss": max(usage.ru_maxrss, children.ru_maxrss) * 1024,
+                    },
+                    "stages": self.stages,
+                    "slowest_series": [
+                        {"id": series_id, **stats} for series_id, stats in slowest[:top]
+                    ],
+                },
+                f,
+                indent=2,
+            )
+            f.write("\n")
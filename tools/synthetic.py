@@ -0,0 +1,171 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.13"
+# dependencies = [
+# ]
+# ///
+"""Generate a deterministic dataset of schema-valid Series files, for
+benchmarking the tools at scales beyond the real data. The defaults mirror
+the real data's shape:
+
+./tools/synthetic.py out/ --series 2270
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+
+
+# Roughly the shape of the real data.
+DEFAULTS = {
+    "series": 227,
+    "events_per_series": 2,
+    "zh_share": 0.06,
+    "key_dates": 0.2,
+    "latlng": 0.99,
+    "seed": 0,
+}
+
+LOCALES = ["en-US", "en-US", "en-US", "de-DE", "en-GB", "fr-FR", "en-CA", "ja-JP", "pl-PL"]
+ZH_LOCALES = ["zh-CN", "zh-TW", "zh-HK"]
+KEY_DATE_CATEGORIES = [
+    "registration",
+    "hotel",
+    "dealers",
+    "panels",
+    "performances",
+    "djs",
+    "volunteers",
+]
+SYLLABLES = ["fur", "con", "paw", "tail", "fox", "wolf", "mega", "anthro", "ber", "ia", "zoo"]
+HAN = "兽聚毛绒大会国际会议中心展览馆台北上海广州深圳市区路号楼层酒店广场新北香港九龙"
+STREETS = ["Main St", "Convention Blvd", "Market St", "Harbour Rd", "Station Ave"]
+
+
+def word(rng, n):
+    return "".join(rng.choice(SYLLABLES) for _ in range(n))
+
+
+def han(rng, n):
+    return "".join(rng.choice(HAN) for _ in range(n))
+
+
+def key_date(rng, date):
+    return {
+        "date": date.isoformat(),
+        "source": f"https://bsky.app/profile/{word(rng, 2)}.example/post/{rng.randrange(10**12)}",
+        "asOf": f"{(date - datetime.timedelta(days=30)).isoformat()}T00:00:00Z",
+        "confidence": round(rng.random(), 2),
+    }
+
+
+def make_series(rng, series_id, options):
+    name = word(rng, 2).capitalize()
+    zh = rng.random() < options["zh_share"]
+    locale = rng.choice(ZH_LOCALES if zh else LOCALES)
+    # Series mostly keep their venue, and the date they're held, year to year.
+    venue = han(rng, 6) if zh else f"{word(rng, 2).capitalize()} Convention Center"
+    address = han(rng, 12) if zh else f"{rng.randrange(1, 9999)} {rng.choice(STREETS)}"
+    lat_lng = [round(rng.uniform(-60, 70), 7), round(rng.uniform(-180, 180), 7)]
+    day_of_year = rng.randrange(1, 360)
+    length = rng.randrange(0, 5)
+    attendance = rng.randrange(50, 20000)
+
+    series = {"name": name}
+    if rng.random() < 0.2:
+        series["bluesky"] = {"did": f"did:plc:{series_id}", "handle": f"{series_id}.example"}
+
+    events = []
+    for i in range(options["events_per_series"]):
+        year = 2027 - i
+        start = datetime.date(year, 1, 1) + datetime.timedelta(days=day_of_year)
+        end = start + datetime.timedelta(days=length)
+        event = {
+            "id": f"{series_id}-{year}",
+            "name": f"{han(rng, 4) if zh and locale == 'zh-CN' else name} {year}",
+            "url": f"https://{series_id}.example/",
+            "startDate": start.isoformat(),
+            "endDate": end.isoformat(),
+            "venue": venue,
+            "address": address,
+            "locale": locale,
+        }
+        if zh and locale != "zh-CN":
+            event["translations"] = {"zh-Hant": {"name": f"{han(rng, 4)} {year}"}}
+        if rng.random() < options["latlng"]:
+            event["latLng"] = lat_lng
+        if i > 0:
+            event["attendance"] = attendance
+            attendance = max(1, attendance - rng.randrange(0, 500))
+        event["sources"] = ["synthetic"]
+        if rng.random() < options["key_dates"]:
+            event["keyDates"] = {
+                category: {
+                    "opens": key_date(rng, start - datetime.timedelta(days=rng.randrange(30, 200)))
+                }
+                for category in rng.sample(KEY_DATE_CATEGORIES, rng.randrange(1, 4))
+            }
+        events.append(event)
+    series["events"] = events
+    return series
+
+
+def generate(path, **options):
+    """Write options["series"] Series files to path, returning how many
+    events they hold. The same options always produce the same files."""
+    options = {**DEFAULTS, **options}
+    rng = random.Random(options["seed"])
+    os.makedirs(path, exist_ok=True)
+    n_events = 0
+    for i in range(options["series"]):
+        series_id = f"synthetic-{i:07d}"
+        series = make_series(rng, series_id, options)
+        n_events += len(series["events"])
+        with open(os.path.join(path, f"{series_id}.json"), "w") as f:
+            f.write(json.dumps(series, indent=2, ensure_ascii=False))
+            f.write("\n")
+    return n_events
+
+
+def add_arguments(parser):
+    parser.add_argument("--series", type=int, default=DEFAULTS["series"])
+    parser.add_argument(
+        "--events-per-series", type=int, default=DEFAULTS["events_per_series"]
+    )
+    parser.add_argument(
+        "--zh-share",
+        type=float,
+        default=DEFAULTS["zh_share"],
+        help="fraction of series with a zh locale",
+    )
+    parser.add_argument(
+        "--key-dates",
+        type=float,
+        default=DEFAULTS["key_dates"],
+        help="fraction of events with keyDates",
+    )
+    parser.add_argument(
+        "--latlng",
+        type=float,
+        default=DEFAULTS["latlng"],
+        help="fraction of events with latLng",
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+
+
+def options_from_args(args):
+    return {key: getattr(args, key) for key in DEFAULTS}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output_dir")
+    add_arguments(parser)
+    args = parser.parse_args()
+    generate(args.output_dir, **options_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
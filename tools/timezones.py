@@ -0,0 +1,131 @@
+"""Timezone lookup for venue coordinates.
+
+tzfpy has to load its timezone polygons before the first lookup, which costs
+more than every lookup after it combined, and most series reuse the same
+venue year after year. TimezoneResolver memoizes lookups by coordinate,
+persists them between builds and only imports tzfpy when it has to.
+"""
+
+import importlib
+import importlib.metadata
+import json
+import logging
+import os
+import time
+
+
+def data_version():
+    """Identify the timezone data without importing tzfpy."""
+    return " ".join(
+        f"{package}/{importlib.metadata.version(package)}"
+        for package in ["tzfpy", "tzdata"]
+    )
+
+
+class TimezoneResolver:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.version = data_version()
+        self.timezones = {}
+        self.learned = {}
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.get_tz = None
+        self.dirty = False
+
+        if cache_path is None:
+            return
+
+        try:
+            with open(cache_path) as f:
+                cache = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+
+        # Entries from older timezone data are dropped wholesale: boundaries
+        # move, and there is no telling which coordinates they moved under.
+        if cache.get("version") == self.version:
+            for key, timezone in cache.get("timezones", {}).items():
+                lat, _, lng = key.partition(",")
+                self.timezones[float(lat), float(lng)] = timezone
+
+    def __getstate__(self):
+        # Worker processes get a copy of the memo, but load tzfpy for
+        # themselves if they need it.
+        return {**self.__dict__, "get_tz": None}
+
+    def resolve(self, lat, lng):
+        key = (float(lat), float(lng))
+        timezone = self.timezones.get(key)
+        if timezone is not None:
+            self.hits += 1
+            return timezone
+
+        self.misses += 1
+        if self.get_tz is None:
+            start = time.perf_counter()
+            tzfpy = importlib.import_module("tzfpy")
+            # The polygons are loaded lazily, so time a lookup as well.
+            tzfpy.get_tz(0.0, 0.0)
+            self.get_tz = tzfpy.get_tz
+            self.load_time += time.perf_counter() - start
+
+        timezone = self.get_tz(lng, lat)
+        self.timezones[key] = self.learned[key] = timezone
+        self.dirty = True
+        return timezone
+
+    def drain(self):
+        """Return and reset the stats and lookups since the last drain, for
+        merging into the resolver of another process."""
+        delta = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "load_time": self.load_time,
+            "learned": self.learned,
+        }
+        self.hits = 0
+        self.misses = 0
+        self.load_time = 0.0
+        self.learned = {}
+        return delta
+
+    def merge(self, delta):
+        self.hits += delta["hits"]
+        self.misses += delta["misses"]
+        self.load_time += delta["load_time"]
+        for key, timezone in delta["learned"].items():
+            if self.timezones.get(key) != timezone:
+                self.timezones[key] = timezone
+                self.dirty = True
+
+    def log_stats(self):
+        logging.info(
+            "timezones: %d hits, %d misses, tzfpy loaded in %.3fs",
+            self.hits,
+            self.misses,
+            self.load_time,
+        )
+
+    def save(self):
+        if self.cache_path is None or not self.dirty:
+            return
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": self.version,
+                    "timezones": {
+                        f"{lat!r},{lng!r}": timezone
+                        for (lat, lng), timezone in sorted(self.timezones.items())
+                    },
+                },
+                f,
+                indent=0,
+            )
+        os.replace(tmp_path, self.cache_path)
+        self.dirty = False
+
@@ -13,10 +13,16 @@
 # ]
 # ///
 
+import argparse
+import catalog
+import gazetteer
+import infer
+import prefetch
 import termcolor
 import eviltransform
 import googlemaps
 import datetime
+import layout
 import os
 import math
 import json
@@ -27,7 +33,6 @@ import safer
 import unicodedata
 import webbrowser
 import typing
-from playwright.sync_api import sync_playwright
 import anthropic
 
 
@@ -41,7 +46,48 @@ def guess_language_for_region(region_code: str) -> icu.Locale:
     return icu.Locale.createFromName(f"und_{region_code}").addLikelySubtags()
 
 
-def prompt_for_venue(gmaps, venue):
+def prompt_for_known_venue(venues, venue):
+    """Offer the known venues like venue, returning the one chosen, or None
+    to search Google Maps instead."""
+    known = venues.lookup(venue)
+    if not known:
+        return None
+
+    while True:
+        for i, known_venue in enumerate(known):
+            termcolor.cprint(f"    {i + 1}) ", "magenta", end="")
+            termcolor.cprint(
+                ", ".join(
+                    part
+                    for part in [known_venue.venue, known_venue.address]
+                    if part is not None
+                )
+            )
+        termcolor.cprint(f"    s) ", "magenta", end="")
+        termcolor.cprint("(search Google Maps)")
+        termcolor.cprint(f"    #? ", "magenta", end="")
+        choice = input("").strip().lower()
+        if choice == "s":
+            return None
+        try:
+            choice = int(choice)
+        except ValueError:
+            continue
+        if 1 <= choice <= len(known):
+            return known[choice - 1]
+
+
+def prompt_for_venue(gmaps, venues, venue):
+    known_venue = prompt_for_known_venue(venues, venue)
+    if known_venue is not None:
+        return (
+            known_venue.venue,
+            known_venue.address,
+            icu.Locale.createFromName(known_venue.locale),
+            known_venue.translations,
+            known_venue.lat_lng,
+        )
+
     session_token = str(uuid.uuid4())
     predictions = gmaps.places_autocomplete(
         venue, session_token=session_token, language="en"
@@ -226,40 +272,79 @@ def prompt_for_change(label, v=None):
     return v
 
 
+def read_series(series_id):
+    with open(layout.path_for(series_id)) as f:
+        return json.load(f)
+
+
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--region", help="only review series in this region, e.g. US")
+    parser.add_argument("--locale", help="only review series in this locale, e.g. en-US")
+    parser.add_argument(
+        "--horizon",
+        type=int,
+        default=0,
+        metavar="DAYS",
+        help="also review series whose next event starts within this many days",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=8,
+        metavar="N",
+        help="render the websites of the next N series in the background",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=4,
+        help="number of browser pages to render websites with at once",
+    )
+    parser.add_argument(
+        "--infer-all",
+        action="store_true",
+        help="infer dates and venues for every series to review up front",
+    )
+    parser.add_argument(
+        "--infer-jobs",
+        type=int,
+        default=4,
+        help="number of inferences to run at once",
+    )
+    args = parser.parse_args()
+
     today = datetime.date.today()
     mutes = read_mute_list(today)
-    playwright = sync_playwright().start()
-    browser = playwright.chromium.launch()
-
-    gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
 
-    guessed = []
-    no_upcoming = []
-
-    for fn in sorted(os.listdir(".")):
-        series_id, ext = os.path.splitext(fn)
-        if ext != ".json":
-            continue
+    gmaps = gazetteer.CachedPlaces(googlemaps.Client(key=GOOGLE_MAPS_API_KEY))
 
-        with open(fn) as f:
-            series = json.load(f)
-            start = max(
-                (
-                    datetime.date.fromisoformat(event["startDate"])
-                    for event in series["events"]
-                ),
-                default=None,
+    with catalog.Catalog() as series_catalog:
+        series_catalog.refresh()
+        venues = gazetteer.Gazetteer.from_catalog(series_catalog)
+        no_upcoming = [
+            (
+                row["latest_start"] and datetime.date.fromisoformat(row["latest_start"]),
+                row["id"],
+                row["url"],
             )
-            if start is not None and start >= today or series_id in mutes:
-                continue
-            no_upcoming.append((start, series_id, series))
-            for event in series["events"]:
-                if "guessed" in event.get("sources", []):
-                    guessed.append(event)
+            for row in series_catalog.no_upcoming(
+                today, args.horizon, region=args.region, locale=args.locale
+            )
+            if row["id"] not in mutes
+        ]
 
-    no_upcoming.sort()
+    with (
+        prefetch.Prefetcher(prefetch.PageCache(), pages=args.pages) as prefetcher,
+        infer.InferCache() as infer_cache,
+        infer.Inferrer(claude, prefetcher.get, infer_cache, jobs=args.infer_jobs) as inferrer,
+    ):
+        if args.infer_all:
+            inferrer.queue(url for _, _, url in no_upcoming if url is not None)
+        review(no_upcoming, today, gmaps, venues, prefetcher, inferrer, args.prefetch)
 
+
+def review(no_upcoming, today, gmaps, venues, prefetcher, inferrer, prefetch_ahead):
     termcolor.cprint(f"found {len(no_upcoming)} series to review", "cyan")
     padding = 0
     if no_upcoming:
@@ -273,8 +358,14 @@ def main():
     i = 0
     while True:
         if i < len(no_upcoming):
-            previous_start_date, series_id, series = no_upcoming[i]
+            previous_start_date, series_id, _ = no_upcoming[i]
+            series = read_series(series_id)
             previous_event = series["events"][0]
+            prefetcher.queue(
+                url
+                for _, _, url in no_upcoming[i : i + 1 + prefetch_ahead]
+                if url is not None
+            )
 
             termcolor.cprint(f"{i+1:>{padding}}/{len(no_upcoming)} ", "cyan", end="")
             termcolor.cprint(f"{previous_start_date} ", "green", end="")
@@ -301,7 +392,7 @@ def main():
                 match inp:
                     case "a":
                         try:
-                            handle_add(gmaps, series_id, series)
+                            handle_add(gmaps, venues, series_id, series)
                         except KeyboardInterrupt:
                             print("")
                             break
@@ -311,30 +402,10 @@ def main():
                     case "w":
                         webbrowser.open(previous_event["url"])
                     case "i":
-                        page = browser.new_page()
-                        page.goto(previous_event["url"])
-                        src = page.content()
-                        page.close()
-
-                        msg = claude.messages.create(
-                            max_tokens=1024,
-                            messages=[
-                                {
-                                    "role": "user",
-                                    "content": f"""Extract the following information from this web page, if present:
-
-- startDate: Convention start date (ISO YYYY-mm-dd format)
-- endDate: Convention end date (ISO YYYY-mm-dd format)
-- venue: Convention venue
-
-Output it as JSON with those field names, or null if not possible.
----
-{src}""",
-                                }
-                            ],
-                            model="claude-haiku-4-5",
-                        )
-                        print(msg.content[0].text)
+                        try:
+                            print(inferrer.get(previous_event["url"]))
+                        except Exception as e:
+                            termcolor.cprint(f"  couldn't infer: {e}", "red")
                     case "m":
                         expiry = today + datetime.timedelta(days=90)
                         termcolor.cprint(
@@ -347,7 +418,7 @@ Output it as JSON with those field names, or null if not possible.
             match inp:
                 case "n":
                     try:
-                        handle_new(gmaps)
+                        handle_new(gmaps, venues)
                     except KeyboardInterrupt:
                         print("")
                         break
@@ -376,7 +447,7 @@ Output it as JSON with those field names, or null if not possible.
         print("")
 
 
-def handle_add(gmaps, series_id, series):
+def handle_add(gmaps, venues, series_id, series):
     previous_event = series["events"][0]
 
     previous_start_date = datetime.date.fromisoformat(previous_event["startDate"])
@@ -423,7 +494,7 @@ def handle_add(gmaps, series_id, series):
     locale = icu.Locale.createFromName(previous_event["locale"])
     venue = prompt_for_change("venue", previous_event["venue"])
     if venue != previous_event["venue"]:
-        venue, address, locale, translations, lat_lng = prompt_for_venue(gmaps, venue)
+        venue, address, locale, translations, lat_lng = prompt_for_venue(gmaps, venues, venue)
     else:
         address = previous_event.get("address")
         translations = previous_event.get("translations")
@@ -448,7 +519,7 @@ def handle_add(gmaps, series_id, series):
         **({"latLng": lat_lng} if lat_lng is not None else {}),
     }
 
-    fn = f"{series_id}.json"
+    fn = layout.path_for(series_id)
     termcolor.cprint(f"  {fn} / {event['id']}", attrs=["bold"])
     print(
         "\n".join(
@@ -462,12 +533,14 @@ def handle_add(gmaps, series_id, series):
         json.dump(series, f, indent=2, ensure_ascii=False)
         f.write("\n")
 
+    venues.add(gazetteer.Venue.from_event(event))
 
-def handle_new(gmaps):
+
+def handle_new(gmaps, venues):
     series_name = prompt_for_change("series name")
     url = prompt_for_change("website")
     venue = prompt_for_change("venue")
-    venue, address, locale, translations, lat_lng = prompt_for_venue(gmaps, venue)
+    venue, address, locale, translations, lat_lng = prompt_for_venue(gmaps, venues, venue)
 
     while True:
         try:
@@ -508,7 +581,7 @@ def handle_new(gmaps):
         ],
     }
 
-    fn = f"{series_id}.json"
+    fn = layout.path_for(series_id)
     termcolor.cprint(f"  {fn}", attrs=["bold"])
     print(
         "\n".join(
@@ -517,10 +590,13 @@ def handle_new(gmaps):
         )
     )
 
+    os.makedirs(os.path.dirname(fn) or ".", exist_ok=True)
     with open(fn, "w") as f:
         json.dump(series, f, indent=2, ensure_ascii=False)
         f.write("\n")
 
+    venues.add(gazetteer.Venue.from_event(series["events"][0]))
+
 
 if __name__ == "__main__":
     main()
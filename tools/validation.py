@@ -0,0 +1,336 @@
+"""Schema validation for series files.
+
+schema.json is checked in two tiers. A generic jsonschema validator, extended
+with the ajv formatMinimum/$data keyword the schema uses for date order, is
+the source of truth and produces every error message. In front of it sits a
+validator compiled from the schema into straight-line Python, which can only
+say whether a document is valid: if it says no, the generic validator is run
+to find out why. The compiled validator is cached on disk, keyed by the hash
+of the schema and of this file.
+"""
+
+import datetime
+import hashlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import jsonschema.exceptions
+import jsonschema.validators
+
+
+FORMAT_CHECKER = jsonschema.validators.Draft202012Validator.FORMAT_CHECKER
+
+# Formats that formatMinimum knows how to order.
+FORMAT_PARSERS = {
+    "date": datetime.date.fromisoformat,
+}
+
+
+class UnsupportedSchema(Exception):
+    pass
+
+
+def data_sibling(value):
+    """Return the sibling property a formatMinimum {"$data": "1/<prop>"} refers
+    to, or None if it is anything else."""
+    if not isinstance(value, dict) or set(value) != {"$data"}:
+        return None
+    up, _, prop = value["$data"].partition("/")
+    if up != "1" or not prop or "/" in prop or "~" in prop:
+        return None
+    return prop
+
+
+def format_minimum_ok(value, minimum, format):
+    """Check value >= minimum when both are strings that conform to format.
+
+    Anything else is left to the type and format keywords to report: format
+    checkers pass values that aren't strings.
+    """
+    if not isinstance(value, str) or not isinstance(minimum, str):
+        return True
+    if not FORMAT_CHECKER.conforms(value, format) or not FORMAT_CHECKER.conforms(
+        minimum, format
+    ):
+        return True
+    parse = FORMAT_PARSERS[format]
+    return parse(value) >= parse(minimum)
+
+
+def _properties(validator, properties, instance, schema):
+    yield from jsonschema.validators.Draft202012Validator.VALIDATORS["properties"](
+        validator, properties, instance, schema
+    )
+
+    if not validator.is_type(instance, "object"):
+        return
+
+    for prop, subschema in properties.items():
+        if prop not in instance or not isinstance(subschema, dict):
+            continue
+        other = data_sibling(subschema.get("formatMinimum"))
+        format = subschema.get("format")
+        if other is None or other not in instance or format not in FORMAT_PARSERS:
+            continue
+        if not format_minimum_ok(instance[prop], instance[other], format):
+            yield jsonschema.exceptions.ValidationError(
+                f"{prop} {instance[prop]} is before {other} {instance[other]}",
+                path=[prop],
+                validator="formatMinimum",
+                validator_value=subschema["formatMinimum"],
+            )
+
+
+GenericValidator = jsonschema.validators.extend(
+    jsonschema.validators.Draft202012Validator, {"properties": _properties}
+)
+
+
+TYPE_CHECKS = {
+    "object": "isinstance(i, dict)",
+    "array": "isinstance(i, list)",
+    "string": "isinstance(i, str)",
+    "boolean": "isinstance(i, bool)",
+    "null": "i is None",
+    "number": "(isinstance(i, (int, float)) and not isinstance(i, bool))",
+    "integer": "(isinstance(i, int) and not isinstance(i, bool) or isinstance(i, float) and i.is_integer())",
+}
+
+IS_NUMBER = TYPE_CHECKS["number"]
+
+# Keywords that never affect validity.
+ANNOTATIONS = {"$schema", "$comment", "title", "description", "examples", "default"}
+
+
+class Compiler:
+    """Turns a schema into the source of a module with a validate() function.
+
+    Each subschema becomes one function that returns False on the first
+    failing keyword. Anything the compiler doesn't understand raises
+    UnsupportedSchema, and the generic validator is used on its own.
+    """
+
+    def __init__(self):
+        self.functions = []
+        self.patterns = []
+
+    def compile(self, schema):
+        entry = self.subschema(schema)
+        return "\n".join(
+            [
+                "# Generated by tools/validation.py from schema.json. Do not edit.",
+                "import re",
+                "",
+                *(
+                    f"PATTERN_{n} = re.compile({pattern!r})"
+                    for n, pattern in enumerate(self.patterns)
+                ),
+                "",
+                *self.functions,
+                f"validate = {entry}",
+                "",
+            ]
+        )
+
+    def pattern(self, pattern):
+        self.patterns.append(pattern)
+        return f"PATTERN_{len(self.patterns) - 1}"
+
+    def subschema(self, schema):
+        slot = len(self.functions)
+        name = f"validate_{slot}"
+        # Reserve the slot so nested subschemas get later numbers.
+        self.functions.append(None)
+
+        if schema is True:
+            body = []
+        elif schema is False:
+            body = ["return False"]
+        elif isinstance(schema, dict):
+            body = self.keywords(schema)
+        else:
+            raise UnsupportedSchema(f"schema is a {type(schema).__name__}")
+
+        self.functions[slot] = "\n".join(
+            [f"def {name}(i):", *(f"    {line}" for line in body), "    return True", ""]
+        )
+        return name
+
+    def keywords(self, schema):
+        body = []
+        for keyword, value in schema.items():
+            if keyword in ANNOTATIONS:
+                continue
+            handler = getattr(self, f"keyword_{keyword}", None)
+            if handler is None:
+                raise UnsupportedSchema(f"unsupported keyword {keyword!r}")
+            body.extend(handler(value, schema))
+        return body
+
+    def keyword_type(self, value, schema):
+        types = [value] if isinstance(value, str) else value
+        if any(t not in TYPE_CHECKS for t in types):
+            raise UnsupportedSchema(f"unsupported type {value!r}")
+        return [f"if not ({' or '.join(TYPE_CHECKS[t] for t in types)}): return False"]
+
+    def keyword_properties(self, value, schema):
+        body = []
+        for prop, subschema in value.items():
+            check = self.subschema(subschema)
+            body.append(f"if {prop!r} in i and not {check}(i[{prop!r}]): return False")
+
+            if not isinstance(subschema, dict) or "formatMinimum" not in subschema:
+                continue
+            other = data_sibling(subschema["formatMinimum"])
+            format = subschema.get("format")
+            if other is None or format not in FORMAT_PARSERS:
+                raise UnsupportedSchema(f"unsupported formatMinimum on {prop!r}")
+            body.append(
+                f"if {prop!r} in i and {other!r} in i and "
+                f"not format_minimum_ok(i[{prop!r}], i[{other!r}], {format!r}): return False"
+            )
+        return ["if isinstance(i, dict):", *(f"    {line}" for line in body)] if body else []
+
+    def keyword_formatMinimum(self, value, schema):
+        # Enforced by the parent's properties, which can see the sibling.
+        if data_sibling(value) is None:
+            raise UnsupportedSchema("formatMinimum without a 1/<prop> $data")
+        return []
+
+    def keyword_required(self, value, schema):
+        return [
+            f"if isinstance(i, dict) and {prop!r} not in i: return False"
+            for prop in value
+        ]
+
+    def keyword_additionalProperties(self, value, schema):
+        if "patternProperties" in schema:
+            raise UnsupportedSchema("patternProperties")
+        known = "{" + ", ".join(repr(k) for k in sorted(schema.get("properties", {}))) + "}"
+        if value is False:
+            return [
+                f"if isinstance(i, dict) and not i.keys() <= {known}: return False"
+                if known != "{}"
+                else "if isinstance(i, dict) and i: return False"
+            ]
+        check = self.subschema(value)
+        return [
+            "if isinstance(i, dict):",
+            "    for k, v in i.items():",
+            f"        if k not in {known} and not {check}(v): return False"
+            if known != "{}"
+            else f"        if not {check}(v): return False",
+        ]
+
+    def keyword_prefixItems(self, value, schema):
+        body = []
+        for n, subschema in enumerate(value):
+            check = self.subschema(subschema)
+            body.append(f"if len(i) > {n} and not {check}(i[{n}]): return False")
+        return ["if isinstance(i, list):", *(f"    {line}" for line in body)]
+
+    def keyword_items(self, value, schema):
+        prefix = len(schema.get("prefixItems", []))
+        if value is False:
+            return [f"if isinstance(i, list) and len(i) > {prefix}: return False"]
+        check = self.subschema(value)
+        return [
+            "if isinstance(i, list):",
+            f"    for v in {f'i[{prefix}:]' if prefix else 'i'}:",
+            f"        if not {check}(v): return False",
+        ]
+
+    def keyword_minItems(self, value, schema):
+        return [f"if isinstance(i, list) and len(i) < {value!r}: return False"]
+
+    def keyword_maxItems(self, value, schema):
+        return [f"if isinstance(i, list) and len(i) > {value!r}: return False"]
+
+    def keyword_minLength(self, value, schema):
+        return [f"if isinstance(i, str) and len(i) < {value!r}: return False"]
+
+    def keyword_maxLength(self, value, schema):
+        return [f"if isinstance(i, str) and len(i) > {value!r}: return False"]
+
+    def keyword_pattern(self, value, schema):
+        return [
+            f"if isinstance(i, str) and not {self.pattern(value)}.search(i): return False"
+        ]
+
+    def keyword_minimum(self, value, schema):
+        return [f"if {IS_NUMBER} and i < {value!r}: return False"]
+
+    def keyword_maximum(self, value, schema):
+        return [f"if {IS_NUMBER} and i > {value!r}: return False"]
+
+    def keyword_format(self, value, schema):
+        # Like jsonschema, formats the checker doesn't know are annotations.
+        if value not in FORMAT_CHECKER.checkers:
+            return []
+        return [f"if not conforms(i, {value!r}): return False"]
+
+
+def compile_schema(schema):
+    return Compiler().compile(schema)
+
+
+def load_compiled(schema, cache_dir):
+    """Return the compiled validate function for schema, or None if the schema
+    uses something the compiler doesn't support."""
+    h = hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8"))
+    with open(__file__, "rb") as f:
+        h.update(f.read())
+    # Which formats are checked is decided at compile time, and depends on
+    # the jsonschema version and which of its optional packages are installed.
+    formats = [importlib.metadata.version("jsonschema"), sorted(FORMAT_CHECKER.checkers)]
+    h.update(json.dumps(formats).encode("utf-8"))
+    name = f"schema_{h.hexdigest()[:16]}"
+    path = os.path.join(cache_dir, f"{name}.py")
+
+    helpers = {
+        "conforms": FORMAT_CHECKER.conforms,
+        "format_minimum_ok": format_minimum_ok,
+    }
+
+    if not os.path.exists(path):
+        try:
+            source = compile_schema(schema)
+        except UnsupportedSchema:
+            return None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write-then-rename, so a concurrent build never imports half a
+            # file.
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(source)
+            os.replace(tmp_path, path)
+        except OSError:
+            namespace = dict(helpers)
+            exec(compile(source, path, "exec"), namespace)
+            return namespace["validate"]
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    module.__dict__.update(helpers)
+    spec.loader.exec_module(module)
+    return module.validate
+
+
+class Validator:
+    """Validates against schema.json, via the compiled validator when it can.
+
+    iter_errors yields exactly what the generic validator would: the compiled
+    validator only decides whether the generic one needs to run at all.
+    """
+
+    def __init__(self, schema, cache_dir):
+        GenericValidator.check_schema(schema)
+        self.generic = GenericValidator(schema, format_checker=FORMAT_CHECKER)
+        self.compiled = load_compiled(schema, cache_dir)
+
+    def iter_errors(self, instance):
+        if self.compiled is not None and self.compiled(instance):
+            return iter(())
+        return self.generic.iter_errors(instance)